@@ -0,0 +1,29 @@
+-- API routes now set "legacyId" = "id" on insert. Backfill existing rows once,
+-- then keep partial indexes so the per-organization safety-net backfill only
+-- visits rows that are still missing a legacy id (normally none).
+
+-- One-time backfill
+UPDATE "Hotel" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Building" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Floor" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Room" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Space" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "StaffMember" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Task" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Technician" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Session" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "BlockedSlot" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+UPDATE "Contract" SET "legacyId"="id" WHERE "legacyId" IS NULL;
+
+-- Leftover lookups (not expressible in schema.prisma)
+CREATE INDEX "Hotel_legacyId_missing_idx" ON "Hotel"("organizationId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Building_legacyId_missing_idx" ON "Building"("hotelId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Floor_legacyId_missing_idx" ON "Floor"("buildingId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Room_legacyId_missing_idx" ON "Room"("floorId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Space_legacyId_missing_idx" ON "Space"("floorId") WHERE "legacyId" IS NULL;
+CREATE INDEX "StaffMember_legacyId_missing_idx" ON "StaffMember"("organizationId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Task_legacyId_missing_idx" ON "Task"("organizationId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Technician_legacyId_missing_idx" ON "Technician"("organizationId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Session_legacyId_missing_idx" ON "Session"("organizationId") WHERE "legacyId" IS NULL;
+CREATE INDEX "BlockedSlot_legacyId_missing_idx" ON "BlockedSlot"("organizationId") WHERE "legacyId" IS NULL;
+CREATE INDEX "Contract_legacyId_missing_idx" ON "Contract"("organizationId") WHERE "legacyId" IS NULL;
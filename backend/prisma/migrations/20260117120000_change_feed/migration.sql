@@ -0,0 +1,21 @@
+-- CreateEnum
+CREATE TYPE "ChangeOp" AS ENUM ('UPSERT', 'DELETE');
+
+-- CreateTable
+CREATE TABLE "ChangeLogEntry" (
+  "id" BIGSERIAL NOT NULL,
+  "organizationId" TEXT NOT NULL,
+  "hotelId" TEXT NOT NULL,
+  "entity" TEXT NOT NULL,
+  "entityId" TEXT NOT NULL,
+  "op" "ChangeOp" NOT NULL DEFAULT 'UPSERT',
+  "at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+  CONSTRAINT "ChangeLogEntry_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "ChangeLogEntry_hotelId_id_idx" ON "ChangeLogEntry"("hotelId", "id");
+
+-- AddForeignKey
+ALTER TABLE "ChangeLogEntry" ADD CONSTRAINT "ChangeLogEntry_hotelId_fkey" FOREIGN KEY ("hotelId") REFERENCES "Hotel"("id") ON DELETE CASCADE ON UPDATE CASCADE;
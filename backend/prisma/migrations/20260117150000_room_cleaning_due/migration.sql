@@ -0,0 +1,6 @@
+-- Cleaning planner (GET /cleaning/due): rooms ordered by next due date, never-cleaned first.
+-- The expression must match the ORDER BY in routes/cleaning.ts (not expressible in schema.prisma).
+CREATE INDEX "Room_cleaningDue_idx" ON "Room"(
+  (COALESCE("lastCleanedAt" + "cleaningFrequencyDays" * INTERVAL '1 day', '-infinity'::timestamp)),
+  "id"
+) WHERE "active" AND "cleaningFrequencyDays" IS NOT NULL;
@@ -0,0 +1,10 @@
+-- GET /search: trigram indexes for ILIKE '%q%' and word similarity (`<%`) lookups.
+-- Expressions must match routes/search.ts (not expressible in schema.prisma).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX "Task_description_trgm_idx" ON "Task" USING GIN ("description" gin_trgm_ops);
+CREATE INDEX "TaskEvent_note_trgm_idx" ON "TaskEvent" USING GIN ("note" gin_trgm_ops) WHERE "note" <> '';
+CREATE INDEX "Room_search_trgm_idx" ON "Room" USING GIN (("roomNumber" || ' ' || "notes") gin_trgm_ops);
+CREATE INDEX "Quote_search_trgm_idx" ON "Quote" USING GIN (
+  ("title" || ' ' || COALESCE("customer"->>'company', '') || ' ' || COALESCE("customer"->>'contact', '')) gin_trgm_ops
+);
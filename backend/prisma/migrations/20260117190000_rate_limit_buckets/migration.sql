@@ -0,0 +1,9 @@
+-- CreateTable (UNLOGGED: skips WAL, contents may be lost on crash, which only resets limits)
+CREATE UNLOGGED TABLE "RateLimitBucket" (
+    "key" TEXT NOT NULL,
+    "tokens" DOUBLE PRECISION NOT NULL,
+    "allowed" BOOLEAN NOT NULL DEFAULT true,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "RateLimitBucket_pkey" PRIMARY KEY ("key")
+);
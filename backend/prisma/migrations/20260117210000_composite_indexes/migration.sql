@@ -0,0 +1,20 @@
+-- Composite indexes matching the hot access paths (checked by scripts/query_plan_bench.py).
+-- Each replaces a single-column index that is now its leading prefix.
+
+-- DropIndex
+DROP INDEX "Task_organizationId_idx";
+
+-- DropIndex
+DROP INDEX "Reservation_hotelId_idx";
+
+-- DropIndex
+DROP INDEX "Session_hotelId_idx";
+
+-- CreateIndex
+CREATE INDEX "Task_organizationId_hotelId_createdAt_idx" ON "Task"("organizationId", "hotelId", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "Reservation_hotel_approval_date_idx" ON "Reservation"("hotelId", "statusAdmin", "statusHotel", "proposedDate", "proposedStart", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "Session_hotelId_date_idx" ON "Session"("hotelId", "date");
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "ChangeLogEntry_at_idx" ON "ChangeLogEntry"("at");
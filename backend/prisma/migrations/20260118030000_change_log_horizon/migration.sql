@@ -0,0 +1,10 @@
+-- CreateTable
+CREATE TABLE "ChangeLogHorizon" (
+    "hotelId" TEXT NOT NULL,
+    "prunedThrough" BIGINT NOT NULL,
+
+    CONSTRAINT "ChangeLogHorizon_pkey" PRIMARY KEY ("hotelId")
+);
+
+-- AddForeignKey
+ALTER TABLE "ChangeLogHorizon" ADD CONSTRAINT "ChangeLogHorizon_hotelId_fkey" FOREIGN KEY ("hotelId") REFERENCES "Hotel"("id") ON DELETE CASCADE ON UPDATE CASCADE;
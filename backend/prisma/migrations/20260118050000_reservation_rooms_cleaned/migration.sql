@@ -0,0 +1,3 @@
+-- AlterTable
+ALTER TABLE "Reservation" ADD COLUMN "roomsCleanedAt" TIMESTAMP(3);
+ALTER TABLE "Reservation" ADD COLUMN "roomsCleanedBefore" JSONB NOT NULL DEFAULT '{}';
@@ -0,0 +1,135 @@
+import { getPrisma, type DbClient } from './db';
+import { getHotelEvents, type HotelEvent } from './events';
+
+export type ChangeEntity = 'task' | 'reservation' | 'session' | 'building' | 'floor' | 'room' | 'space';
+
+export type ChangeOp = 'UPSERT' | 'DELETE';
+
+export type PendingChange = {
+  organizationId: string;
+  hotelId: string;
+  entity: ChangeEntity;
+  id: string;
+  op?: ChangeOp;
+};
+
+// First key of the per-hotel advisory locks taken by writeChanges (second key: hotel id hash).
+const CHANGE_LOG_LOCK = 0x63686c67;
+
+// CHANGE_LOG_RETENTION_DAYS: entries older than this are pruned (default 30, 0 = keep all).
+// The highest pruned id per hotel is kept in ChangeLogHorizon; older cursors get a resync.
+const RETENTION_DAYS = Number(process.env.CHANGE_LOG_RETENTION_DAYS || 30);
+
+let pruneStarted = false;
+
+function startPrune() {
+  if (pruneStarted || !(RETENTION_DAYS > 0)) return;
+  pruneStarted = true;
+  setInterval(() => {
+    void getPrisma()
+      .$executeRaw`
+        WITH pruned AS (
+          DELETE FROM "ChangeLogEntry"
+          WHERE "at" < LOCALTIMESTAMP - ${RETENTION_DAYS} * INTERVAL '1 day'
+          RETURNING "hotelId", "id"
+        )
+        INSERT INTO "ChangeLogHorizon" ("hotelId", "prunedThrough")
+        SELECT "hotelId", max("id") FROM pruned GROUP BY "hotelId"
+        ON CONFLICT ("hotelId") DO UPDATE
+          SET "prunedThrough" = GREATEST("ChangeLogHorizon"."prunedThrough", EXCLUDED."prunedThrough")
+      `
+      .catch((err) => console.error('[changes] prune failed:', err));
+  }, 60 * 60_000).unref();
+}
+
+// True when entries of the hotel after `since` have been pruned: the client must reload and
+// take a fresh cursor instead of applying the feed.
+export async function isCursorExpired(hotelId: string, since: bigint): Promise<boolean> {
+  const horizon = await getPrisma().changeLogHorizon.findUnique({ where: { hotelId }, select: { prunedThrough: true } });
+  return horizon !== null && since < horizon.prunedThrough;
+}
+
+// Current cursor of a hotel's feed. Ids are only commit-ordered within a hotel, so a cursor is
+// always a position in that hotel's own entries (never the global head).
+export async function hotelHead(hotelId: string): Promise<bigint> {
+  const prisma = getPrisma();
+  const head = await prisma.changeLogEntry.findFirst({ where: { hotelId }, orderBy: { id: 'desc' }, select: { id: true } });
+  if (head) return head.id;
+  const horizon = await prisma.changeLogHorizon.findUnique({ where: { hotelId }, select: { prunedThrough: true } });
+  return horizon?.prunedThrough ?? BigInt(0);
+}
+
+// Queues change feed entries; withChangeLog writes them in the mutation's transaction.
+// Task events, attachments and incidents are recorded as a `task` upsert (clients re-read the
+// whole task with its events).
+export function recordChanges(
+  changes: PendingChange[],
+  organizationId: string,
+  hotelId: string,
+  entity: ChangeEntity,
+  entityIds: string[],
+  op: ChangeOp = 'UPSERT'
+) {
+  for (const id of entityIds) changes.push({ organizationId, hotelId, entity, id, op });
+}
+
+export function recordChange(
+  changes: PendingChange[],
+  organizationId: string,
+  hotelId: string,
+  entity: ChangeEntity,
+  entityId: string,
+  op: ChangeOp = 'UPSERT'
+) {
+  recordChanges(changes, organizationId, hotelId, entity, [entityId], op);
+}
+
+// Inserts queued changes inside the caller's transaction. Each hotel's feed is locked until
+// commit before its ids are drawn, so within a hotel ids become visible in commit order and
+// `id > cursor` readers never skip an entry. Locks are taken in hotel id order (no deadlocks
+// between multi-hotel transactions).
+export async function writeChanges(tx: DbClient, changes: PendingChange[]): Promise<HotelEvent[]> {
+  const seen = new Set<string>();
+  const data: { organizationId: string; hotelId: string; entity: ChangeEntity; entityId: string; op: ChangeOp }[] = [];
+  for (const c of changes) {
+    const op = c.op || 'UPSERT';
+    const key = `${c.hotelId}|${c.entity}|${c.id}|${op}`;
+    if (seen.has(key)) continue;
+    seen.add(key);
+    data.push({ organizationId: c.organizationId, hotelId: c.hotelId, entity: c.entity, entityId: c.id, op });
+  }
+  if (!data.length) return [];
+
+  for (const hotelId of [...new Set(data.map((d) => d.hotelId))].sort()) {
+    await tx.$executeRaw`SELECT pg_advisory_xact_lock(${CHANGE_LOG_LOCK}::int, hashtext(${hotelId}))`;
+  }
+  const rows = await tx.changeLogEntry.createManyAndReturn({
+    data,
+    select: { id: true, hotelId: true, entity: true, entityId: true, op: true }
+  });
+  return rows.map((r) => ({
+    seq: String(r.id),
+    hotelId: r.hotelId,
+    entity: r.entity,
+    op: r.op === 'DELETE' ? 'delete' : 'upsert',
+    id: r.entityId
+  }));
+}
+
+// Runs a mutation and its change feed entries in one transaction (outbox): both commit or
+// neither does. Subscribers of `/hotels/:hotelId/events` are notified after the commit.
+export async function withChangeLog<T>(
+  fn: (tx: DbClient, changes: PendingChange[]) => Promise<T>,
+  options?: { timeout?: number }
+): Promise<T> {
+  startPrune();
+  let events: HotelEvent[] = [];
+  const result = await getPrisma().$transaction(async (tx) => {
+    const changes: PendingChange[] = [];
+    const out = await fn(tx, changes);
+    events = await writeChanges(tx, changes);
+    return out;
+  }, options);
+  getHotelEvents().publish(events);
+  return result;
+}
@@ -0,0 +1,146 @@
+import cluster from 'cluster';
+import os from 'os';
+import { type Server } from 'http';
+import { type Express, type NextFunction, type Request, type Response } from 'express';
+import { getPrisma } from './db';
+
+// API_WORKERS: number of worker processes ("auto" = one per CPU core). Default 1 (no cluster).
+export function readWorkerCount(): number {
+  const raw = String(process.env.API_WORKERS || '1').trim().toLowerCase();
+  const cores = typeof os.availableParallelism === 'function' ? os.availableParallelism() : os.cpus().length;
+  if (raw === 'auto' || raw === '0') return Math.max(1, cores);
+  const n = Number(raw);
+  if (!Number.isInteger(n) || n <= 0) throw new Error('Invalid API_WORKERS');
+  return n;
+}
+
+// DB_CONNECTION_BUDGET is the total number of Postgres connections the API may hold; each
+// worker gets an equal share as its Prisma pool (passed down as DB_POOL_SIZE).
+export function poolSizePerWorker(workers: number): number | null {
+  const budget = Number(process.env.DB_CONNECTION_BUDGET || 0);
+  if (!Number.isFinite(budget) || budget <= 0) return null;
+  return Math.max(2, Math.floor(budget / workers));
+}
+
+const SHUTDOWN_TIMEOUT_MS = Number(process.env.SHUTDOWN_TIMEOUT_MS || 10_000);
+
+let shuttingDown = false;
+const shutdownHooks = new Set<() => void>();
+
+export function isShuttingDown() {
+  return shuttingDown;
+}
+
+// Long-lived responses (SSE) register here so they can be ended when draining starts.
+export function onShutdown(hook: () => void): () => void {
+  shutdownHooks.add(hook);
+  return () => {
+    shutdownHooks.delete(hook);
+  };
+}
+
+// Keep-alive clients are told to reconnect elsewhere once draining has started.
+export function closeConnectionsWhileDraining(_req: Request, res: Response, next: NextFunction) {
+  if (shuttingDown) res.setHeader('Connection', 'close');
+  next();
+}
+
+// Stops accepting connections, waits for in-flight requests (up to SHUTDOWN_TIMEOUT_MS),
+// then disconnects Prisma and exits.
+function installGracefulShutdown(server: Server, label: string) {
+  const shutdown = (signal: string) => {
+    if (shuttingDown) return;
+    shuttingDown = true;
+    console.log(`[api] ${label} received ${signal}, draining`);
+
+    for (const hook of Array.from(shutdownHooks)) {
+      try {
+        hook();
+      } catch (err) {
+        console.error('[api] shutdown hook failed:', err);
+      }
+    }
+
+    const force = setTimeout(() => {
+      console.warn(`[api] ${label} drain timed out, closing remaining connections`);
+      server.closeAllConnections();
+    }, SHUTDOWN_TIMEOUT_MS);
+    force.unref();
+
+    server.close(async () => {
+      clearTimeout(force);
+      try {
+        await getPrisma().$disconnect();
+      } catch (err) {
+        console.error('[api] prisma disconnect failed:', err);
+      }
+      process.exit(0);
+    });
+    server.closeIdleConnections();
+  };
+
+  // `on`, not `once`: under a TTY a worker gets SIGINT from the terminal and again from the
+  // primary, and a second signal without a listener would kill it mid-drain.
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+  process.on('SIGINT', () => shutdown('SIGINT'));
+}
+
+function listen(app: Express, port: number, label: string) {
+  const server = app.listen(port, () => {
+    // eslint-disable-next-line no-console
+    console.log(`[api] ${label} listening on :${port}`);
+  });
+  installGracefulShutdown(server, label);
+}
+
+function runPrimary(workers: number) {
+  const poolSize = poolSizePerWorker(workers);
+  const workerEnv: Record<string, string> = {
+    // In-process events would only reach subscribers of the same worker.
+    EVENTS_BACKEND: process.env.EVENTS_BACKEND || 'changelog',
+    // PATCH /pricing/defaults only invalidates the cache of the worker that handled it.
+    PRICING_CACHE_POLL_MS: process.env.PRICING_CACHE_POLL_MS || '5000',
+    ...(poolSize ? { DB_POOL_SIZE: String(poolSize) } : {})
+  };
+  if (workerEnv.EVENTS_BACKEND === 'local') {
+    console.warn('[api] EVENTS_BACKEND=local with several workers: live updates only reach clients of the same worker');
+  }
+  let stopping = false;
+
+  console.log(`[api] primary ${process.pid} starting ${workers} workers${poolSize ? ` (db pool ${poolSize} each)` : ''}`);
+  for (let i = 0; i < workers; i += 1) cluster.fork(workerEnv);
+
+  cluster.on('exit', (worker, code, signal) => {
+    if (stopping) {
+      if (!Object.keys(cluster.workers || {}).length) process.exit(0);
+      return;
+    }
+    console.error(`[api] worker ${worker.process.pid} exited (${signal || code}), restarting`);
+    setTimeout(() => {
+      if (!stopping) cluster.fork(workerEnv);
+    }, 1000);
+  });
+
+  const stop = (signal: NodeJS.Signals) => {
+    if (stopping) return;
+    stopping = true;
+    console.log(`[api] primary received ${signal}, stopping workers`);
+    const alive = Object.values(cluster.workers || {});
+    if (!alive.length) process.exit(0);
+    for (const worker of alive) worker?.process.kill(signal);
+    setTimeout(() => process.exit(1), SHUTDOWN_TIMEOUT_MS + 5000).unref();
+  };
+  process.on('SIGTERM', () => stop('SIGTERM'));
+  process.on('SIGINT', () => stop('SIGINT'));
+}
+
+export function startServer(app: Express, port: number) {
+  const workers = readWorkerCount();
+  if (workers > 1 && cluster.isPrimary) return runPrimary(workers);
+
+  if (workers === 1 && !process.env.DB_POOL_SIZE) {
+    const poolSize = poolSizePerWorker(1);
+    if (poolSize) process.env.DB_POOL_SIZE = String(poolSize);
+  }
+  listen(app, port, cluster.isWorker ? `worker ${process.pid}` : 'server');
+}
@@ -0,0 +1,63 @@
+import zlib from 'zlib';
+import { type NextFunction, type Request, type Response } from 'express';
+
+// COMPRESSION_MIN_BYTES: bodies smaller than this go out as-is (default 1024).
+// COMPRESSION_DISABLED=1: never compress here (e.g. to leave it to the reverse proxy).
+const MIN_BYTES = Number(process.env.COMPRESSION_MIN_BYTES || 1024);
+
+const COMPRESSIBLE_TYPE = /^(application\/(json|x-ndjson)|text\/(plain|csv|html))\b/i;
+
+// Brotli's default quality (11) is meant for static assets; 4 compresses about as well as
+// gzip -6 at a similar cost.
+const BROTLI_OPTIONS: zlib.BrotliOptions = {
+  params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 4 }
+};
+
+function compress(encoding: 'br' | 'gzip', body: Buffer, cb: (err: Error | null, out: Buffer) => void) {
+  if (encoding === 'br') zlib.brotliCompress(body, BROTLI_OPTIONS, cb);
+  else zlib.gzip(body, cb);
+}
+
+// Compresses buffered responses (everything sent through res.json / res.send) with brotli or
+// gzip, as negotiated from Accept-Encoding. Compression runs on the libuv thread pool, not on
+// the event loop. Streamed responses (SSE, video ranges, file downloads) write directly to the
+// socket and are never touched.
+export function compressResponses(req: Request, res: Response, next: NextFunction) {
+  if (process.env.COMPRESSION_DISABLED === '1') return next();
+
+  const send = res.send.bind(res);
+  res.send = (body?: any) => {
+    const type = String(res.getHeader('Content-Type') || '');
+    if (!COMPRESSIBLE_TYPE.test(type) || (typeof body !== 'string' && !Buffer.isBuffer(body))) return send(body);
+    res.vary('Accept-Encoding');
+
+    const cacheControl = String(res.getHeader('Cache-Control') || '');
+    if (
+      req.method === 'HEAD' ||
+      res.statusCode === 204 ||
+      res.statusCode === 304 ||
+      res.getHeader('Content-Encoding') ||
+      /\bno-transform\b/i.test(cacheControl)
+    ) {
+      return send(body);
+    }
+
+    const raw = typeof body === 'string' ? Buffer.from(body, 'utf8') : body;
+    if (raw.length < MIN_BYTES) return send(body);
+    const encoding = req.acceptsEncodings('br', 'gzip');
+    if (encoding !== 'br' && encoding !== 'gzip') return send(body);
+
+    compress(encoding, raw, (err, out) => {
+      if (res.headersSent || res.destroyed) return;
+      if (err) {
+        console.error('[api] response compression failed:', err);
+        send(raw);
+        return;
+      }
+      res.setHeader('Content-Encoding', encoding);
+      send(out);
+    });
+    return res;
+  };
+  next();
+}
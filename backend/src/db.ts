@@ -1,11 +1,32 @@
 import { PrismaClient } from '@prisma/client';
+import { queryTracing } from './queryTrace';
 
-let prismaSingleton: PrismaClient | null = null;
+// DB_POOL_SIZE (set per worker in cluster mode) overrides the pool size in DATABASE_URL.
+function databaseUrl(): string | undefined {
+  const url = process.env.DATABASE_URL;
+  const poolSize = Number(process.env.DB_POOL_SIZE || 0);
+  if (!url || !Number.isInteger(poolSize) || poolSize <= 0) return undefined;
+  const u = new URL(url);
+  u.searchParams.set('connection_limit', String(poolSize));
+  return u.toString();
+}
+
+function createClient() {
+  const url = databaseUrl();
+  const base = url ? new PrismaClient({ datasources: { db: { url } } }) : new PrismaClient();
+  return base.$extends(queryTracing);
+}
+
+export type Db = ReturnType<typeof createClient>;
 
-export function getPrisma(): PrismaClient {
+// The client or an interactive transaction (`getPrisma().$transaction(async (tx) => ...)`).
+export type DbClient = Omit<Db, '$connect' | '$disconnect' | '$on' | '$transaction' | '$use' | '$extends'>;
+
+let prismaSingleton: Db | null = null;
+
+export function getPrisma(): Db {
   if (!prismaSingleton) {
-    prismaSingleton = new PrismaClient();
+    prismaSingleton = createClient();
   }
   return prismaSingleton;
 }
-
@@ -0,0 +1,195 @@
+import { EventEmitter } from 'events';
+import { getPrisma } from './db';
+
+// A change notification pushed to `/hotels/:hotelId/events` subscribers.
+// `seq` is the change feed cursor, so clients can resume with `?since=` after a gap.
+export type HotelEvent = {
+  seq: string;
+  hotelId: string;
+  entity: string;
+  op: 'upsert' | 'delete';
+  id: string;
+};
+
+export type HotelEventListener = (event: HotelEvent) => void;
+
+// Transport between API instances. `publish` is called after the change has been
+// committed to the change feed; `start`/`stop` bracket the time anyone is subscribed and
+// `watch`/`unwatch` the time a given hotel has subscribers (`since`: that hotel's cursor).
+export interface EventBackend {
+  publish(events: HotelEvent[]): void;
+  start(deliver: (events: HotelEvent[]) => void): void;
+  stop(): void;
+  watch(hotelId: string, since: bigint): void;
+  unwatch(hotelId: string): void;
+}
+
+// Single-process backend: delivers synchronously to this instance's subscribers.
+export class LocalEventBackend implements EventBackend {
+  private deliver: ((events: HotelEvent[]) => void) | null = null;
+
+  publish(events: HotelEvent[]) {
+    this.deliver?.(events);
+  }
+
+  start(deliver: (events: HotelEvent[]) => void) {
+    this.deliver = deliver;
+  }
+
+  stop() {
+    this.deliver = null;
+  }
+
+  watch() {}
+
+  unwatch() {}
+}
+
+// Multi-instance backend: every instance tails the shared ChangeLogEntry table for the hotels
+// it has subscribers for, so a mutation handled by one instance reaches subscribers on all of
+// them. Local publishes are ignored because the poller picks the same rows up. Ids are only
+// commit-ordered within a hotel (see writeChanges), hence one cursor per hotel.
+export class ChangeLogEventBackend implements EventBackend {
+  private timer: NodeJS.Timeout | null = null;
+  private cursors = new Map<string, bigint>();
+  private polling = false;
+
+  constructor(private intervalMs = 500) {}
+
+  publish() {}
+
+  start(deliver: (events: HotelEvent[]) => void) {
+    if (this.timer) return;
+    this.timer = setInterval(() => {
+      void this.poll(deliver);
+    }, this.intervalMs);
+  }
+
+  stop() {
+    if (this.timer) clearInterval(this.timer);
+    this.timer = null;
+  }
+
+  // A hotel already watched keeps its cursor: everything up to it was committed before the new
+  // subscriber's replay reads the feed.
+  watch(hotelId: string, since: bigint) {
+    if (!this.cursors.has(hotelId)) this.cursors.set(hotelId, since);
+  }
+
+  unwatch(hotelId: string) {
+    this.cursors.delete(hotelId);
+  }
+
+  private async poll(deliver: (events: HotelEvent[]) => void) {
+    if (this.polling || !this.cursors.size) return;
+    this.polling = true;
+    try {
+      const rows = await getPrisma().changeLogEntry.findMany({
+        where: { OR: Array.from(this.cursors, ([hotelId, since]) => ({ hotelId, id: { gt: since } })) },
+        orderBy: { id: 'asc' },
+        take: 1000,
+        select: { id: true, hotelId: true, entity: true, entityId: true, op: true }
+      });
+      if (!rows.length) return;
+      // Rows come in id order, so per hotel they are a prefix of what is past its cursor.
+      for (const r of rows) {
+        const cursor = this.cursors.get(r.hotelId);
+        if (cursor !== undefined && r.id > cursor) this.cursors.set(r.hotelId, r.id);
+      }
+      deliver(
+        rows.map((r) => ({
+          seq: String(r.id),
+          hotelId: r.hotelId,
+          entity: r.entity,
+          op: r.op === 'DELETE' ? 'delete' : 'upsert',
+          id: r.entityId
+        }))
+      );
+    } catch (err) {
+      console.error('[events] change log poll failed:', err);
+    } finally {
+      this.polling = false;
+    }
+  }
+}
+
+function createBackend(): EventBackend {
+  const kind = String(process.env.EVENTS_BACKEND || 'local').trim().toLowerCase();
+  if (kind === 'changelog') return new ChangeLogEventBackend(Number(process.env.EVENTS_POLL_MS || 500) || 500);
+  return new LocalEventBackend();
+}
+
+class HotelEventBus {
+  private emitter = new EventEmitter();
+  private listeners = 0;
+  private watched = new Map<string, bigint>();
+  private backend: EventBackend;
+
+  constructor(backend: EventBackend) {
+    this.backend = backend;
+    // One listener per open SSE connection.
+    this.emitter.setMaxListeners(0);
+  }
+
+  setBackend(backend: EventBackend) {
+    if (this.listeners) this.backend.stop();
+    for (const [hotelId, since] of this.watched) {
+      this.backend.unwatch(hotelId);
+      backend.watch(hotelId, since);
+    }
+    this.backend = backend;
+    if (this.listeners) this.backend.start((events) => this.dispatch(events));
+  }
+
+  publish(events: HotelEvent[]) {
+    if (!events.length) return;
+    try {
+      this.backend.publish(events);
+    } catch (err) {
+      console.error('[events] publish failed:', err);
+    }
+  }
+
+  // `since`: the subscriber's cursor for the hotel (what it has already read from the feed).
+  subscribe(hotelId: string, listener: HotelEventListener, since: bigint): () => void {
+    if (!this.emitter.listenerCount(hotelId)) {
+      this.watched.set(hotelId, since);
+      this.backend.watch(hotelId, since);
+    }
+    this.emitter.on(hotelId, listener);
+    this.listeners += 1;
+    if (this.listeners === 1) this.backend.start((events) => this.dispatch(events));
+
+    let active = true;
+    return () => {
+      if (!active) return;
+      active = false;
+      this.emitter.off(hotelId, listener);
+      this.listeners -= 1;
+      if (!this.emitter.listenerCount(hotelId)) {
+        this.watched.delete(hotelId);
+        this.backend.unwatch(hotelId);
+      }
+      if (this.listeners === 0) this.backend.stop();
+    };
+  }
+
+  private dispatch(events: HotelEvent[]) {
+    for (const event of events) {
+      try {
+        this.emitter.emit(event.hotelId, event);
+      } catch (err) {
+        console.error('[events] listener failed:', err);
+      }
+    }
+  }
+}
+
+let busSingleton: HotelEventBus | null = null;
+
+export function getHotelEvents(): HotelEventBus {
+  if (!busSingleton) {
+    busSingleton = new HotelEventBus(createBackend());
+  }
+  return busSingleton;
+}
@@ -0,0 +1,164 @@
+import { createHash } from 'crypto';
+import { type NextFunction, type Response } from 'express';
+import { getPrisma } from './db';
+import { type AuthedRequest } from './auth/middleware';
+
+// IDEMPOTENCY_TTL_HOURS: how long a stored response is replayed for a repeated key (default 24).
+// IDEMPOTENCY_WAIT_MS: how long a concurrent duplicate waits for the first request (default 10000).
+const TTL_SECONDS = Number(process.env.IDEMPOTENCY_TTL_HOURS || 24) * 3600;
+const WAIT_MS = Number(process.env.IDEMPOTENCY_WAIT_MS || 10_000);
+const POLL_MS = 150;
+// A request still unanswered after this long is assumed dead (crashed worker).
+const STALE_SECONDS = 120;
+const MAX_KEY_LENGTH = 255;
+
+type StoredResponse = {
+  fingerprint: string;
+  status: number | null;
+  contentType: string;
+  body: string;
+};
+
+// Requests of this process still running, so a duplicate arriving here waits on the original
+// instead of polling the table. Duplicates landing on another worker fall back to polling.
+const inflight = new Map<string, Promise<void>>();
+
+let cleanupStarted = false;
+
+function startCleanup() {
+  if (cleanupStarted) return;
+  cleanupStarted = true;
+  setInterval(() => {
+    void getPrisma()
+      .$executeRaw`DELETE FROM "IdempotencyKey" WHERE "expiresAt" < LOCALTIMESTAMP`
+      .catch((err) => console.error('[idempotency] cleanup failed:', err));
+  }, 10 * 60_000).unref();
+}
+
+// Same key with a different request is a client bug, not a retry. Multipart bodies are not
+// parsed yet at this point (the check runs before multer), so their length stands in.
+function fingerprint(req: AuthedRequest): string {
+  const body =
+    req.body && typeof req.body === 'object' && Object.keys(req.body).length
+      ? JSON.stringify(req.body)
+      : `len:${req.headers['content-length'] || 0}`;
+  return createHash('sha256').update(`${req.method} ${req.originalUrl}\n${body}`).digest('hex');
+}
+
+async function claim(userId: string, key: string, fp: string): Promise<boolean> {
+  // Inserts the key, or takes over an expired one (or one whose request never answered);
+  // no row back means a live entry exists.
+  const rows = await getPrisma().$queryRaw<{ key: string }[]>`
+    INSERT INTO "IdempotencyKey" ("userId", "key", "fingerprint", "expiresAt")
+    VALUES (${userId}, ${key}, ${fp}, LOCALTIMESTAMP + ${TTL_SECONDS} * INTERVAL '1 second')
+    ON CONFLICT ("userId", "key") DO UPDATE SET
+      "fingerprint" = EXCLUDED."fingerprint", "status" = NULL, "contentType" = '', "body" = '',
+      "createdAt" = LOCALTIMESTAMP, "expiresAt" = EXCLUDED."expiresAt"
+    WHERE "IdempotencyKey"."expiresAt" < LOCALTIMESTAMP
+       OR ("IdempotencyKey"."status" IS NULL AND "IdempotencyKey"."createdAt" < LOCALTIMESTAMP - ${STALE_SECONDS} * INTERVAL '1 second')
+    RETURNING "key"
+  `;
+  return rows.length > 0;
+}
+
+function load(userId: string, key: string): Promise<StoredResponse | null> {
+  return getPrisma().idempotencyKey.findUnique({
+    where: { userId_key: { userId, key } },
+    select: { fingerprint: true, status: true, contentType: true, body: true }
+  });
+}
+
+async function waitForResult(userId: string, key: string): Promise<StoredResponse | null> {
+  const deadline = Date.now() + WAIT_MS;
+  const local = inflight.get(`${userId}:${key}`);
+  if (local) await Promise.race([local, new Promise((r) => setTimeout(r, WAIT_MS))]);
+  for (;;) {
+    const stored = await load(userId, key);
+    if (!stored || stored.status !== null || Date.now() >= deadline) return stored;
+    await new Promise((r) => setTimeout(r, POLL_MS));
+  }
+}
+
+function replay(res: Response, stored: StoredResponse) {
+  res.setHeader('Idempotent-Replayed', 'true');
+  if (stored.contentType) res.setHeader('Content-Type', stored.contentType);
+  res.status(stored.status!).send(stored.body);
+}
+
+// Honors an `Idempotency-Key` header on a mutating route (mount after requireAuth, before any
+// body-consuming middleware such as multer). The first request runs the handler and its
+// response (status < 500) is stored for IDEMPOTENCY_TTL_HOURS; retries with the same key get
+// the stored response without running the handler, and duplicates sent while the first is
+// still running wait for its result. Server errors release the key so a retry runs again.
+export function idempotent(req: AuthedRequest, res: Response, next: NextFunction) {
+  const raw = req.headers['idempotency-key'];
+  if (raw === undefined) return next();
+  const key = String(raw).trim();
+  if (!key || key.length > MAX_KEY_LENGTH || !/^[\x21-\x7e]+$/.test(key)) {
+    return res.status(400).json({ error: 'invalid_idempotency_key' });
+  }
+  startCleanup();
+
+  const userId = req.auth!.userId;
+  const fp = fingerprint(req);
+
+  void (async () => {
+    if (!(await claim(userId, key, fp))) {
+      const stored = await waitForResult(userId, key);
+      if (!stored) return res.status(409).json({ error: 'idempotency_key_in_progress' });
+      if (stored.fingerprint !== fp) return res.status(422).json({ error: 'idempotency_key_reused' });
+      if (stored.status === null) {
+        res.setHeader('Retry-After', '1');
+        return res.status(409).json({ error: 'idempotency_key_in_progress' });
+      }
+      return replay(res, stored);
+    }
+
+    const localKey = `${userId}:${key}`;
+    let done!: () => void;
+    inflight.set(localKey, new Promise<void>((resolve) => (done = resolve)));
+
+    // Stored as soon as the handler sends, even if the client has already gone away: that
+    // client's retry is exactly what should get the replay.
+    let settled = false;
+    const settle = async (status: number, contentType: string, body: string) => {
+      settled = true;
+      const prisma = getPrisma();
+      try {
+        if (status < 500) {
+          await prisma.idempotencyKey.update({
+            where: { userId_key: { userId, key } },
+            data: { status, contentType, body }
+          });
+        } else {
+          await prisma.idempotencyKey.deleteMany({ where: { userId, key } });
+        }
+      } catch (err) {
+        console.error('[idempotency] failed to store response:', err);
+      } finally {
+        inflight.delete(localKey);
+        done();
+      }
+    };
+
+    const send = res.send.bind(res);
+    res.send = (body?: any) => {
+      if (!settled && (typeof body === 'string' || Buffer.isBuffer(body))) {
+        const text = typeof body === 'string' ? body : body.toString('utf8');
+        void settle(res.statusCode, String(res.getHeader('Content-Type') || ''), text);
+      }
+      return send(body);
+    };
+    // Never answered through res.send: local waiters fall back to polling; the row is taken
+    // over once stale (see claim).
+    res.on('close', () => {
+      if (settled) return;
+      inflight.delete(localKey);
+      done();
+    });
+    next();
+  })().catch((err) => {
+    console.error('[idempotency] lookup failed:', err);
+    if (!res.headersSent) res.status(500).json({ error: 'internal_server_error' });
+  });
+}
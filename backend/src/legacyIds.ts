@@ -0,0 +1,42 @@
+import { type Db } from './db';
+import { randomBytes } from 'crypto';
+
+// Rows created through the API get `legacyId = id` at insert time, so the
+// localStorage migration can match them without backfilling whole tables.
+export function newRowId(): string {
+  return `c${Date.now().toString(36)}${randomBytes(10).toString('hex')}`;
+}
+
+export function withLegacyId<T extends { legacyId?: string | null }>(data: T): T & { id: string; legacyId: string } {
+  const id = newRowId();
+  return { ...data, id, legacyId: data.legacyId || id };
+}
+
+// Safety net for rows inserted outside the API routes (old deploys, manual SQL).
+// Scoped to one organization and backed by the partial `legacyId IS NULL` indexes,
+// so when nothing is left to fix each statement is an empty index probe.
+export async function backfillLegacyIds(prisma: Db, organizationId: string) {
+  await prisma.$executeRaw`UPDATE "Hotel" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
+  await prisma.$executeRaw`
+    UPDATE "Building" b SET "legacyId"=b."id"
+    FROM "Hotel" h
+    WHERE b."legacyId" IS NULL AND h."id"=b."hotelId" AND h."organizationId"=${organizationId};`;
+  await prisma.$executeRaw`
+    UPDATE "Floor" f SET "legacyId"=f."id"
+    FROM "Building" b JOIN "Hotel" h ON h."id"=b."hotelId"
+    WHERE f."legacyId" IS NULL AND b."id"=f."buildingId" AND h."organizationId"=${organizationId};`;
+  await prisma.$executeRaw`
+    UPDATE "Room" r SET "legacyId"=r."id"
+    FROM "Floor" f JOIN "Building" b ON b."id"=f."buildingId" JOIN "Hotel" h ON h."id"=b."hotelId"
+    WHERE r."legacyId" IS NULL AND f."id"=r."floorId" AND h."organizationId"=${organizationId};`;
+  await prisma.$executeRaw`
+    UPDATE "Space" s SET "legacyId"=s."id"
+    FROM "Floor" f JOIN "Building" b ON b."id"=f."buildingId" JOIN "Hotel" h ON h."id"=b."hotelId"
+    WHERE s."legacyId" IS NULL AND f."id"=s."floorId" AND h."organizationId"=${organizationId};`;
+  await prisma.$executeRaw`UPDATE "StaffMember" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
+  await prisma.$executeRaw`UPDATE "Task" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
+  await prisma.$executeRaw`UPDATE "Technician" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
+  await prisma.$executeRaw`UPDATE "Session" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
+  await prisma.$executeRaw`UPDATE "BlockedSlot" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
+  await prisma.$executeRaw`UPDATE "Contract" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
+}
@@ -1,23 +1,10 @@
-import { type PrismaClient } from '@prisma/client';
+import { type Db } from '../db';
 import { randomBytes } from 'crypto';
+import { backfillLegacyIds } from '../legacyIds';
+import { invalidatePricingDefaults } from '../pricingDefaults';
 
 export type LocalStorageExport = any;
 
-export async function backfillLegacyIds(prisma: PrismaClient, organizationId: string) {
-  // For safe idempotent import/export we ensure legacyId is set for rows created via API.
-  await prisma.$executeRaw`UPDATE "Hotel" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Building" SET "legacyId"="id" WHERE "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Floor" SET "legacyId"="id" WHERE "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Room" SET "legacyId"="id" WHERE "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Space" SET "legacyId"="id" WHERE "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "StaffMember" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Task" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Technician" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Session" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "BlockedSlot" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
-  await prisma.$executeRaw`UPDATE "Contract" SET "legacyId"="id" WHERE "organizationId"=${organizationId} AND "legacyId" IS NULL;`;
-}
-
 function asStringId(v: any): string {
   return String(v || '').trim();
 }
@@ -75,112 +62,288 @@ function normalizeReservationStatus(status: any): 'PROPOSED' | 'PENDING' | 'APPR
   return 'PENDING';
 }
 
-export async function exportLocalStorage(prisma: PrismaClient, organizationId: string, userId: string): Promise<LocalStorageExport> {
-  await backfillLegacyIds(prisma, organizationId);
+// ===== EXPORT =====
+
+// One record per entity, emitted in dependency order (parents before children,
+// staff/technicians before the tasks/sessions that reference them) so an importer
+// can consume the stream front to back.
+export type ExportRecordType =
+  | 'meta'
+  | 'hotel'
+  | 'building'
+  | 'floor'
+  | 'room'
+  | 'space'
+  | 'staff'
+  | 'technician'
+  | 'blocked_slot'
+  | 'session'
+  | 'task'
+  | 'reservation'
+  | 'contract'
+  | 'pricing_defaults';
+
+export type ExportRecord = { type: ExportRecordType; data: any };
+
+const EXPORT_BATCH_SIZE = 500;
+// Tasks carry their events/attachments (legacy attachments may embed base64 dataUrls).
+const TASK_EXPORT_BATCH_SIZE = 100;
+
+type PageArgs = { take: number; skip?: number; cursor?: { id: string } };
+
+async function* paginate<T extends { id: string }>(
+  fetchPage: (page: PageArgs) => Promise<T[]>,
+  batchSize = EXPORT_BATCH_SIZE
+): AsyncGenerator<T> {
+  let cursor: string | null = null;
+  for (;;) {
+    const page = await fetchPage({ take: batchSize, ...(cursor ? { skip: 1, cursor: { id: cursor } } : {}) });
+    for (const row of page) yield row;
+    if (page.length < batchSize) return;
+    cursor = page[page.length - 1].id;
+  }
+}
 
+function exportSettings() {
+  return {
+    timezone: 'America/New_York',
+    workHours: { start: '08:00', end: '17:00' }
+  };
+}
+
+export async function* exportRecords(prisma: Db, organizationId: string, userId: string): AsyncGenerator<ExportRecord> {
   const user = await prisma.user.findFirst({
     where: { id: userId, organizationId },
     select: { id: true, activeHotelId: true, hotelScopeId: true, role: true }
   });
   const hotelScopeId = user?.role === 'SUPER_ADMIN' ? null : (user?.hotelScopeId || null);
+  const hotelFilter = hotelScopeId ? { hotelId: hotelScopeId } : {};
+
+  const hotelSelect = { id: true, legacyId: true } as const;
+  const activeHotel = hotelScopeId
+    ? await prisma.hotel.findFirst({ where: { id: hotelScopeId, organizationId }, select: hotelSelect })
+    : (user?.activeHotelId
+        ? await prisma.hotel.findFirst({ where: { id: user.activeHotelId, organizationId }, select: hotelSelect })
+        : null) ||
+      (await prisma.hotel.findFirst({ where: { organizationId }, orderBy: { createdAt: 'asc' }, select: hotelSelect }));
+
+  yield {
+    type: 'meta',
+    data: {
+      version: 1,
+      activeHotelId: activeHotel ? activeHotel.legacyId || activeHotel.id : null,
+      settings: exportSettings(),
+      updatedAt: new Date().toISOString()
+    }
+  };
 
-  const hotels = await prisma.hotel.findMany({
-    where: { organizationId, ...(hotelScopeId ? { id: hotelScopeId } : {}) },
-    include: {
-      buildings: {
-        include: {
-          floors: {
-            include: {
-              rooms: true,
-              spaces: true
-            }
-          }
-        }
-      }
-    },
-    orderBy: { createdAt: 'asc' }
-  });
-
+  // Only ids are retained across sections (db id -> exported id) to remap references.
   const hotelIdMap = new Map<string, string>();
   const roomIdMap = new Map<string, string>();
   const spaceIdMap = new Map<string, string>();
+  const staffIdMap = new Map<string, string>();
 
-  const hotelsObj: any = {};
-  for (const h of hotels) {
+  // Hotels + structure
+  const hotels = paginate((page) =>
+    prisma.hotel.findMany({
+      where: { organizationId, ...(hotelScopeId ? { id: hotelScopeId } : {}) },
+      orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+      select: { id: true, legacyId: true, name: true },
+      ...page
+    })
+  );
+  for await (const h of hotels) {
     const hid = h.legacyId || h.id;
     hotelIdMap.set(h.id, hid);
-    const buildings = (h.buildings || []).map((b) => {
-      const bid = (b as any).legacyId || b.id;
-      const floors = (b.floors || []).map((f) => {
-        const fid = (f as any).legacyId || f.id;
-        const rooms = (f.rooms || []).map((r) => {
-          const rid = (r as any).legacyId || r.id;
-          roomIdMap.set(r.id, rid);
-          return {
-            id: rid,
-            roomNumber: r.roomNumber,
-            active: r.active,
-            surface: r.surface,
-            sqft: r.sqft,
-            lastCleaned: (r as any).lastCleanedAt ? new Date((r as any).lastCleanedAt).getTime() : null,
-            cleaningFrequency: (r as any).cleaningFrequencyDays ?? null,
-            notes: (r as any).notes || ''
-          };
-        });
-        const spaces = (f.spaces || []).map((s) => {
-          const sid = (s as any).legacyId || s.id;
-          spaceIdMap.set(s.id, sid);
-          return {
-            id: sid,
-            name: s.name,
-            type: (s as any).type || 'CORRIDOR',
-            active: s.active,
-            sqft: s.sqft,
-            cleaningFrequency: (s as any).cleaningFrequencyDays ?? null
-          };
-        });
-        return { id: fid, nameOrNumber: f.nameOrNumber, sortOrder: (f as any).sortOrder ?? null, notes: (f as any).notes || '', rooms, spaces };
-      });
-      return { id: bid, name: b.name, notes: (b as any).notes || '', floors };
-    });
+    yield { type: 'hotel', data: { id: hid, name: h.name } };
+
+    const buildings = paginate((page) =>
+      prisma.building.findMany({
+        where: { hotelId: h.id },
+        orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+        ...page
+      })
+    );
+    for await (const b of buildings) {
+      yield { type: 'building', data: { id: b.legacyId || b.id, hotelId: hid, name: b.name, notes: b.notes || '' } };
+    }
+
+    const floors = paginate((page) =>
+      prisma.floor.findMany({
+        where: { building: { hotelId: h.id } },
+        orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+        include: { building: { select: { id: true, legacyId: true } } },
+        ...page
+      })
+    );
+    for await (const f of floors) {
+      yield {
+        type: 'floor',
+        data: {
+          id: f.legacyId || f.id,
+          buildingId: f.building.legacyId || f.building.id,
+          nameOrNumber: f.nameOrNumber,
+          sortOrder: f.sortOrder ?? null,
+          notes: f.notes || ''
+        }
+      };
+    }
 
-    hotelsObj[hid] = { id: hid, name: h.name, buildings };
+    const rooms = paginate((page) =>
+      prisma.room.findMany({
+        where: { floor: { building: { hotelId: h.id } } },
+        orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+        include: { floor: { select: { id: true, legacyId: true } } },
+        ...page
+      })
+    );
+    for await (const r of rooms) {
+      const rid = r.legacyId || r.id;
+      roomIdMap.set(r.id, rid);
+      yield {
+        type: 'room',
+        data: {
+          id: rid,
+          floorId: r.floor.legacyId || r.floor.id,
+          roomNumber: r.roomNumber,
+          active: r.active,
+          surface: r.surface,
+          sqft: r.sqft,
+          lastCleaned: r.lastCleanedAt ? r.lastCleanedAt.getTime() : null,
+          cleaningFrequency: r.cleaningFrequencyDays ?? null,
+          notes: r.notes || ''
+        }
+      };
+    }
+
+    const spaces = paginate((page) =>
+      prisma.space.findMany({
+        where: { floor: { building: { hotelId: h.id } } },
+        orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+        include: { floor: { select: { id: true, legacyId: true } } },
+        ...page
+      })
+    );
+    for await (const s of spaces) {
+      const sid = s.legacyId || s.id;
+      spaceIdMap.set(s.id, sid);
+      yield {
+        type: 'space',
+        data: {
+          id: sid,
+          floorId: s.floor.legacyId || s.floor.id,
+          name: s.name,
+          type: s.type || 'CORRIDOR',
+          active: s.active,
+          sqft: s.sqft,
+          cleaningFrequency: s.cleaningFrequencyDays ?? null
+        }
+      };
+    }
   }
 
-  const staff = await prisma.staffMember.findMany({
-    where: { organizationId, ...(hotelScopeId ? { hotelId: hotelScopeId } : {}) },
-    orderBy: [{ lastName: 'asc' }, { firstName: 'asc' }]
-  });
-  const staffIdMap = new Map<string, string>();
-  const staffObj: any = {};
-  for (const m of staff) {
-    const sid = (m as any).legacyId || m.id;
+  const staff = paginate((page) =>
+    prisma.staffMember.findMany({
+      where: { organizationId, ...hotelFilter },
+      orderBy: [{ lastName: 'asc' }, { firstName: 'asc' }, { id: 'asc' }],
+      ...page
+    })
+  );
+  for await (const m of staff) {
+    const sid = m.legacyId || m.id;
     staffIdMap.set(m.id, sid);
-    staffObj[sid] = {
-      id: sid,
-      token: m.token,
-      hotelId: hotelIdMap.get(m.hotelId) || m.hotelId,
-      firstName: m.firstName,
-      lastName: m.lastName,
-      phone: m.phone,
-      notes: m.notes,
-      active: m.active,
-      createdAt: m.createdAt.toISOString()
+    yield {
+      type: 'staff',
+      data: {
+        id: sid,
+        token: m.token,
+        hotelId: hotelIdMap.get(m.hotelId) || m.hotelId,
+        firstName: m.firstName,
+        lastName: m.lastName,
+        phone: m.phone,
+        notes: m.notes,
+        active: m.active,
+        createdAt: m.createdAt.toISOString()
+      }
     };
   }
 
-  const tasks = await prisma.task.findMany({
-    where: { organizationId, ...(hotelScopeId ? { hotelId: hotelScopeId } : {}) },
-    orderBy: { createdAt: 'asc' },
-    include: {
-      locations: true,
-      events: { orderBy: { at: 'asc' } },
-      attachments: { orderBy: { at: 'asc' } }
+  if (!hotelScopeId) {
+    const technicians = paginate((page) =>
+      prisma.technician.findMany({ where: { organizationId }, orderBy: [{ createdAt: 'asc' }, { id: 'asc' }], ...page })
+    );
+    for await (const t of technicians) {
+      yield {
+        type: 'technician',
+        data: {
+          id: t.legacyId || t.id,
+          name: t.name,
+          phone: t.phone,
+          notes: t.notes,
+          active: t.active,
+          createdAt: t.createdAt.toISOString()
+        }
+      };
     }
-  });
-  const tasksObj: any = {};
-  for (const t of tasks) {
-    const tid = (t as any).legacyId || t.id;
+
+    const blockedSlots = paginate((page) =>
+      prisma.blockedSlot.findMany({ where: { organizationId }, orderBy: [{ createdAt: 'asc' }, { id: 'asc' }], ...page })
+    );
+    for await (const b of blockedSlots) {
+      yield {
+        type: 'blocked_slot',
+        data: {
+          id: b.legacyId || b.id,
+          date: b.date,
+          start: b.start,
+          end: b.end,
+          note: b.note,
+          createdAt: b.createdAt.toISOString()
+        }
+      };
+    }
+  }
+
+  const sessions = paginate((page) =>
+    prisma.session.findMany({
+      where: { organizationId, ...hotelFilter },
+      orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+      ...page
+    })
+  );
+  for await (const s of sessions) {
+    yield {
+      type: 'session',
+      data: {
+        id: s.legacyId || s.id,
+        status: s.status,
+        createdAt: s.createdAt.toISOString(),
+        hotelId: hotelIdMap.get(s.hotelId) || s.hotelId,
+        roomIds: (Array.isArray(s.roomIds) ? s.roomIds : []).map((id: any) => roomIdMap.get(String(id)) || String(id)),
+        date: s.date,
+        start: s.start,
+        end: s.end,
+        technicianId: s.technicianId || ''
+      }
+    };
+  }
+
+  const tasks = paginate(
+    (page) =>
+      prisma.task.findMany({
+        where: { organizationId, ...hotelFilter },
+        orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+        include: {
+          locations: true,
+          events: { orderBy: { at: 'asc' } },
+          attachments: { orderBy: { at: 'asc' } }
+        },
+        ...page
+      }),
+    TASK_EXPORT_BATCH_SIZE
+  );
+  for await (const t of tasks) {
+    const tid = t.legacyId || t.id;
     const locations = (t.locations || []).map((l: any) => ({
       label: String(l.label || '').trim(),
       roomId: mapId(l.roomId, roomIdMap),
@@ -200,186 +363,246 @@ export async function exportLocalStorage(prisma: PrismaClient, organizationId: s
       actorStaffId: a.actorStaffId ? staffIdMap.get(a.actorStaffId) || a.actorStaffId : null
     }));
 
-    tasksObj[tid] = {
-      id: tid,
-      hotelId: hotelIdMap.get(t.hotelId) || t.hotelId,
-      category: t.category,
-      status: t.status,
-      type: t.type,
-      priority: t.priority,
-      locations,
-      location,
-      room: location.label,
-      description: t.description,
-      assignedStaffId: t.assignedStaffId ? staffIdMap.get(t.assignedStaffId) || t.assignedStaffId : null,
-      schedule: t.schedule || null,
-      createdAt: t.createdAt.toISOString(),
-      updatedAt: t.updatedAt.toISOString(),
-      events: (t.events || []).map((e: any) => ({
-        id: e.id,
-        at: e.at.toISOString(),
-        action: e.action,
-        actorRole: e.actorRole,
-        actorStaffId: e.actorStaffId ? staffIdMap.get(e.actorStaffId) || e.actorStaffId : null,
-        note: e.note,
-        patch: e.patch || null
-      })),
-      attachments
+    yield {
+      type: 'task',
+      data: {
+        id: tid,
+        hotelId: hotelIdMap.get(t.hotelId) || t.hotelId,
+        category: t.category,
+        status: t.status,
+        type: t.type,
+        priority: t.priority,
+        locations,
+        location,
+        room: location.label,
+        description: t.description,
+        assignedStaffId: t.assignedStaffId ? staffIdMap.get(t.assignedStaffId) || t.assignedStaffId : null,
+        schedule: t.schedule || null,
+        createdAt: t.createdAt.toISOString(),
+        updatedAt: t.updatedAt.toISOString(),
+        events: (t.events || []).map((e: any) => ({
+          id: e.id,
+          at: e.at.toISOString(),
+          action: e.action,
+          actorRole: e.actorRole,
+          actorStaffId: e.actorStaffId ? staffIdMap.get(e.actorStaffId) || e.actorStaffId : null,
+          note: e.note,
+          patch: e.patch || null
+        })),
+        attachments
+      }
     };
   }
 
-  const reservations = await prisma.reservation.findMany({
-    where: { organizationId, ...(hotelScopeId ? { hotelId: hotelScopeId } : {}) },
-    orderBy: { createdAt: 'asc' }
-  });
-  const reservationsObj: any = {};
-  for (const r of reservations) {
-    reservationsObj[r.id] = {
-      id: r.id,
-      token: r.token,
-      statusAdmin: r.statusAdmin,
-      statusHotel: r.statusHotel,
-      createdAt: r.createdAt.toISOString(),
-      confirmedAt: r.confirmedAt?.toISOString() || null,
-      cancelledAt: r.cancelledAt?.toISOString() || null,
-      cancelledBy: r.cancelledBy || '',
-      cancelReason: r.cancelReason || '',
-      requiresAdminApproval: r.requiresAdminApproval,
-      hotelId: hotelIdMap.get(r.hotelId) || r.hotelId,
-      roomIds: (Array.isArray(r.roomIds) ? r.roomIds : []).map((id: any) => roomIdMap.get(String(id)) || String(id)),
-      spaceIds: (Array.isArray(r.spaceIds) ? r.spaceIds : []).map((id: any) => spaceIdMap.get(String(id)) || String(id)),
-      roomNotes: remapObjectKeys(r.roomNotes, roomIdMap),
-      spaceNotes: remapObjectKeys(r.spaceNotes, spaceIdMap),
-      surfaceDefault: r.surfaceDefault,
-      roomSurfaceOverrides: remapObjectKeys(r.roomSurfaceOverrides, roomIdMap),
-      notesGlobal: r.notesGlobal,
-      notesOrg: r.notesOrg,
-      durationMinutes: r.durationMinutes,
-      proposedDate: r.proposedDate,
-      proposedStart: r.proposedStart
+  const reservations = paginate((page) =>
+    prisma.reservation.findMany({
+      where: { organizationId, ...hotelFilter },
+      orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+      ...page
+    })
+  );
+  for await (const r of reservations) {
+    yield {
+      type: 'reservation',
+      data: {
+        id: r.id,
+        token: r.token,
+        statusAdmin: r.statusAdmin,
+        statusHotel: r.statusHotel,
+        createdAt: r.createdAt.toISOString(),
+        confirmedAt: r.confirmedAt?.toISOString() || null,
+        cancelledAt: r.cancelledAt?.toISOString() || null,
+        cancelledBy: r.cancelledBy || '',
+        cancelReason: r.cancelReason || '',
+        requiresAdminApproval: r.requiresAdminApproval,
+        hotelId: hotelIdMap.get(r.hotelId) || r.hotelId,
+        roomIds: (Array.isArray(r.roomIds) ? r.roomIds : []).map((id: any) => roomIdMap.get(String(id)) || String(id)),
+        spaceIds: (Array.isArray(r.spaceIds) ? r.spaceIds : []).map((id: any) => spaceIdMap.get(String(id)) || String(id)),
+        roomNotes: remapObjectKeys(r.roomNotes, roomIdMap),
+        spaceNotes: remapObjectKeys(r.spaceNotes, spaceIdMap),
+        surfaceDefault: r.surfaceDefault,
+        roomSurfaceOverrides: remapObjectKeys(r.roomSurfaceOverrides, roomIdMap),
+        notesGlobal: r.notesGlobal,
+        notesOrg: r.notesOrg,
+        durationMinutes: r.durationMinutes,
+        proposedDate: r.proposedDate,
+        proposedStart: r.proposedStart
+      }
     };
   }
 
-  const sessions = await prisma.session.findMany({
-    where: { organizationId, ...(hotelScopeId ? { hotelId: hotelScopeId } : {}) },
-    orderBy: { createdAt: 'asc' }
-  });
-  const sessionsObj: any = {};
-  for (const s of sessions) {
-    const sid = (s as any).legacyId || s.id;
-    sessionsObj[sid] = {
-      id: sid,
-      status: s.status,
-      createdAt: s.createdAt.toISOString(),
-      hotelId: hotelIdMap.get(s.hotelId) || s.hotelId,
-      roomIds: (Array.isArray(s.roomIds) ? s.roomIds : []).map((id: any) => roomIdMap.get(String(id)) || String(id)),
-      date: s.date,
-      start: s.start,
-      end: s.end,
-      technicianId: s.technicianId || ''
+  const contracts = paginate((page) =>
+    prisma.contract.findMany({
+      where: { organizationId, ...hotelFilter },
+      orderBy: [{ sentAt: 'asc' }, { id: 'asc' }],
+      ...page
+    })
+  );
+  for await (const c of contracts) {
+    yield {
+      type: 'contract',
+      data: {
+        id: c.legacyId || c.id,
+        token: c.token,
+        status: c.status,
+        createdAt: c.createdAt.toISOString(),
+        hotelId: hotelIdMap.get(c.hotelId) || c.hotelId,
+        hotelName: c.hotelName,
+        contact: c.contact,
+        pricing: c.pricing,
+        roomsMinPerSession: c.roomsMinPerSession,
+        roomsMaxPerSession: c.roomsMaxPerSession,
+        roomsPerSession: c.roomsPerSession,
+        frequency: c.frequency,
+        surfaceType: c.surfaceType,
+        appliedTier: c.appliedTier,
+        appliedPricePerRoom: c.appliedPricePerRoom,
+        otherSurfaces: c.otherSurfaces,
+        totalPerSession: c.totalPerSession,
+        notes: c.notes,
+        sentAt: c.sentAt.toISOString(),
+        signedBy: c.signedBy,
+        acceptedAt: c.acceptedAt?.toISOString() || null
+      }
     };
   }
 
-  const technicians = await prisma.technician.findMany({ where: { organizationId }, orderBy: { createdAt: 'asc' } });
-  const techniciansObj: any = {};
-  if (!hotelScopeId) {
-    for (const t of technicians) {
-      const tid = (t as any).legacyId || t.id;
-      techniciansObj[tid] = {
-        id: tid,
-        name: t.name,
-        phone: t.phone,
-        notes: t.notes,
-        active: t.active,
-        createdAt: t.createdAt.toISOString()
-      };
-    }
-  }
-
-  const blockedSlots = await prisma.blockedSlot.findMany({ where: { organizationId }, orderBy: { createdAt: 'asc' } });
-  const blockedArr = hotelScopeId
-    ? []
-    : blockedSlots.map((b: any) => ({
-        id: b.legacyId || b.id,
-        date: b.date,
-        start: b.start,
-        end: b.end,
-        note: b.note,
-        createdAt: b.createdAt.toISOString()
-      }));
-
-  const contracts = await prisma.contract.findMany({
-    where: { organizationId, ...(hotelScopeId ? { hotelId: hotelScopeId } : {}) },
-    orderBy: { sentAt: 'asc' }
-  });
-  const contractsObj: any = {};
-  for (const c of contracts) {
-    const cid = (c as any).legacyId || c.id;
-    contractsObj[cid] = {
-      id: cid,
-      token: c.token,
-      status: c.status,
-      createdAt: c.createdAt.toISOString(),
-      hotelId: hotelIdMap.get(c.hotelId) || c.hotelId,
-      hotelName: c.hotelName,
-      contact: c.contact,
-      pricing: c.pricing,
-      roomsMinPerSession: c.roomsMinPerSession,
-      roomsMaxPerSession: c.roomsMaxPerSession,
-      roomsPerSession: c.roomsPerSession,
-      frequency: c.frequency,
-      surfaceType: c.surfaceType,
-      appliedTier: c.appliedTier,
-      appliedPricePerRoom: c.appliedPricePerRoom,
-      otherSurfaces: c.otherSurfaces,
-      totalPerSession: c.totalPerSession,
-      notes: c.notes,
-      sentAt: c.sentAt.toISOString(),
-      signedBy: c.signedBy,
-      acceptedAt: c.acceptedAt?.toISOString() || null
+  const pricingDefaults = await prisma.pricingDefaults.findUnique({ where: { organizationId } });
+  if (pricingDefaults) {
+    yield {
+      type: 'pricing_defaults',
+      data: {
+        roomsMinPerSession: pricingDefaults.roomsMinPerSession,
+        roomsMaxPerSession: pricingDefaults.roomsMaxPerSession,
+        basePrices: pricingDefaults.basePrices,
+        penaltyPrices: pricingDefaults.penaltyPrices,
+        contractPrices: pricingDefaults.contractPrices,
+        advantagePrices: pricingDefaults.advantagePrices,
+        sqftPrices: pricingDefaults.sqftPrices
+      }
     };
   }
+}
 
-  const pricingDefaults = await prisma.pricingDefaults.findUnique({ where: { organizationId } });
-
-  const activeHotelId =
-    hotelScopeId
-      ? (hotels.length ? (hotels[0].legacyId || hotels[0].id) : null)
-      : (user?.activeHotelId ? hotelIdMap.get(user.activeHotelId) : null) ||
-        (hotels.length ? (hotels[0].legacyId || hotels[0].id) : null);
-
-  return {
+// Assembles the legacy `hmp.v1` document from the record stream.
+export async function exportLocalStorage(prisma: Db, organizationId: string, userId: string): Promise<LocalStorageExport> {
+  const out: any = {
     version: 1,
-    activeHotelId,
-    hotels: hotelsObj,
-    contracts: contractsObj,
-    sessions: sessionsObj,
-    reservations: reservationsObj,
+    activeHotelId: null,
+    hotels: {},
+    contracts: {},
+    sessions: {},
+    reservations: {},
     incidents: {},
-    tasks: tasksObj,
-    staff: staffObj,
-    technicians: techniciansObj,
-    availability: { blocked: blockedArr },
-    settings: {
-      timezone: 'America/New_York',
-      workHours: { start: '08:00', end: '17:00' }
-    },
-    pricing: { defaults: pricingDefaults ? {
-      roomsMinPerSession: pricingDefaults.roomsMinPerSession,
-      roomsMaxPerSession: pricingDefaults.roomsMaxPerSession,
-      basePrices: pricingDefaults.basePrices,
-      penaltyPrices: pricingDefaults.penaltyPrices,
-      contractPrices: pricingDefaults.contractPrices,
-      advantagePrices: pricingDefaults.advantagePrices,
-      sqftPrices: pricingDefaults.sqftPrices
-    } : undefined },
+    tasks: {},
+    staff: {},
+    technicians: {},
+    availability: { blocked: [] as any[] },
+    settings: exportSettings(),
+    pricing: { defaults: undefined as any },
     updatedAt: new Date().toISOString()
   };
+
+  // Structure ids are only unique per hotel, so nesting lookups reset per hotel.
+  let buildingsById = new Map<string, any>();
+  let floorsById = new Map<string, any>();
+
+  for await (const { type, data } of exportRecords(prisma, organizationId, userId)) {
+    switch (type) {
+      case 'meta':
+        out.version = data.version;
+        out.activeHotelId = data.activeHotelId;
+        out.settings = data.settings;
+        out.updatedAt = data.updatedAt;
+        break;
+      case 'hotel':
+        out.hotels[data.id] = { id: data.id, name: data.name, buildings: [] };
+        buildingsById = new Map();
+        floorsById = new Map();
+        break;
+      case 'building': {
+        const { hotelId, ...building } = data;
+        const entry = { ...building, floors: [] };
+        out.hotels[hotelId]?.buildings.push(entry);
+        buildingsById.set(building.id, entry);
+        break;
+      }
+      case 'floor': {
+        const { buildingId, ...floor } = data;
+        const entry = { ...floor, rooms: [], spaces: [] };
+        buildingsById.get(buildingId)?.floors.push(entry);
+        floorsById.set(floor.id, entry);
+        break;
+      }
+      case 'room': {
+        const { floorId, ...room } = data;
+        floorsById.get(floorId)?.rooms.push(room);
+        break;
+      }
+      case 'space': {
+        const { floorId, ...space } = data;
+        floorsById.get(floorId)?.spaces.push(space);
+        break;
+      }
+      case 'staff':
+        out.staff[data.id] = data;
+        break;
+      case 'technician':
+        out.technicians[data.id] = data;
+        break;
+      case 'blocked_slot':
+        out.availability.blocked.push(data);
+        break;
+      case 'session':
+        out.sessions[data.id] = data;
+        break;
+      case 'task':
+        out.tasks[data.id] = data;
+        break;
+      case 'reservation':
+        out.reservations[data.id] = data;
+        break;
+      case 'contract':
+        out.contracts[data.id] = data;
+        break;
+      case 'pricing_defaults':
+        out.pricing.defaults = data;
+        break;
+    }
+  }
+
+  return out;
 }
 
+// ===== IMPORT =====
+
 export type ImportSummary = { created: Record<string, number>; skipped: Record<string, number> };
 
-export async function importLocalStorage(prisma: PrismaClient, organizationId: string, userId: string, payload: any): Promise<ImportSummary> {
+export type ImportSession = {
+  prisma: Db;
+  organizationId: string;
+  userId: string;
+  hotelScopeId: string | null;
+  scopedHotel: { id: string; legacyId: string | null } | null;
+  allowedHotelLegacyIds: Set<string> | null;
+  activeHotelLegacyId: string;
+  created: Record<string, number>;
+  skipped: Record<string, number>;
+  // legacy id -> db id
+  hotelIdMap: Map<string, string>;
+  buildingIdMap: Map<string, string>;
+  floorIdMap: Map<string, string>;
+  roomIdMap: Map<string, string>;
+  spaceIdMap: Map<string, string>;
+  staffIdMap: Map<string, string>;
+  technicianIdMap: Map<string, string>;
+};
+
+function bump(bucket: Record<string, number>, key: string, n = 1) {
+  bucket[key] = (bucket[key] || 0) + n;
+}
+
+export async function beginImport(prisma: Db, organizationId: string, userId: string): Promise<ImportSession> {
   await backfillLegacyIds(prisma, organizationId);
 
   const user = await prisma.user.findFirst({
@@ -390,551 +613,651 @@ export async function importLocalStorage(prisma: PrismaClient, organizationId: s
   const scopedHotel = hotelScopeId
     ? await prisma.hotel.findFirst({ where: { id: hotelScopeId, organizationId }, select: { id: true, legacyId: true } })
     : null;
-  const allowedHotelLegacyIds = scopedHotel ? new Set([scopedHotel.id, scopedHotel.legacyId].filter(Boolean)) : null;
+  const allowedHotelLegacyIds = scopedHotel
+    ? new Set([scopedHotel.id, scopedHotel.legacyId].filter((v): v is string => Boolean(v)))
+    : null;
 
-  const hotels = payload?.hotels && typeof payload.hotels === 'object' ? payload.hotels : {};
-  const staffMap = payload?.staff && typeof payload.staff === 'object' ? payload.staff : {};
-  const tasksMap = payload?.tasks && typeof payload.tasks === 'object' ? payload.tasks : {};
-  const reservationsMap = payload?.reservations && typeof payload.reservations === 'object' ? payload.reservations : {};
-  const sessionsMap = payload?.sessions && typeof payload.sessions === 'object' ? payload.sessions : {};
-  const techniciansMap = payload?.technicians && typeof payload.technicians === 'object' ? payload.technicians : {};
-  const blocked = Array.isArray(payload?.availability?.blocked) ? payload.availability.blocked : [];
-  const contractsMap = payload?.contracts && typeof payload.contracts === 'object' ? payload.contracts : {};
-  const pricingDefaults = payload?.pricing?.defaults ?? null;
+  return {
+    prisma,
+    organizationId,
+    userId,
+    hotelScopeId,
+    scopedHotel,
+    allowedHotelLegacyIds,
+    activeHotelLegacyId: '',
+    created: {},
+    skipped: {},
+    hotelIdMap: new Map(),
+    buildingIdMap: new Map(),
+    floorIdMap: new Map(),
+    roomIdMap: new Map(),
+    spaceIdMap: new Map(),
+    staffIdMap: new Map(),
+    technicianIdMap: new Map()
+  };
+}
+
+async function importHotel(s: ImportSession, legacyHotelId: string, hotel: any): Promise<string | null> {
+  const { prisma, organizationId } = s;
+  if (s.allowedHotelLegacyIds && !s.allowedHotelLegacyIds.has(legacyHotelId)) {
+    bump(s.skipped, 'hotels_out_of_scope');
+    return null;
+  }
+  const name = asStringId(hotel?.name);
+  if (!name) return null;
+
+  const dbHotel = s.scopedHotel
+    ? await prisma.hotel.update({ where: { id: s.scopedHotel.id }, data: { name } })
+    : await prisma.hotel.upsert({
+        where: { organizationId_legacyId: { organizationId, legacyId: legacyHotelId } },
+        create: { organizationId, legacyId: legacyHotelId, name },
+        update: { name }
+      });
+  s.hotelIdMap.set(legacyHotelId, dbHotel.id);
+  bump(s.created, 'hotels');
+  return dbHotel.id;
+}
 
-  const created: Record<string, number> = {};
-  const skipped: Record<string, number> = {};
-  const bump = (bucket: Record<string, number>, key: string, n = 1) => (bucket[key] = (bucket[key] || 0) + n);
+async function importBuilding(s: ImportSession, hotelId: string, b: any): Promise<string | null> {
+  const legacyBuildingId = asStringId(b?.id);
+  const bName = asStringId(b?.name);
+  if (!legacyBuildingId || !bName) return null;
 
-  const hotelIdMap = new Map<string, string>(); // legacy -> db id
-  const buildingIdMap = new Map<string, string>();
-  const floorIdMap = new Map<string, string>();
-  const roomIdMap = new Map<string, string>();
-  const spaceIdMap = new Map<string, string>();
-  const staffIdMap = new Map<string, string>();
-  const technicianIdMap = new Map<string, string>();
+  const dbBuilding = await s.prisma.building.upsert({
+    where: { hotelId_legacyId: { hotelId, legacyId: legacyBuildingId } },
+    create: { hotelId, legacyId: legacyBuildingId, name: bName, notes: asStringId(b?.notes) },
+    update: { name: bName, notes: asStringId(b?.notes) }
+  });
+  s.buildingIdMap.set(legacyBuildingId, dbBuilding.id);
+  bump(s.created, 'buildings');
+  return dbBuilding.id;
+}
 
-  // Hotels + structure
-  for (const [legacyHotelId, hotel] of Object.entries(hotels)) {
-    if (allowedHotelLegacyIds && !allowedHotelLegacyIds.has(legacyHotelId)) {
-      bump(skipped, 'hotels_out_of_scope');
-      continue;
+async function importFloor(s: ImportSession, buildingId: string, f: any): Promise<string | null> {
+  const legacyFloorId = asStringId(f?.id);
+  const nameOrNumber = asStringId(f?.nameOrNumber);
+  if (!legacyFloorId || !nameOrNumber) return null;
+
+  const sortOrder = f?.sortOrder == null ? undefined : Number(f.sortOrder);
+  const notes = asStringId(f?.notes);
+
+  const dbFloor = await s.prisma.floor.upsert({
+    where: { buildingId_legacyId: { buildingId, legacyId: legacyFloorId } },
+    create: {
+      buildingId,
+      legacyId: legacyFloorId,
+      nameOrNumber,
+      ...(sortOrder !== undefined && Number.isFinite(sortOrder) ? { sortOrder: Math.floor(sortOrder) } : {}),
+      ...(notes ? { notes } : {})
+    },
+    update: {
+      nameOrNumber,
+      ...(sortOrder !== undefined && Number.isFinite(sortOrder) ? { sortOrder: Math.floor(sortOrder) } : {}),
+      ...(notes ? { notes } : {})
     }
-    const name = asStringId((hotel as any)?.name);
-    if (!name) continue;
-
-    const dbHotel = scopedHotel
-      ? await prisma.hotel.update({ where: { id: scopedHotel.id }, data: { name } })
-      : await prisma.hotel.upsert({
-          where: { organizationId_legacyId: { organizationId, legacyId: legacyHotelId } },
-          create: { organizationId, legacyId: legacyHotelId, name },
-          update: { name }
-        });
-    hotelIdMap.set(legacyHotelId, dbHotel.id);
-    bump(created, 'hotels');
+  });
+  s.floorIdMap.set(legacyFloorId, dbFloor.id);
+  bump(s.created, 'floors');
+  return dbFloor.id;
+}
 
-    const buildings = Array.isArray((hotel as any)?.buildings) ? (hotel as any).buildings : [];
-    for (const b of buildings) {
-      const legacyBuildingId = asStringId(b?.id);
-      const bName = asStringId(b?.name);
-      if (!legacyBuildingId || !bName) continue;
-
-      const dbBuilding = await prisma.building.upsert({
-        where: { hotelId_legacyId: { hotelId: dbHotel.id, legacyId: legacyBuildingId } },
-        create: { hotelId: dbHotel.id, legacyId: legacyBuildingId, name: bName, notes: asStringId(b?.notes) },
-        update: { name: bName, notes: asStringId(b?.notes) }
-      });
-      buildingIdMap.set(legacyBuildingId, dbBuilding.id);
-      bump(created, 'buildings');
+async function importRoom(s: ImportSession, floorId: string, r: any) {
+  const legacyRoomId = asStringId(r?.id);
+  const roomNumber = asStringId(r?.roomNumber);
+  if (!legacyRoomId || !roomNumber) return;
+
+  const cleaningFrequencyDays = r?.cleaningFrequency == null ? undefined : Number(r.cleaningFrequency);
+  const lastCleanedAt = toDateFromEpochOrIso(r?.lastCleaned) || undefined;
+  const notes = asStringId(r?.notes);
+
+  const dbRoom = await s.prisma.room.upsert({
+    where: { floorId_legacyId: { floorId, legacyId: legacyRoomId } },
+    create: {
+      floorId,
+      legacyId: legacyRoomId,
+      roomNumber,
+      active: r?.active !== false,
+      surface: String(r?.surface || 'BOTH').toUpperCase() as any,
+      sqft: r?.sqft != null ? Number(r.sqft) : undefined,
+      ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
+        ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
+        : {}),
+      ...(lastCleanedAt ? { lastCleanedAt } : {}),
+      ...(notes ? { notes } : {})
+    },
+    update: {
+      roomNumber,
+      active: r?.active !== false,
+      surface: String(r?.surface || 'BOTH').toUpperCase() as any,
+      sqft: r?.sqft != null ? Number(r.sqft) : undefined,
+      ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
+        ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
+        : {}),
+      ...(lastCleanedAt ? { lastCleanedAt } : {}),
+      ...(notes ? { notes } : {})
+    }
+  });
+  s.roomIdMap.set(legacyRoomId, dbRoom.id);
+  bump(s.created, 'rooms');
+}
 
-      const floors = Array.isArray(b?.floors) ? b.floors : [];
-      for (const f of floors) {
-        const legacyFloorId = asStringId(f?.id);
-        const nameOrNumber = asStringId(f?.nameOrNumber);
-        if (!legacyFloorId || !nameOrNumber) continue;
-
-        const sortOrder = f?.sortOrder == null ? undefined : Number(f.sortOrder);
-        const notes = asStringId(f?.notes);
-
-        const dbFloor = await prisma.floor.upsert({
-          where: { buildingId_legacyId: { buildingId: dbBuilding.id, legacyId: legacyFloorId } },
-          create: {
-            buildingId: dbBuilding.id,
-            legacyId: legacyFloorId,
-            nameOrNumber,
-            ...(sortOrder !== undefined && Number.isFinite(sortOrder) ? { sortOrder: Math.floor(sortOrder) } : {}),
-            ...(notes ? { notes } : {})
-          },
-          update: {
-            nameOrNumber,
-            ...(sortOrder !== undefined && Number.isFinite(sortOrder) ? { sortOrder: Math.floor(sortOrder) } : {}),
-            ...(notes ? { notes } : {})
-          }
-        });
-        floorIdMap.set(legacyFloorId, dbFloor.id);
-        bump(created, 'floors');
+async function importSpace(s: ImportSession, floorId: string, sp: any) {
+  const legacySpaceId = asStringId(sp?.id);
+  const sName = asStringId(sp?.name);
+  if (!legacySpaceId || !sName) return;
+
+  const type = asStringId(sp?.type) || 'CORRIDOR';
+  const cleaningFrequencyDays = sp?.cleaningFrequency == null ? undefined : Number(sp.cleaningFrequency);
+
+  const dbSpace = await s.prisma.space.upsert({
+    where: { floorId_legacyId: { floorId, legacyId: legacySpaceId } },
+    create: {
+      floorId,
+      legacyId: legacySpaceId,
+      name: sName,
+      type,
+      active: sp?.active !== false,
+      sqft: sp?.sqft != null ? Number(sp.sqft) : undefined,
+      ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
+        ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
+        : {})
+    },
+    update: {
+      name: sName,
+      type,
+      active: sp?.active !== false,
+      sqft: sp?.sqft != null ? Number(sp.sqft) : undefined,
+      ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
+        ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
+        : {})
+    }
+  });
+  s.spaceIdMap.set(legacySpaceId, dbSpace.id);
+  bump(s.created, 'spaces');
+}
 
-        const rooms = Array.isArray(f?.rooms) ? f.rooms : [];
-        for (const r of rooms) {
-          const legacyRoomId = asStringId(r?.id);
-          const roomNumber = asStringId(r?.roomNumber);
-          if (!legacyRoomId || !roomNumber) continue;
-
-          const cleaningFrequencyDays = r?.cleaningFrequency == null ? undefined : Number(r.cleaningFrequency);
-          const lastCleanedAt = toDateFromEpochOrIso(r?.lastCleaned) || undefined;
-          const notes = asStringId(r?.notes);
-
-          const dbRoom = await prisma.room.upsert({
-            where: { floorId_legacyId: { floorId: dbFloor.id, legacyId: legacyRoomId } },
-            create: {
-              floorId: dbFloor.id,
-              legacyId: legacyRoomId,
-              roomNumber,
-              active: r?.active !== false,
-              surface: String(r?.surface || 'BOTH').toUpperCase() as any,
-              sqft: r?.sqft != null ? Number(r.sqft) : undefined,
-              ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
-                ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
-                : {}),
-              ...(lastCleanedAt ? { lastCleanedAt } : {}),
-              ...(notes ? { notes } : {})
-            },
-            update: {
-              roomNumber,
-              active: r?.active !== false,
-              surface: String(r?.surface || 'BOTH').toUpperCase() as any,
-              sqft: r?.sqft != null ? Number(r.sqft) : undefined,
-              ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
-                ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
-                : {}),
-              ...(lastCleanedAt ? { lastCleanedAt } : {}),
-              ...(notes ? { notes } : {})
-            }
-          });
-          roomIdMap.set(legacyRoomId, dbRoom.id);
-          bump(created, 'rooms');
-        }
+async function importStaff(s: ImportSession, legacyStaffId: string, member: any) {
+  const { prisma, organizationId } = s;
+  const legacyHotelId = asStringId(member?.hotelId);
+  const hotelId = s.hotelIdMap.get(legacyHotelId);
+  if (!hotelId) {
+    bump(s.skipped, 'staff_missing_hotel');
+    return;
+  }
 
-        const spaces = Array.isArray(f?.spaces) ? f.spaces : [];
-        for (const s of spaces) {
-          const legacySpaceId = asStringId(s?.id);
-          const sName = asStringId(s?.name);
-          if (!legacySpaceId || !sName) continue;
-
-          const type = asStringId(s?.type) || 'CORRIDOR';
-          const cleaningFrequencyDays = s?.cleaningFrequency == null ? undefined : Number(s.cleaningFrequency);
-
-          const dbSpace = await prisma.space.upsert({
-            where: { floorId_legacyId: { floorId: dbFloor.id, legacyId: legacySpaceId } },
-            create: {
-              floorId: dbFloor.id,
-              legacyId: legacySpaceId,
-              name: sName,
-              type,
-              active: s?.active !== false,
-              sqft: s?.sqft != null ? Number(s.sqft) : undefined,
-              ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
-                ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
-                : {})
-            },
-            update: {
-              name: sName,
-              type,
-              active: s?.active !== false,
-              sqft: s?.sqft != null ? Number(s.sqft) : undefined,
-              ...(cleaningFrequencyDays !== undefined && Number.isFinite(cleaningFrequencyDays)
-                ? { cleaningFrequencyDays: Math.floor(cleaningFrequencyDays) }
-                : {})
-            }
-          });
-          spaceIdMap.set(legacySpaceId, dbSpace.id);
-          bump(created, 'spaces');
-        }
-      }
-    }
+  const existing = await prisma.staffMember.findUnique({
+    where: { organizationId_legacyId: { organizationId, legacyId: legacyStaffId } },
+    select: { id: true }
+  });
+  if (existing) {
+    s.staffIdMap.set(legacyStaffId, existing.id);
+    bump(s.skipped, 'staff');
+    return;
   }
 
-  // Persist user's active hotel selection (legacy id → db id)
-  if (scopedHotel) {
-    await prisma.user.updateMany({
-      where: { id: userId, organizationId },
-      data: { activeHotelId: scopedHotel.id }
-    });
-  } else {
-    const desiredActiveLegacy = asStringId(payload?.activeHotelId);
-    const desiredActiveDbId = desiredActiveLegacy ? hotelIdMap.get(desiredActiveLegacy) || null : null;
-    if (desiredActiveDbId) {
-      await prisma.user.updateMany({
-        where: { id: userId, organizationId },
-        data: { activeHotelId: desiredActiveDbId }
-      });
-    }
+  const token = asStringId(member?.token) || `stafftok_${randomBytes(12).toString('hex')}`;
+  const safeToken = (await prisma.staffMember.findUnique({ where: { token }, select: { id: true } })) ? `stafftok_${randomBytes(12).toString('hex')}` : token;
+
+  const createdMember = await prisma.staffMember.create({
+    data: {
+      organizationId,
+      hotelId,
+      legacyId: legacyStaffId,
+      token: safeToken,
+      firstName: asStringId(member?.firstName),
+      lastName: asStringId(member?.lastName),
+      phone: asStringId(member?.phone),
+      notes: asStringId(member?.notes),
+      active: member?.active !== false
+    },
+    select: { id: true }
+  });
+  s.staffIdMap.set(legacyStaffId, createdMember.id);
+  bump(s.created, 'staff');
+}
+
+async function importTechnician(s: ImportSession, legacyTechId: string, tech: any) {
+  if (s.hotelScopeId) return;
+  const { prisma, organizationId } = s;
+  const existing = await prisma.technician.findUnique({
+    where: { organizationId_legacyId: { organizationId, legacyId: legacyTechId } },
+    select: { id: true }
+  });
+  if (existing) {
+    s.technicianIdMap.set(legacyTechId, existing.id);
+    bump(s.skipped, 'technicians');
+    return;
   }
+  const createdTech = await prisma.technician.create({
+    data: {
+      organizationId,
+      legacyId: legacyTechId,
+      name: asStringId(tech?.name) || 'Technician',
+      phone: asStringId(tech?.phone),
+      notes: asStringId(tech?.notes),
+      active: tech?.active !== false
+    },
+    select: { id: true }
+  });
+  s.technicianIdMap.set(legacyTechId, createdTech.id);
+  bump(s.created, 'technicians');
+}
 
-  // Staff
-  for (const [legacyStaffId, member] of Object.entries(staffMap)) {
-    const legacyHotelId = asStringId((member as any)?.hotelId);
-    const hotelId = hotelIdMap.get(legacyHotelId);
-    if (!hotelId) {
-      bump(skipped, 'staff_missing_hotel');
-      continue;
-    }
+async function importBlockedSlot(s: ImportSession, slot: any) {
+  if (s.hotelScopeId) return;
+  const { prisma, organizationId } = s;
+  const legacyId = asStringId(slot?.id);
+  if (!legacyId) return;
 
-    const existing = await prisma.staffMember.findUnique({
-      where: { organizationId_legacyId: { organizationId, legacyId: legacyStaffId } },
-      select: { id: true }
-    });
-    if (existing) {
-      staffIdMap.set(legacyStaffId, existing.id);
-      bump(skipped, 'staff');
-      continue;
+  const existing = await prisma.blockedSlot.findUnique({
+    where: { organizationId_legacyId: { organizationId, legacyId } },
+    select: { id: true }
+  });
+  if (existing) {
+    bump(s.skipped, 'blocked_slots');
+    return;
+  }
+  await prisma.blockedSlot.create({
+    data: {
+      organizationId,
+      legacyId,
+      date: asStringId(slot?.date),
+      start: asStringId(slot?.start),
+      end: asStringId(slot?.end),
+      note: asStringId(slot?.note)
     }
+  });
+  bump(s.created, 'blocked_slots');
+}
 
-    const token = asStringId((member as any)?.token) || `stafftok_${randomBytes(12).toString('hex')}`;
-    const safeToken = (await prisma.staffMember.findUnique({ where: { token }, select: { id: true } })) ? `stafftok_${randomBytes(12).toString('hex')}` : token;
-
-    const createdMember = await prisma.staffMember.create({
-      data: {
-        organizationId,
-        hotelId,
-        legacyId: legacyStaffId,
-        token: safeToken,
-        firstName: asStringId((member as any)?.firstName),
-        lastName: asStringId((member as any)?.lastName),
-        phone: asStringId((member as any)?.phone),
-        notes: asStringId((member as any)?.notes),
-        active: (member as any)?.active !== false
-      },
-      select: { id: true }
-    });
-    staffIdMap.set(legacyStaffId, createdMember.id);
-    bump(created, 'staff');
+async function importSession(s: ImportSession, legacySessionId: string, sess: any) {
+  const { prisma, organizationId } = s;
+  const legacyHotelId = asStringId(sess?.hotelId);
+  const hotelId = s.hotelIdMap.get(legacyHotelId);
+  if (!hotelId) {
+    bump(s.skipped, 'sessions_missing_hotel');
+    return;
   }
 
-  // Technicians
-  if (!hotelScopeId)
-  for (const [legacyTechId, tech] of Object.entries(techniciansMap)) {
-    const existing = await prisma.technician.findUnique({
-      where: { organizationId_legacyId: { organizationId, legacyId: legacyTechId } },
-      select: { id: true }
-    });
-    if (existing) {
-      technicianIdMap.set(legacyTechId, existing.id);
-      bump(skipped, 'technicians');
-      continue;
-    }
-    const createdTech = await prisma.technician.create({
-      data: {
-        organizationId,
-        legacyId: legacyTechId,
-        name: asStringId((tech as any)?.name) || 'Technician',
-        phone: asStringId((tech as any)?.phone),
-        notes: asStringId((tech as any)?.notes),
-        active: (tech as any)?.active !== false
-      },
-      select: { id: true }
-    });
-    technicianIdMap.set(legacyTechId, createdTech.id);
-    bump(created, 'technicians');
+  const existing = await prisma.session.findUnique({
+    where: { organizationId_legacyId: { organizationId, legacyId: legacySessionId } },
+    select: { id: true }
+  });
+  if (existing) {
+    bump(s.skipped, 'sessions');
+    return;
   }
 
-  // Blocked slots
-  if (!hotelScopeId)
-  for (const slot of blocked) {
-    const legacyId = asStringId(slot?.id);
-    if (!legacyId) continue;
+  const legacyRoomIds = Array.isArray(sess?.roomIds) ? sess.roomIds : [];
+  const roomIds = legacyRoomIds
+    .map((rid: any): string | undefined => s.roomIdMap.get(asStringId(rid)))
+    .filter((value: string | undefined): value is string => Boolean(value));
 
-    const existing = await prisma.blockedSlot.findUnique({
-      where: { organizationId_legacyId: { organizationId, legacyId } },
-      select: { id: true }
-    });
-    if (existing) {
-      bump(skipped, 'blocked_slots');
-      continue;
-    }
-    await prisma.blockedSlot.create({
-      data: {
-        organizationId,
-        legacyId,
-        date: asStringId(slot?.date),
-        start: asStringId(slot?.start),
-        end: asStringId(slot?.end),
-        note: asStringId(slot?.note)
-      }
-    });
-    bump(created, 'blocked_slots');
-  }
+  const legacyTechId = asStringId(sess?.technicianId);
+  const technicianId = legacyTechId ? s.technicianIdMap.get(legacyTechId) : undefined;
 
-  // Sessions
-  for (const [legacySessionId, s] of Object.entries(sessionsMap)) {
-    const legacyHotelId = asStringId((s as any)?.hotelId);
-    const hotelId = hotelIdMap.get(legacyHotelId);
-    if (!hotelId) {
-      bump(skipped, 'sessions_missing_hotel');
-      continue;
+  await prisma.session.create({
+    data: {
+      organizationId,
+      hotelId,
+      legacyId: legacySessionId,
+      roomIds,
+      date: asStringId(sess?.date),
+      start: asStringId(sess?.start),
+      end: asStringId(sess?.end),
+      technicianId
     }
+  });
+  bump(s.created, 'sessions');
+}
 
-    const existing = await prisma.session.findUnique({
-      where: { organizationId_legacyId: { organizationId, legacyId: legacySessionId } },
-      select: { id: true }
-    });
-    if (existing) {
-      bump(skipped, 'sessions');
-      continue;
-    }
+async function importTask(s: ImportSession, legacyTaskId: string, t: any) {
+  const { prisma, organizationId, roomIdMap, spaceIdMap, staffIdMap } = s;
+  const legacyHotelId = asStringId(t?.hotelId);
+  const hotelId = s.hotelIdMap.get(legacyHotelId);
+  if (!hotelId) {
+    bump(s.skipped, 'tasks_missing_hotel');
+    return;
+  }
 
-    const legacyRoomIds = Array.isArray((s as any)?.roomIds) ? (s as any).roomIds : [];
-    const roomIds = legacyRoomIds
-      .map((rid: any): string | undefined => roomIdMap.get(asStringId(rid)))
-      .filter((value: string | undefined): value is string => Boolean(value));
+  const exists = await prisma.task.findUnique({
+    where: { organizationId_legacyId: { organizationId, legacyId: legacyTaskId } },
+    select: { id: true }
+  });
+  if (exists) {
+    bump(s.skipped, 'tasks');
+    return;
+  }
 
-    const legacyTechId = asStringId((s as any)?.technicianId);
-    const technicianId = legacyTechId ? technicianIdMap.get(legacyTechId) : undefined;
+  const assignedLegacy = asStringId(t?.assignedStaffId);
+  const assignedStaffId = assignedLegacy ? staffIdMap.get(assignedLegacy) : undefined;
 
-    await prisma.session.create({
-      data: {
-        organizationId,
-        hotelId,
-        legacyId: legacySessionId,
-        roomIds,
-        date: asStringId((s as any)?.date),
-        start: asStringId((s as any)?.start),
-        end: asStringId((s as any)?.end),
-        technicianId
-      }
-    });
-    bump(created, 'sessions');
-  }
+  const createdAt = toIsoDate(t?.createdAt) || new Date();
+  const updatedAt = toIsoDate(t?.updatedAt) || createdAt;
 
-  // Tasks (includes incidents)
-  for (const [legacyTaskId, t] of Object.entries(tasksMap)) {
-    const legacyHotelId = asStringId((t as any)?.hotelId);
-    const hotelId = hotelIdMap.get(legacyHotelId);
-    if (!hotelId) {
-      bump(skipped, 'tasks_missing_hotel');
-      continue;
-    }
+  const category = String(t?.category || 'TASK').trim().toUpperCase() === 'INCIDENT' ? 'INCIDENT' : 'TASK';
+  const status = normalizeTaskStatus(t?.status);
+  const priority = normalizeTaskPriority(t?.priority);
+  const type = asStringId(t?.type) || 'OTHER';
+  const description = asStringId(t?.description);
 
-    const exists = await prisma.task.findUnique({
-      where: { organizationId_legacyId: { organizationId, legacyId: legacyTaskId } },
-      select: { id: true }
-    });
-    if (exists) {
-      bump(skipped, 'tasks');
-      continue;
-    }
+  const locations = Array.isArray(t?.locations) ? t.locations : t?.location ? [t.location] : [];
+  const events = Array.isArray(t?.events) ? t.events : [];
+  const attachments = Array.isArray(t?.attachments) ? t.attachments : [];
 
-    const assignedLegacy = asStringId((t as any)?.assignedStaffId);
-    const assignedStaffId = assignedLegacy ? staffIdMap.get(assignedLegacy) : undefined;
+  await prisma.task.create({
+    data: {
+      organizationId,
+      hotelId,
+      legacyId: legacyTaskId,
+      category: category as any,
+      status: status as any,
+      priority: priority as any,
+      type,
+      description,
+      assignedStaffId,
+      schedule: t?.schedule ?? undefined,
+      createdAt,
+      updatedAt,
+      locations: {
+        create: locations.map((l: any) => ({
+          label: asStringId(l?.label),
+          roomId: l?.roomId ? roomIdMap.get(asStringId(l.roomId)) : undefined,
+          spaceId: l?.spaceId ? spaceIdMap.get(asStringId(l.spaceId)) : undefined
+        }))
+      },
+      events: {
+        create: events.map((e: any) => ({
+          at: toIsoDate(e?.at) || new Date(),
+          action: asStringId(e?.action) || 'NOTE',
+          actorRole: asStringId(e?.actorRole) || 'hotel_manager',
+          actorStaffId: e?.actorStaffId ? staffIdMap.get(asStringId(e.actorStaffId)) : undefined,
+          note: asStringId(e?.note),
+          patch: e?.patch ?? undefined
+        }))
+      },
+      attachments: {
+        create: attachments
+          .filter((a: any) => !!a?.dataUrl)
+          .map((a: any) => ({
+            at: toIsoDate(a?.at) || new Date(),
+            name: asStringId(a?.name) || 'photo',
+            mime: asStringId(a?.mime) || 'image/*',
+            dataUrl: String(a.dataUrl),
+            actorRole: asStringId(a?.actorRole) || 'hotel_staff',
+            actorStaffId: a?.actorStaffId ? staffIdMap.get(asStringId(a.actorStaffId)) : undefined
+          }))
+      }
+    }
+  });
+  bump(s.created, 'tasks');
+}
 
-    const createdAt = toIsoDate((t as any)?.createdAt) || new Date();
-    const updatedAt = toIsoDate((t as any)?.updatedAt) || createdAt;
+async function importReservation(s: ImportSession, r: any) {
+  const { prisma, organizationId } = s;
+  const token = asStringId(r?.token);
+  if (!token) return;
 
-    const category = String((t as any)?.category || 'TASK').trim().toUpperCase() === 'INCIDENT' ? 'INCIDENT' : 'TASK';
-    const status = normalizeTaskStatus((t as any)?.status);
-    const priority = normalizeTaskPriority((t as any)?.priority);
-    const type = asStringId((t as any)?.type) || 'OTHER';
-    const description = asStringId((t as any)?.description);
+  const legacyHotelId = asStringId(r?.hotelId);
+  const hotelId = s.hotelIdMap.get(legacyHotelId);
+  if (!hotelId) {
+    bump(s.skipped, 'reservations_missing_hotel');
+    return;
+  }
 
-    const locations = Array.isArray((t as any)?.locations)
-      ? (t as any).locations
-      : (t as any)?.location
-        ? [(t as any).location]
-        : [];
+  const mapIds = (ids: any[], map: Map<string, string>): string[] =>
+    (Array.isArray(ids) ? ids : [])
+      .map((id): string | undefined => map.get(asStringId(id)))
+      .filter((value: string | undefined): value is string => Boolean(value));
 
-    const events = Array.isArray((t as any)?.events) ? (t as any).events : [];
-    const attachments = Array.isArray((t as any)?.attachments) ? (t as any).attachments : [];
+  const roomIds = mapIds(r?.roomIds, s.roomIdMap);
+  const spaceIds = mapIds(r?.spaceIds, s.spaceIdMap);
+
+  const data = {
+    organizationId,
+    hotelId,
+    token,
+    statusAdmin: normalizeReservationStatus(r?.statusAdmin || 'PROPOSED') as any,
+    statusHotel: normalizeReservationStatus(r?.statusHotel || 'PENDING') as any,
+    roomIds,
+    spaceIds,
+    roomNotes: remapObjectKeys(r?.roomNotes, s.roomIdMap),
+    spaceNotes: remapObjectKeys(r?.spaceNotes, s.spaceIdMap),
+    surfaceDefault: String(r?.surfaceDefault || 'BOTH').toUpperCase() as any,
+    roomSurfaceOverrides: remapObjectKeys(r?.roomSurfaceOverrides, s.roomIdMap),
+    notesGlobal: asStringId(r?.notesGlobal),
+    notesOrg: asStringId(r?.notesOrg),
+    durationMinutes: Number(r?.durationMinutes) || 0,
+    proposedDate: asStringId(r?.proposedDate),
+    proposedStart: asStringId(r?.proposedStart),
+    confirmedAt: toIsoDate(r?.confirmedAt) || undefined,
+    requiresAdminApproval: Boolean(r?.requiresAdminApproval),
+    cancelledAt: toIsoDate(r?.cancelledAt) || undefined,
+    cancelledBy: asStringId(r?.cancelledBy),
+    cancelReason: asStringId(r?.cancelReason)
+  };
 
-    await prisma.task.create({
+  const exists = await prisma.reservation.findFirst({ where: { token }, select: { id: true } });
+  if (exists) {
+    await prisma.reservation.update({
+      where: { id: exists.id },
+      data
+    });
+    bump(s.created, 'reservations_updated');
+  } else {
+    await prisma.reservation.create({
       data: {
-        organizationId,
-        hotelId,
-        legacyId: legacyTaskId,
-        category: category as any,
-        status: status as any,
-        priority: priority as any,
-        type,
-        description,
-        assignedStaffId,
-        schedule: (t as any)?.schedule ?? undefined,
-        createdAt,
-        updatedAt,
-        locations: {
-          create: locations.map((l: any) => ({
-            label: asStringId(l?.label),
-            roomId: l?.roomId ? roomIdMap.get(asStringId(l.roomId)) : undefined,
-            spaceId: l?.spaceId ? spaceIdMap.get(asStringId(l.spaceId)) : undefined
-          }))
-        },
-        events: {
-          create: events.map((e: any) => ({
-            at: toIsoDate(e?.at) || new Date(),
-            action: asStringId(e?.action) || 'NOTE',
-            actorRole: asStringId(e?.actorRole) || 'hotel_manager',
-            actorStaffId: e?.actorStaffId ? staffIdMap.get(asStringId(e.actorStaffId)) : undefined,
-            note: asStringId(e?.note),
-            patch: e?.patch ?? undefined
-          }))
-        },
-        attachments: {
-          create: attachments
-            .filter((a: any) => !!a?.dataUrl)
-            .map((a: any) => ({
-              at: toIsoDate(a?.at) || new Date(),
-              name: asStringId(a?.name) || 'photo',
-              mime: asStringId(a?.mime) || 'image/*',
-              dataUrl: String(a.dataUrl),
-              actorRole: asStringId(a?.actorRole) || 'hotel_staff',
-              actorStaffId: a?.actorStaffId ? staffIdMap.get(asStringId(a.actorStaffId)) : undefined
-            }))
-        }
+        ...data,
+        createdAt: toIsoDate(r?.createdAt) || new Date()
       }
     });
-    bump(created, 'tasks');
+    bump(s.created, 'reservations');
   }
+}
 
-  // Reservations (token unique)
-  for (const r of Object.values(reservationsMap)) {
-    const token = asStringId((r as any)?.token);
-    if (!token) continue;
-
-    const legacyHotelId = asStringId((r as any)?.hotelId);
-    const hotelId = hotelIdMap.get(legacyHotelId);
-    if (!hotelId) {
-      bump(skipped, 'reservations_missing_hotel');
-      continue;
-    }
-
-    const mapIds = (ids: any[], map: Map<string, string>): string[] =>
-      (Array.isArray(ids) ? ids : [])
-        .map((id): string | undefined => map.get(asStringId(id)))
-        .filter((value: string | undefined): value is string => Boolean(value));
+async function importContract(s: ImportSession, legacyContractId: string, c: any) {
+  const { prisma, organizationId } = s;
+  const token = asStringId(c?.token);
+  if (!token) return;
 
-    const roomIds = mapIds((r as any)?.roomIds, roomIdMap);
-    const spaceIds = mapIds((r as any)?.spaceIds, spaceIdMap);
+  const exists = await prisma.contract.findFirst({ where: { token }, select: { id: true } });
+  if (exists) {
+    bump(s.skipped, 'contracts');
+    return;
+  }
 
-    const remapNotes = (obj: any, map: Map<string, string>) => {
-      const out: any = {};
-      for (const [k, v] of Object.entries(obj && typeof obj === 'object' ? obj : {})) {
-        const nk = map.get(String(k));
-        if (nk) out[nk] = v;
-      }
-      return out;
-    };
+  const legacyHotelId = asStringId(c?.hotelId);
+  const hotelId = s.hotelIdMap.get(legacyHotelId);
+  if (!hotelId) {
+    bump(s.skipped, 'contracts_missing_hotel');
+    return;
+  }
 
-    const data = {
+  await prisma.contract.create({
+    data: {
       organizationId,
       hotelId,
       token,
-      statusAdmin: normalizeReservationStatus((r as any)?.statusAdmin || 'PROPOSED') as any,
-      statusHotel: normalizeReservationStatus((r as any)?.statusHotel || 'PENDING') as any,
-      roomIds,
-      spaceIds,
-      roomNotes: remapNotes((r as any)?.roomNotes, roomIdMap),
-      spaceNotes: remapNotes((r as any)?.spaceNotes, spaceIdMap),
-      surfaceDefault: String((r as any)?.surfaceDefault || 'BOTH').toUpperCase() as any,
-      roomSurfaceOverrides: remapNotes((r as any)?.roomSurfaceOverrides, roomIdMap),
-      notesGlobal: asStringId((r as any)?.notesGlobal),
-      notesOrg: asStringId((r as any)?.notesOrg),
-      durationMinutes: Number((r as any)?.durationMinutes) || 0,
-      proposedDate: asStringId((r as any)?.proposedDate),
-      proposedStart: asStringId((r as any)?.proposedStart),
-      confirmedAt: toIsoDate((r as any)?.confirmedAt) || undefined,
-      requiresAdminApproval: Boolean((r as any)?.requiresAdminApproval),
-      cancelledAt: toIsoDate((r as any)?.cancelledAt) || undefined,
-      cancelledBy: asStringId((r as any)?.cancelledBy),
-      cancelReason: asStringId((r as any)?.cancelReason)
-    };
-
-    const exists = await prisma.reservation.findFirst({ where: { token }, select: { id: true } });
-    if (exists) {
-      await prisma.reservation.update({
-        where: { id: exists.id },
-        data
-      });
-      bump(created, 'reservations_updated');
-    } else {
-      await prisma.reservation.create({
-        data: {
-          ...data,
-          createdAt: toIsoDate((r as any)?.createdAt) || new Date()
-        }
-      });
-      bump(created, 'reservations');
+      legacyId: legacyContractId,
+      status: String(c?.status || 'SENT').toUpperCase() as any,
+      hotelName: asStringId(c?.hotelName),
+      contact: c?.contact ?? {},
+      pricing: c?.pricing ?? {},
+      roomsMinPerSession: Number(c?.roomsMinPerSession) || 0,
+      roomsMaxPerSession: Number(c?.roomsMaxPerSession) || 0,
+      roomsPerSession: Number(c?.roomsPerSession) || 0,
+      frequency: String(c?.frequency || 'YEARLY').toUpperCase() as any,
+      surfaceType: String(c?.surfaceType || 'BOTH').toUpperCase() as any,
+      appliedTier: asStringId(c?.appliedTier),
+      appliedPricePerRoom: Number(c?.appliedPricePerRoom) || 0,
+      otherSurfaces: c?.otherSurfaces ?? {},
+      totalPerSession: Number(c?.totalPerSession) || 0,
+      notes: asStringId(c?.notes),
+      sentAt: toIsoDate(c?.sentAt) || new Date(),
+      signedBy: asStringId(c?.signedBy),
+      acceptedAt: toIsoDate(c?.acceptedAt) || undefined
     }
-  }
+  });
+  bump(s.created, 'contracts');
+}
 
-  // Contracts (token unique)
-  for (const [legacyContractId, c] of Object.entries(contractsMap)) {
-    const token = asStringId((c as any)?.token);
-    if (!token) continue;
+async function importPricingDefaults(s: ImportSession, pricingDefaults: any) {
+  if (s.hotelScopeId || !pricingDefaults) return;
+  const { prisma, organizationId } = s;
+  const data = {
+    roomsMinPerSession: Number(pricingDefaults?.roomsMinPerSession) || 10,
+    roomsMaxPerSession: Number(pricingDefaults?.roomsMaxPerSession) || 20,
+    basePrices: pricingDefaults?.basePrices ?? {},
+    penaltyPrices: pricingDefaults?.penaltyPrices ?? {},
+    contractPrices: pricingDefaults?.contractPrices ?? {},
+    advantagePrices: pricingDefaults?.advantagePrices ?? {},
+    sqftPrices: pricingDefaults?.sqftPrices ?? {}
+  };
+  await prisma.pricingDefaults.upsert({
+    where: { organizationId },
+    create: { organizationId, ...data },
+    update: data
+  });
+  invalidatePricingDefaults(organizationId);
+  bump(s.created, 'pricing_defaults');
+}
 
-    const exists = await prisma.contract.findFirst({ where: { token }, select: { id: true } });
-    if (exists) {
-      bump(skipped, 'contracts');
-      continue;
+// Imports one record of the NDJSON stream. Records must arrive in export order:
+// references are resolved against the ids imported earlier in the same session.
+export async function importRecord(s: ImportSession, record: any) {
+  const type = String(record?.type || '');
+  const data = record?.data && typeof record.data === 'object' ? record.data : {};
+
+  switch (type) {
+    case 'meta':
+      s.activeHotelLegacyId = asStringId(data.activeHotelId);
+      return;
+    case 'hotel':
+      await importHotel(s, asStringId(data.id), data);
+      return;
+    case 'building': {
+      const hotelId = s.hotelIdMap.get(asStringId(data.hotelId));
+      if (!hotelId) return void bump(s.skipped, 'buildings_missing_hotel');
+      await importBuilding(s, hotelId, data);
+      return;
     }
-
-    const legacyHotelId = asStringId((c as any)?.hotelId);
-    const hotelId = hotelIdMap.get(legacyHotelId);
-    if (!hotelId) {
-      bump(skipped, 'contracts_missing_hotel');
-      continue;
+    case 'floor': {
+      const buildingId = s.buildingIdMap.get(asStringId(data.buildingId));
+      if (!buildingId) return void bump(s.skipped, 'floors_missing_building');
+      await importFloor(s, buildingId, data);
+      return;
+    }
+    case 'room': {
+      const floorId = s.floorIdMap.get(asStringId(data.floorId));
+      if (!floorId) return void bump(s.skipped, 'rooms_missing_floor');
+      await importRoom(s, floorId, data);
+      return;
     }
+    case 'space': {
+      const floorId = s.floorIdMap.get(asStringId(data.floorId));
+      if (!floorId) return void bump(s.skipped, 'spaces_missing_floor');
+      await importSpace(s, floorId, data);
+      return;
+    }
+    case 'staff':
+      await importStaff(s, asStringId(data.id), data);
+      return;
+    case 'technician':
+      await importTechnician(s, asStringId(data.id), data);
+      return;
+    case 'blocked_slot':
+      await importBlockedSlot(s, data);
+      return;
+    case 'session':
+      await importSession(s, asStringId(data.id), data);
+      return;
+    case 'task':
+      await importTask(s, asStringId(data.id), data);
+      return;
+    case 'reservation':
+      await importReservation(s, data);
+      return;
+    case 'contract':
+      await importContract(s, asStringId(data.id), data);
+      return;
+    case 'pricing_defaults':
+      await importPricingDefaults(s, data);
+      return;
+    default:
+      bump(s.skipped, 'unknown_records');
+  }
+}
 
-    await prisma.contract.create({
-      data: {
-        organizationId,
-        hotelId,
-        token,
-        legacyId: legacyContractId,
-        status: String((c as any)?.status || 'SENT').toUpperCase() as any,
-        hotelName: asStringId((c as any)?.hotelName),
-        contact: (c as any)?.contact ?? {},
-        pricing: (c as any)?.pricing ?? {},
-        roomsMinPerSession: Number((c as any)?.roomsMinPerSession) || 0,
-        roomsMaxPerSession: Number((c as any)?.roomsMaxPerSession) || 0,
-        roomsPerSession: Number((c as any)?.roomsPerSession) || 0,
-        frequency: String((c as any)?.frequency || 'YEARLY').toUpperCase() as any,
-        surfaceType: String((c as any)?.surfaceType || 'BOTH').toUpperCase() as any,
-        appliedTier: asStringId((c as any)?.appliedTier),
-        appliedPricePerRoom: Number((c as any)?.appliedPricePerRoom) || 0,
-        otherSurfaces: (c as any)?.otherSurfaces ?? {},
-        totalPerSession: Number((c as any)?.totalPerSession) || 0,
-        notes: asStringId((c as any)?.notes),
-        sentAt: toIsoDate((c as any)?.sentAt) || new Date(),
-        signedBy: asStringId((c as any)?.signedBy),
-        acceptedAt: toIsoDate((c as any)?.acceptedAt) || undefined
-      }
+export async function finishImport(s: ImportSession): Promise<ImportSummary> {
+  const { prisma, organizationId, userId } = s;
+
+  // Persist user's active hotel selection (legacy id → db id)
+  if (s.scopedHotel) {
+    await prisma.user.updateMany({
+      where: { id: userId, organizationId },
+      data: { activeHotelId: s.scopedHotel.id }
     });
-    bump(created, 'contracts');
+  } else {
+    const desiredActiveDbId = s.activeHotelLegacyId ? s.hotelIdMap.get(s.activeHotelLegacyId) || null : null;
+    if (desiredActiveDbId) {
+      await prisma.user.updateMany({
+        where: { id: userId, organizationId },
+        data: { activeHotelId: desiredActiveDbId }
+      });
+    }
   }
 
-  if (!hotelScopeId && pricingDefaults) {
-    await prisma.pricingDefaults.upsert({
-      where: { organizationId },
-      create: {
-        organizationId,
-        roomsMinPerSession: Number(pricingDefaults?.roomsMinPerSession) || 10,
-        roomsMaxPerSession: Number(pricingDefaults?.roomsMaxPerSession) || 20,
-        basePrices: pricingDefaults?.basePrices ?? {},
-        penaltyPrices: pricingDefaults?.penaltyPrices ?? {},
-        contractPrices: pricingDefaults?.contractPrices ?? {},
-        advantagePrices: pricingDefaults?.advantagePrices ?? {},
-        sqftPrices: pricingDefaults?.sqftPrices ?? {}
-      },
-      update: {
-        roomsMinPerSession: Number(pricingDefaults?.roomsMinPerSession) || 10,
-        roomsMaxPerSession: Number(pricingDefaults?.roomsMaxPerSession) || 20,
-        basePrices: pricingDefaults?.basePrices ?? {},
-        penaltyPrices: pricingDefaults?.penaltyPrices ?? {},
-        contractPrices: pricingDefaults?.contractPrices ?? {},
-        advantagePrices: pricingDefaults?.advantagePrices ?? {},
-        sqftPrices: pricingDefaults?.sqftPrices ?? {}
+  return { created: s.created, skipped: s.skipped };
+}
+
+export async function importLocalStorage(prisma: Db, organizationId: string, userId: string, payload: any): Promise<ImportSummary> {
+  const s = await beginImport(prisma, organizationId, userId);
+  s.activeHotelLegacyId = asStringId(payload?.activeHotelId);
+
+  const hotels = payload?.hotels && typeof payload.hotels === 'object' ? payload.hotels : {};
+  const staffMap = payload?.staff && typeof payload.staff === 'object' ? payload.staff : {};
+  const tasksMap = payload?.tasks && typeof payload.tasks === 'object' ? payload.tasks : {};
+  const reservationsMap = payload?.reservations && typeof payload.reservations === 'object' ? payload.reservations : {};
+  const sessionsMap = payload?.sessions && typeof payload.sessions === 'object' ? payload.sessions : {};
+  const techniciansMap = payload?.technicians && typeof payload.technicians === 'object' ? payload.technicians : {};
+  const blocked = Array.isArray(payload?.availability?.blocked) ? payload.availability.blocked : [];
+  const contractsMap = payload?.contracts && typeof payload.contracts === 'object' ? payload.contracts : {};
+  const pricingDefaults = payload?.pricing?.defaults ?? null;
+
+  // Hotels + structure
+  for (const [legacyHotelId, hotel] of Object.entries(hotels)) {
+    const hotelId = await importHotel(s, legacyHotelId, hotel);
+    if (!hotelId) continue;
+
+    const buildings = Array.isArray((hotel as any)?.buildings) ? (hotel as any).buildings : [];
+    for (const b of buildings) {
+      const buildingId = await importBuilding(s, hotelId, b);
+      if (!buildingId) continue;
+
+      const floors = Array.isArray(b?.floors) ? b.floors : [];
+      for (const f of floors) {
+        const floorId = await importFloor(s, buildingId, f);
+        if (!floorId) continue;
+
+        const rooms = Array.isArray(f?.rooms) ? f.rooms : [];
+        for (const r of rooms) await importRoom(s, floorId, r);
+
+        const spaces = Array.isArray(f?.spaces) ? f.spaces : [];
+        for (const sp of spaces) await importSpace(s, floorId, sp);
       }
-    });
-    bump(created, 'pricing_defaults');
+    }
   }
 
-  return { created, skipped };
+  for (const [legacyStaffId, member] of Object.entries(staffMap)) await importStaff(s, legacyStaffId, member);
+  for (const [legacyTechId, tech] of Object.entries(techniciansMap)) await importTechnician(s, legacyTechId, tech);
+  for (const slot of blocked) await importBlockedSlot(s, slot);
+  for (const [legacySessionId, sess] of Object.entries(sessionsMap)) await importSession(s, legacySessionId, sess);
+  // Tasks (includes incidents)
+  for (const [legacyTaskId, t] of Object.entries(tasksMap)) await importTask(s, legacyTaskId, t);
+  // Reservations / contracts (token unique)
+  for (const r of Object.values(reservationsMap)) await importReservation(s, r);
+  for (const [legacyContractId, c] of Object.entries(contractsMap)) await importContract(s, legacyContractId, c);
+  await importPricingDefaults(s, pricingDefaults);
+
+  return finishImport(s);
 }
@@ -0,0 +1,84 @@
+import { type Request, type Response } from 'express';
+import { type Readable } from 'stream';
+
+export const NDJSON_CONTENT_TYPE = 'application/x-ndjson';
+
+// A single record (e.g. a task with legacy base64 attachments) may be large,
+// but an unterminated line must not grow without bound.
+const MAX_LINE_CHARS = 16 * 1024 * 1024;
+
+export class NdjsonError extends Error {
+  constructor(
+    public code: 'invalid_ndjson' | 'ndjson_line_too_large',
+    public line: number
+  ) {
+    super(code);
+  }
+}
+
+export function wantsNdjson(req: Request): boolean {
+  const format = String(req.query?.format || '').trim().toLowerCase();
+  if (format) return format === 'ndjson';
+  return String(req.headers.accept || '').includes(NDJSON_CONTENT_TYPE);
+}
+
+export function isNdjsonBody(req: Request): boolean {
+  return Boolean(req.is(NDJSON_CONTENT_TYPE));
+}
+
+// Parses one JSON value per line as chunks arrive; only the current line is buffered.
+export async function* readNdjson(input: Readable): AsyncGenerator<any> {
+  input.setEncoding('utf8');
+  let buf = '';
+  let line = 0;
+
+  const parse = (raw: string) => {
+    line += 1;
+    const text = raw.trim();
+    if (!text) return undefined;
+    try {
+      return JSON.parse(text);
+    } catch {
+      throw new NdjsonError('invalid_ndjson', line);
+    }
+  };
+
+  for await (const chunk of input) {
+    buf += chunk;
+    let idx: number;
+    while ((idx = buf.indexOf('\n')) >= 0) {
+      const value = parse(buf.slice(0, idx));
+      buf = buf.slice(idx + 1);
+      if (value !== undefined) yield value;
+    }
+    if (buf.length > MAX_LINE_CHARS) throw new NdjsonError('ndjson_line_too_large', line + 1);
+  }
+
+  const last = parse(buf);
+  if (last !== undefined) yield last;
+}
+
+function waitForDrain(res: Response): Promise<void> {
+  return new Promise((resolve) => {
+    const done = () => {
+      res.off('drain', done);
+      res.off('close', done);
+      resolve();
+    };
+    res.on('drain', done);
+    res.on('close', done);
+  });
+}
+
+// Streams records as NDJSON, pausing the producer while the socket buffer is full.
+export async function writeNdjson(res: Response, records: AsyncIterable<unknown>) {
+  res.status(200);
+  res.setHeader('Content-Type', `${NDJSON_CONTENT_TYPE}; charset=utf-8`);
+  res.setHeader('Cache-Control', 'no-store');
+
+  for await (const record of records) {
+    if (res.destroyed) return;
+    if (!res.write(`${JSON.stringify(record)}\n`)) await waitForDrain(res);
+  }
+  res.end();
+}
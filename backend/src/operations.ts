@@ -0,0 +1,53 @@
+import { type Response } from 'express';
+import { getPrisma, type DbClient } from './db';
+import { withChangeLog, type PendingChange } from './changes';
+import { type AuthedRequest } from './auth/middleware';
+
+// A write handler written once and run either by its own route or inside POST /batch. It runs
+// in a transaction: operations read and write through `db` only and queue change feed entries
+// in `changes`, which are written in the same transaction (see withChangeLog).
+export type OperationContext = {
+  req: AuthedRequest;
+  db: DbClient;
+  changes: PendingChange[];
+  // Per-batch memo for repeated lookups (task by legacy id, staff ids).
+  cache: Map<string, Promise<unknown>>;
+};
+
+export type OperationResult = { status: number; body: any };
+
+export type Operation = (ctx: OperationContext) => Promise<OperationResult>;
+
+export function newOperationContext(
+  req: AuthedRequest,
+  db: DbClient = getPrisma(),
+  changes: PendingChange[] = [],
+  cache: Map<string, Promise<unknown>> = new Map()
+): OperationContext {
+  return { req, db, changes, cache };
+}
+
+export function memo<T>(ctx: OperationContext, key: string, load: () => Promise<T>): Promise<T> {
+  let hit = ctx.cache.get(key) as Promise<T> | undefined;
+  if (!hit) {
+    hit = load();
+    ctx.cache.set(key, hit);
+  }
+  return hit;
+}
+
+export function fail(status: number, error: string): OperationResult {
+  return { status, body: { error } };
+}
+
+// Route adapter: runs one operation in its own transaction and sends its result.
+export async function runOperation(req: AuthedRequest, res: Response, op: Operation) {
+  let result: OperationResult;
+  try {
+    result = await withChangeLog((tx, changes) => op(newOperationContext(req, tx, changes)));
+  } catch (err) {
+    console.error('[api] operation failed:', err);
+    result = { status: 500, body: { error: 'internal_server_error' } };
+  }
+  res.status(result.status).json(result.body);
+}
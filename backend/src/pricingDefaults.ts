@@ -0,0 +1,110 @@
+import { type PricingDefaults } from '@prisma/client';
+import { getPrisma, type DbClient } from './db';
+
+// PRICING_CACHE_TTL_MS: how long an organization's defaults are served from memory (default
+// 60000, 0 disables the cache). PATCH /pricing/defaults invalidates this process only.
+// PRICING_CACHE_POLL_MS: when set, each process checks the cached rows' `updatedAt` at this
+// interval and drops the ones changed elsewhere (other API workers/instances, imports).
+const TTL_MS = Number(process.env.PRICING_CACHE_TTL_MS || 60_000);
+const POLL_MS = Number(process.env.PRICING_CACHE_POLL_MS || 0);
+
+type Entry = { value: Promise<PricingDefaults>; expiresAt: number };
+
+const cache = new Map<string, Entry>();
+
+let pollStarted = false;
+let polling = false;
+
+export function defaultPricing() {
+  return {
+    roomsMinPerSession: 10,
+    roomsMaxPerSession: 20,
+    basePrices: { BOTH: 65, CARPET: 45, TILE: 40 },
+    penaltyPrices: { BOTH: 75, CARPET: 55, TILE: 50 },
+    contractPrices: { BOTH: 65, CARPET: 45, TILE: 40 },
+    advantagePrices: { BOTH: 60, CARPET: 42, TILE: 38 },
+    sqftPrices: { CARPET: 0, TILE: 0 }
+  };
+}
+
+// Reads the row from the database, creating it with the built-in defaults on first use.
+export async function loadPricingDefaults(organizationId: string, db: DbClient = getPrisma()) {
+  const existing = await db.pricingDefaults.findUnique({ where: { organizationId } });
+  if (existing) return existing;
+  const d = defaultPricing();
+  return db.pricingDefaults.upsert({
+    where: { organizationId },
+    create: {
+      organizationId,
+      roomsMinPerSession: d.roomsMinPerSession,
+      roomsMaxPerSession: d.roomsMaxPerSession,
+      basePrices: d.basePrices,
+      penaltyPrices: d.penaltyPrices,
+      contractPrices: d.contractPrices,
+      advantagePrices: d.advantagePrices,
+      sqftPrices: d.sqftPrices
+    },
+    update: {}
+  });
+}
+
+// Cached read for request paths (treat the result as read-only). Concurrent misses for the
+// same organization share one load.
+export function getPricingDefaults(organizationId: string): Promise<PricingDefaults> {
+  if (!(TTL_MS > 0)) return loadPricingDefaults(organizationId);
+  startPoll();
+
+  const now = Date.now();
+  const hit = cache.get(organizationId);
+  if (hit && hit.expiresAt > now) return hit.value;
+
+  const entry: Entry = { value: loadPricingDefaults(organizationId), expiresAt: now + TTL_MS };
+  cache.set(organizationId, entry);
+  entry.value.catch(() => {
+    if (cache.get(organizationId) === entry) cache.delete(organizationId);
+  });
+  return entry.value;
+}
+
+export function invalidatePricingDefaults(organizationId?: string) {
+  if (organizationId === undefined) cache.clear();
+  else cache.delete(organizationId);
+}
+
+function startPoll() {
+  if (pollStarted || !(POLL_MS > 0)) return;
+  pollStarted = true;
+  setInterval(() => {
+    void poll();
+  }, POLL_MS).unref();
+}
+
+// Compares `updatedAt` of the cached rows only (one row per organization), so writers' clocks
+// don't matter.
+async function poll() {
+  if (polling || !cache.size) return;
+  polling = true;
+  try {
+    const snapshot = new Map(cache);
+    const cached = new Map<string, Date>();
+    for (const [organizationId, entry] of snapshot) {
+      const row = await entry.value.catch(() => null);
+      if (row) cached.set(organizationId, row.updatedAt);
+    }
+    if (!cached.size) return;
+
+    const rows = await getPrisma().pricingDefaults.findMany({
+      where: { organizationId: { in: [...cached.keys()] } },
+      select: { organizationId: true, updatedAt: true }
+    });
+    const current = new Map(rows.map((r) => [r.organizationId, r.updatedAt.getTime()]));
+    for (const [organizationId, updatedAt] of cached) {
+      if (current.get(organizationId) === updatedAt.getTime()) continue;
+      if (cache.get(organizationId) === snapshot.get(organizationId)) cache.delete(organizationId);
+    }
+  } catch (err) {
+    console.error('[pricing] cache poll failed:', err);
+  } finally {
+    polling = false;
+  }
+}
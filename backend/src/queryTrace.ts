@@ -0,0 +1,137 @@
+import { AsyncLocalStorage, AsyncResource } from 'async_hooks';
+import { performance } from 'perf_hooks';
+import { Prisma } from '@prisma/client';
+import { type NextFunction, type Request, type RequestHandler, type Response } from 'express';
+
+// SLOW_QUERY_MS: log Prisma operations slower than this (0 disables).
+// REPEATED_QUERY_THRESHOLD: flag requests issuing the same query shape this many times (N+1).
+const SLOW_QUERY_MS = Number(process.env.SLOW_QUERY_MS || 200);
+const REPEATED_QUERY_THRESHOLD = Number(process.env.REPEATED_QUERY_THRESHOLD || 10);
+
+type RequestTrace = {
+  route: () => string;
+  queries: number;
+  dbMs: number;
+  shapes: Map<string, number>;
+};
+
+export type RouteQueryStats = {
+  requests: number;
+  queries: number;
+  dbMs: number;
+  maxQueries: number;
+  slowQueries: number;
+  repeatedQueryRequests: number;
+};
+
+const requestTraces = new AsyncLocalStorage<RequestTrace>();
+const routeStats = new Map<string, RouteQueryStats>();
+
+function statsFor(route: string): RouteQueryStats {
+  let stats = routeStats.get(route);
+  if (!stats) {
+    stats = { requests: 0, queries: 0, dbMs: 0, maxQueries: 0, slowQueries: 0, repeatedQueryRequests: 0 };
+    routeStats.set(route, stats);
+  }
+  return stats;
+}
+
+// Replaces values by their type so the shape can be logged and compared without leaking data.
+function argShape(value: unknown, depth = 0): unknown {
+  if (value === null || value === undefined) return value === null ? 'null' : 'undefined';
+  if (value instanceof Date) return 'date';
+  if (Array.isArray(value)) return value.length ? [argShape(value[0], depth + 1)] : [];
+  if (typeof value === 'object') {
+    if (depth > 6) return 'object';
+    const out: Record<string, unknown> = {};
+    for (const key of Object.keys(value as object).sort()) out[key] = argShape((value as any)[key], depth + 1);
+    return out;
+  }
+  return typeof value;
+}
+
+function queryShape(model: string | undefined, operation: string, args: unknown): string {
+  // Raw queries: the SQL text with its placeholders is already the shape.
+  const sql = (args as any)?.sql ?? (Array.isArray(args) && Array.isArray(args[0]) ? args[0].join('?') : undefined);
+  if (typeof sql === 'string') return `${operation} ${sql.replace(/\s+/g, ' ').trim().slice(0, 300)}`;
+  return `${model ?? ''}.${operation} ${JSON.stringify(argShape(args))}`;
+}
+
+function routeKey(req: Request): string {
+  const path = req.route?.path;
+  if (!path) return `${req.method} (unmatched)`;
+  return `${req.method} ${req.baseUrl || ''}${path}`;
+}
+
+// Express middleware: every Prisma operation issued while handling the request is
+// attributed to it; totals are folded into per-route stats when the response finishes.
+export function traceRequests(req: Request, res: Response, next: NextFunction) {
+  const trace: RequestTrace = { route: () => routeKey(req), queries: 0, dbMs: 0, shapes: new Map() };
+  res.on('finish', () => {
+    const route = routeKey(req);
+    const stats = statsFor(route);
+    stats.requests += 1;
+    stats.queries += trace.queries;
+    stats.dbMs += trace.dbMs;
+    stats.maxQueries = Math.max(stats.maxQueries, trace.queries);
+
+    let repeated = false;
+    for (const [shape, count] of trace.shapes) {
+      if (REPEATED_QUERY_THRESHOLD > 0 && count >= REPEATED_QUERY_THRESHOLD) {
+        repeated = true;
+        console.warn(`[db] repeated query x${count} in ${route}: ${shape}`);
+      }
+    }
+    if (repeated) stats.repeatedQueryRequests += 1;
+  });
+  requestTraces.run(trace, next);
+}
+
+// Body parsers that finish from stream callbacks (multer/busboy) call `next` outside the
+// request's async context; this runs the rest of the chain back inside it.
+export function keepRequestTrace(middleware: RequestHandler): RequestHandler {
+  return (req, res, next) => middleware(req, res, AsyncResource.bind(next));
+}
+
+export const queryTracing = Prisma.defineExtension({
+  name: 'queryTracing',
+  query: {
+    async $allOperations({ model, operation, args, query }) {
+      const start = performance.now();
+      try {
+        return await query(args);
+      } finally {
+        const ms = performance.now() - start;
+        const trace = requestTraces.getStore();
+        const shape = queryShape(model, operation, args);
+        if (trace) {
+          trace.queries += 1;
+          trace.dbMs += ms;
+          trace.shapes.set(shape, (trace.shapes.get(shape) || 0) + 1);
+        }
+        if (SLOW_QUERY_MS > 0 && ms >= SLOW_QUERY_MS) {
+          const route = trace ? trace.route() : '(background)';
+          if (trace) statsFor(route).slowQueries += 1;
+          console.warn(`[db] slow query ${ms.toFixed(1)}ms in ${route}: ${shape}`);
+        }
+      }
+    }
+  }
+});
+
+// Per-process snapshot (each cluster worker keeps its own), busiest routes first.
+export function getRouteQueryStats() {
+  return Array.from(routeStats.entries())
+    .map(([route, s]) => ({
+      route,
+      ...s,
+      dbMs: Math.round(s.dbMs),
+      avgQueries: s.requests ? Number((s.queries / s.requests).toFixed(2)) : 0,
+      avgDbMs: s.requests ? Number((s.dbMs / s.requests).toFixed(2)) : 0
+    }))
+    .sort((a, b) => b.dbMs - a.dbMs);
+}
+
+export function resetRouteQueryStats() {
+  routeStats.clear();
+}
@@ -0,0 +1,175 @@
+import { type NextFunction, type Request, type Response } from 'express';
+import { getPrisma } from './db';
+
+export type BucketSpec = {
+  capacity: number; // burst size
+  refillPerSec: number; // sustained rate
+};
+
+export type TakeResult = { allowed: boolean; retryAfterSec: number };
+
+// Token bucket storage. The in-memory store is per process; the Postgres store lets several
+// API processes/instances share buckets. Tests can swap in their own with setRateLimitStore.
+export interface RateLimitStore {
+  take(key: string, spec: BucketSpec): Promise<TakeResult>;
+}
+
+export class MemoryRateLimitStore implements RateLimitStore {
+  private buckets = new Map<string, { tokens: number; updatedAt: number; spec: BucketSpec }>();
+
+  constructor() {
+    // Drop buckets that have refilled completely; they behave exactly like missing ones.
+    setInterval(() => this.sweep(), 60_000).unref();
+  }
+
+  async take(key: string, spec: BucketSpec): Promise<TakeResult> {
+    const now = Date.now();
+    const bucket = this.buckets.get(key) || { tokens: spec.capacity, updatedAt: now, spec };
+    bucket.tokens = Math.min(spec.capacity, bucket.tokens + ((now - bucket.updatedAt) / 1000) * spec.refillPerSec);
+    bucket.updatedAt = now;
+    this.buckets.set(key, bucket);
+
+    if (bucket.tokens >= 1) {
+      bucket.tokens -= 1;
+      return { allowed: true, retryAfterSec: 0 };
+    }
+    return { allowed: false, retryAfterSec: Math.ceil((1 - bucket.tokens) / spec.refillPerSec) };
+  }
+
+  private sweep() {
+    const now = Date.now();
+    for (const [key, b] of this.buckets) {
+      const fullAt = b.updatedAt + ((b.spec.capacity - b.tokens) / b.spec.refillPerSec) * 1000;
+      if (fullAt <= now) this.buckets.delete(key);
+    }
+  }
+}
+
+// One atomic upsert per request against the UNLOGGED "RateLimitBucket" table.
+export class PostgresRateLimitStore implements RateLimitStore {
+  constructor() {
+    setInterval(() => {
+      void getPrisma()
+        .$executeRaw`DELETE FROM "RateLimitBucket" WHERE "updatedAt" < LOCALTIMESTAMP - INTERVAL '1 hour'`
+        .catch((err) => console.error('[rate-limit] cleanup failed:', err));
+    }, 10 * 60_000).unref();
+  }
+
+  async take(key: string, spec: BucketSpec): Promise<TakeResult> {
+    const capacity = spec.capacity;
+    const rate = spec.refillPerSec;
+    const rows = await getPrisma().$queryRaw<{ tokens: number; allowed: boolean }[]>`
+      INSERT INTO "RateLimitBucket" AS b ("key", "tokens", "allowed", "updatedAt")
+      VALUES (${key}, ${capacity - 1}::float8, true, LOCALTIMESTAMP)
+      ON CONFLICT ("key") DO UPDATE SET
+        "tokens" = CASE
+          WHEN LEAST(${capacity}::float8, b."tokens" + EXTRACT(EPOCH FROM (LOCALTIMESTAMP - b."updatedAt")) * ${rate}::float8) >= 1
+          THEN LEAST(${capacity}::float8, b."tokens" + EXTRACT(EPOCH FROM (LOCALTIMESTAMP - b."updatedAt")) * ${rate}::float8) - 1
+          ELSE LEAST(${capacity}::float8, b."tokens" + EXTRACT(EPOCH FROM (LOCALTIMESTAMP - b."updatedAt")) * ${rate}::float8)
+        END,
+        "allowed" = LEAST(${capacity}::float8, b."tokens" + EXTRACT(EPOCH FROM (LOCALTIMESTAMP - b."updatedAt")) * ${rate}::float8) >= 1,
+        "updatedAt" = LOCALTIMESTAMP
+      RETURNING "tokens", "allowed"
+    `;
+    const row = rows[0];
+    if (!row || row.allowed) return { allowed: true, retryAfterSec: 0 };
+    return { allowed: false, retryAfterSec: Math.ceil((1 - Number(row.tokens)) / rate) };
+  }
+}
+
+let storeSingleton: RateLimitStore | null = null;
+
+function getStore(): RateLimitStore {
+  if (!storeSingleton) {
+    const kind = String(process.env.RATE_LIMIT_STORE || 'memory').trim().toLowerCase();
+    storeSingleton = kind === 'postgres' ? new PostgresRateLimitStore() : new MemoryRateLimitStore();
+  }
+  return storeSingleton;
+}
+
+export function setRateLimitStore(store: RateLimitStore) {
+  storeSingleton = store;
+}
+
+// ===== Load shedding =====
+
+// Event-loop lag, sampled by timer drift and smoothed so a single GC pause doesn't trip it.
+const LAG_SAMPLE_MS = 500;
+let eventLoopLagMs = 0;
+let lagMonitorStarted = false;
+
+function startLagMonitor() {
+  if (lagMonitorStarted) return;
+  lagMonitorStarted = true;
+  let expected = Date.now() + LAG_SAMPLE_MS;
+  setInterval(() => {
+    const now = Date.now();
+    const lag = Math.max(0, now - expected);
+    eventLoopLagMs = eventLoopLagMs * 0.7 + lag * 0.3;
+    expected = now + LAG_SAMPLE_MS;
+  }, LAG_SAMPLE_MS).unref();
+}
+
+export function getEventLoopLagMs() {
+  return Math.round(eventLoopLagMs);
+}
+
+const MAX_LAG_MS = Number(process.env.PUBLIC_MAX_EVENT_LOOP_LAG_MS || 200);
+
+export type PublicLimitSpec = {
+  perIp: BucketSpec;
+  perRoute: BucketSpec;
+  maxInflight: number;
+};
+
+function clientIp(req: Request) {
+  return req.ip || req.socket.remoteAddress || 'unknown';
+}
+
+function reject(res: Response, status: 429 | 503, error: string, retryAfterSec: number) {
+  const retryAfter = Math.max(1, retryAfterSec);
+  res.setHeader('Retry-After', String(retryAfter));
+  res.status(status).json({ error, retryAfter });
+}
+
+// Guards an unauthenticated route group: a token bucket per client IP and one for the group
+// as a whole (429), a cap on its concurrent requests, and immediate shedding while the event
+// loop is lagging (503), so logged-in staff keep their latency under a scraper or retry storm.
+export function publicRateLimit(name: string, spec: PublicLimitSpec) {
+  startLagMonitor();
+  let inflight = 0;
+
+  return async (req: Request, res: Response, next: NextFunction) => {
+    if (process.env.RATE_LIMIT_DISABLED === '1') return next();
+
+    if (inflight >= spec.maxInflight || (MAX_LAG_MS > 0 && eventLoopLagMs > MAX_LAG_MS)) {
+      return reject(res, 503, 'server_busy', 2);
+    }
+
+    let ipResult: TakeResult;
+    let routeResult: TakeResult;
+    try {
+      [ipResult, routeResult] = await Promise.all([
+        getStore().take(`${name}:ip:${clientIp(req)}`, spec.perIp),
+        getStore().take(`${name}:route`, spec.perRoute)
+      ]);
+    } catch (err) {
+      // Fail open: a broken shared store must not take the public links down.
+      console.error('[rate-limit] store failed:', err);
+      ipResult = routeResult = { allowed: true, retryAfterSec: 0 };
+    }
+    if (!ipResult.allowed) return reject(res, 429, 'rate_limited', ipResult.retryAfterSec);
+    if (!routeResult.allowed) return reject(res, 429, 'rate_limited', routeResult.retryAfterSec);
+
+    inflight += 1;
+    let released = false;
+    const release = () => {
+      if (released) return;
+      released = true;
+      inflight -= 1;
+    };
+    res.on('finish', release);
+    res.on('close', release);
+    next();
+  };
+}
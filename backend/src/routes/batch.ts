@@ -0,0 +1,126 @@
+import { Router, type Response } from 'express';
+import { withChangeLog } from '../changes';
+import { idempotent } from '../idempotency';
+import { newOperationContext, type Operation, type OperationContext, type OperationResult } from '../operations';
+import { requireAuth, type AuthedRequest } from '../auth/middleware';
+import { addTaskEventOp, patchTaskOp } from './tasks';
+import { cancelReservationOp, createReservationOp, patchReservationOp } from './planning';
+
+const router = Router();
+
+const MAX_OPERATIONS = 100;
+const TRANSACTION_TIMEOUT_MS = 15_000;
+
+type BatchItem = { id?: string; method?: string; path?: string; body?: any };
+
+type Route = { method: string; pattern: RegExp; build: (params: string[], body: any) => Operation };
+
+// The write routes the offline queue (shared/db.js) replays. Same handlers as the single routes.
+const ROUTES: Route[] = [
+  { method: 'PATCH', pattern: /^\/tasks\/by-legacy\/([^/]+)$/, build: ([id], body) => patchTaskOp(id, body, true) },
+  { method: 'POST', pattern: /^\/tasks\/by-legacy\/([^/]+)\/events$/, build: ([id], body) => addTaskEventOp(id, body, true) },
+  { method: 'PATCH', pattern: /^\/tasks\/([^/]+)$/, build: ([id], body) => patchTaskOp(id, body, false) },
+  { method: 'POST', pattern: /^\/tasks\/([^/]+)\/events$/, build: ([id], body) => addTaskEventOp(id, body, false) },
+  { method: 'POST', pattern: /^\/hotels\/([^/]+)\/reservations$/, build: ([id], body) => createReservationOp(id, body) },
+  { method: 'PATCH', pattern: /^\/reservations\/([^/]+)$/, build: ([id], body) => patchReservationOp(id, body) },
+  { method: 'POST', pattern: /^\/reservations\/([^/]+)\/cancel$/, build: ([id], body) => cancelReservationOp(id, body) }
+];
+
+function resolve(item: BatchItem): Operation | null {
+  const method = String(item.method || '').trim().toUpperCase();
+  const path = String(item.path || '')
+    .trim()
+    .split('?')[0]
+    .replace(/^\/api\/v1(?=\/)/, '')
+    .replace(/\/+$/, '');
+  for (const route of ROUTES) {
+    if (route.method !== method) continue;
+    const m = route.pattern.exec(path);
+    if (!m) continue;
+    let params: string[];
+    try {
+      params = m.slice(1).map((p) => decodeURIComponent(p).trim());
+    } catch {
+      return null;
+    }
+    return route.build(params, item.body ?? {});
+  }
+  return null;
+}
+
+async function runOne(ctx: OperationContext, op: Operation | null): Promise<OperationResult> {
+  if (!op) return { status: 404, body: { error: 'unsupported_operation' } };
+  return op(ctx);
+}
+
+class BatchAborted extends Error {}
+
+// Runs queued writes from one client in a single request: auth, hotel scope and repeated
+// lookups (task by legacy id, staff ids) are resolved once for the whole batch. Operations run
+// in order. With `atomic: true` they share one transaction and the first failure rolls back
+// everything; otherwise each operation commits on its own and failures don't stop the rest.
+router.post('/batch', requireAuth, idempotent, async (req: AuthedRequest, res: Response) => {
+  const items = req.body?.operations;
+  if (!Array.isArray(items) || items.some((i) => !i || typeof i !== 'object')) {
+    return res.status(400).json({ error: 'invalid_operations' });
+  }
+  if (items.length > MAX_OPERATIONS) return res.status(400).json({ error: 'too_many_operations' });
+  const atomic = Boolean(req.body?.atomic);
+
+  const ops = (items as BatchItem[]).map(resolve);
+  const ids = (items as BatchItem[]).map((item, idx) => (item.id !== undefined ? String(item.id) : String(idx)));
+  const results: { id: string; status: number; body: any }[] = [];
+
+  if (!atomic) {
+    // One transaction per operation; lookups are still shared through the cache.
+    const cache = new Map<string, Promise<unknown>>();
+    for (let i = 0; i < ops.length; i++) {
+      let result: OperationResult;
+      try {
+        result = await withChangeLog((tx, changes) => runOne(newOperationContext(req, tx, changes, cache), ops[i]));
+      } catch (err) {
+        console.error('[batch] operation failed:', err);
+        result = { status: 500, body: { error: 'internal_server_error' } };
+      }
+      results.push({ id: ids[i], ...result });
+    }
+    return res.json({ committed: true, results });
+  }
+
+  try {
+    await withChangeLog(
+      async (tx, changes) => {
+        const ctx = newOperationContext(req, tx, changes);
+        for (let i = 0; i < ops.length; i++) {
+          let result: OperationResult;
+          try {
+            result = await runOne(ctx, ops[i]);
+          } catch (err) {
+            console.error('[batch] operation failed:', err);
+            result = { status: 500, body: { error: 'internal_server_error' } };
+          }
+          results.push({ id: ids[i], ...result });
+          if (result.status >= 400) throw new BatchAborted();
+        }
+      },
+      { timeout: TRANSACTION_TIMEOUT_MS }
+    );
+  } catch (err) {
+    if (!(err instanceof BatchAborted)) {
+      // Commit failure or transaction timeout: nothing was applied.
+      console.error('[batch] transaction failed:', err);
+      return res.status(500).json({ error: 'internal_server_error' });
+    }
+    // Everything before the failing operation was rolled back; nothing after it ran.
+    const failedAt = results.length - 1;
+    const out = ids.map((id, idx) => {
+      if (idx === failedAt) return results[idx];
+      return { id, status: 424, body: { error: idx < failedAt ? 'batch_rolled_back' : 'batch_aborted' } };
+    });
+    return res.json({ committed: false, results: out });
+  }
+
+  res.json({ committed: true, results });
+});
+
+export default router;
@@ -0,0 +1,311 @@
+import { Router, type Response } from 'express';
+import { getPrisma } from '../db';
+import { requireAuth, type AuthedRequest } from '../auth/middleware';
+import { requireHotelScope } from '../auth/scope';
+import { hotelHead, isCursorExpired, type ChangeEntity } from '../changes';
+import { getHotelEvents, type HotelEvent } from '../events';
+import { onShutdown } from '../cluster';
+
+const router = Router();
+
+const DEFAULT_LIMIT = 500;
+const MAX_LIMIT = 1000;
+// Keeps proxies and load balancers from closing idle event streams.
+const HEARTBEAT_MS = 25_000;
+// Delay before live events are confirmed against the feed and the stream's `id:` advances.
+const CURSOR_CONFIRM_MS = 1000;
+
+function parseLimit(value: any): number {
+  const n = Number(value);
+  if (!Number.isFinite(n) || n <= 0) return DEFAULT_LIMIT;
+  return Math.min(Math.floor(n), MAX_LIMIT);
+}
+
+// Loads the current state of the changed rows, keyed by id. Rows that no longer exist
+// (or moved to another hotel) are absent and are reported as deletes.
+async function loadEntities(
+  organizationId: string,
+  hotelId: string,
+  entity: ChangeEntity,
+  ids: string[]
+): Promise<Map<string, unknown>> {
+  const prisma = getPrisma();
+  const out = new Map<string, unknown>();
+  if (!ids.length) return out;
+
+  if (entity === 'task') {
+    const tasks = await prisma.task.findMany({
+      where: { id: { in: ids }, hotelId, organizationId },
+      include: {
+        locations: true,
+        events: { orderBy: { at: 'asc' } },
+        attachments: { orderBy: { at: 'asc' } }
+      }
+    });
+    for (const t of tasks) out.set(t.id, t);
+  } else if (entity === 'reservation') {
+    const reservations = await prisma.reservation.findMany({ where: { id: { in: ids }, hotelId, organizationId } });
+    for (const r of reservations) out.set(r.id, r);
+  } else if (entity === 'session') {
+    const sessions = await prisma.session.findMany({ where: { id: { in: ids }, hotelId, organizationId } });
+    for (const s of sessions) out.set(s.id, s);
+  } else if (entity === 'building') {
+    const buildings = await prisma.building.findMany({
+      where: { id: { in: ids }, hotelId },
+      select: { id: true, name: true, notes: true }
+    });
+    for (const b of buildings) out.set(b.id, { id: b.id, name: b.name, notes: b.notes || '' });
+  } else if (entity === 'floor') {
+    const floors = await prisma.floor.findMany({
+      where: { id: { in: ids }, building: { hotelId } },
+      select: { id: true, buildingId: true, nameOrNumber: true, sortOrder: true, notes: true }
+    });
+    for (const f of floors) {
+      out.set(f.id, {
+        id: f.id,
+        buildingId: f.buildingId,
+        nameOrNumber: f.nameOrNumber,
+        sortOrder: f.sortOrder ?? null,
+        notes: f.notes || ''
+      });
+    }
+  } else if (entity === 'room') {
+    const rooms = await prisma.room.findMany({ where: { id: { in: ids }, floor: { building: { hotelId } } } });
+    for (const r of rooms) {
+      out.set(r.id, {
+        id: r.id,
+        floorId: r.floorId,
+        roomNumber: r.roomNumber,
+        active: r.active,
+        surface: r.surface,
+        sqft: r.sqft ?? null,
+        cleaningFrequency: r.cleaningFrequencyDays ?? null,
+        lastCleaned: r.lastCleanedAt ? r.lastCleanedAt.getTime() : null,
+        notes: r.notes || ''
+      });
+    }
+  } else if (entity === 'space') {
+    const spaces = await prisma.space.findMany({ where: { id: { in: ids }, floor: { building: { hotelId } } } });
+    for (const s of spaces) {
+      out.set(s.id, {
+        id: s.id,
+        floorId: s.floorId,
+        name: s.name,
+        type: s.type,
+        active: s.active,
+        sqft: s.sqft ?? null,
+        cleaningFrequency: s.cleaningFrequencyDays ?? null
+      });
+    }
+  }
+  return out;
+}
+
+function toEvent(hotelId: string, e: { id: bigint; entity: string; entityId: string; op: string }): HotelEvent {
+  return { seq: String(e.id), hotelId, entity: e.entity, op: e.op === 'DELETE' ? 'delete' : 'upsert', id: e.entityId };
+}
+
+// Incremental sync: `GET /hotels/:hotelId/changes?since=<cursor>`.
+// The `id > since` cursor relies on writeChanges making a hotel's ids visible in commit order.
+// Without `since` only the current cursor is returned; clients take it before a full load
+// and then poll with it. Each entity appears once per page, at its latest sequence number.
+router.get('/hotels/:hotelId/changes', requireAuth, async (req: AuthedRequest, res: Response) => {
+  const hotelId = String(req.params.hotelId || '').trim();
+  if (!hotelId) return res.status(400).json({ error: 'missing_hotel_id' });
+  if (!requireHotelScope(req, res, hotelId)) return;
+
+  const sinceRaw = String(req.query.since ?? '').trim();
+  if (sinceRaw && !/^\d+$/.test(sinceRaw)) return res.status(400).json({ error: 'invalid_cursor' });
+  const limit = parseLimit(req.query.limit);
+
+  const prisma = getPrisma();
+  const organizationId = req.auth!.organizationId;
+  const hotel = await prisma.hotel.findFirst({
+    where: { id: hotelId, organizationId },
+    select: { id: true }
+  });
+  if (!hotel) return res.status(404).json({ error: 'hotel_not_found' });
+
+  if (!sinceRaw) {
+    return res.json({ changes: [], cursor: String(await hotelHead(hotelId)), hasMore: false });
+  }
+  if (await isCursorExpired(hotelId, BigInt(sinceRaw))) return res.status(410).json({ error: 'cursor_expired' });
+
+  const entries = await prisma.changeLogEntry.findMany({
+    where: { hotelId, id: { gt: BigInt(sinceRaw) } },
+    orderBy: { id: 'asc' },
+    take: limit + 1,
+    select: { id: true, entity: true, entityId: true, op: true }
+  });
+  const hasMore = entries.length > limit;
+  const page = hasMore ? entries.slice(0, limit) : entries;
+  const cursor = page.length ? String(page[page.length - 1].id) : sinceRaw;
+
+  const latest = new Map<string, (typeof page)[number]>();
+  for (const e of page) {
+    const key = `${e.entity}:${e.entityId}`;
+    latest.delete(key);
+    latest.set(key, e);
+  }
+
+  const idsByEntity = new Map<ChangeEntity, string[]>();
+  for (const e of latest.values()) {
+    if (e.op !== 'UPSERT') continue;
+    const entity = e.entity as ChangeEntity;
+    const ids = idsByEntity.get(entity) || [];
+    ids.push(e.entityId);
+    idsByEntity.set(entity, ids);
+  }
+  const loaded = new Map<ChangeEntity, Map<string, unknown>>();
+  for (const [entity, ids] of idsByEntity) {
+    loaded.set(entity, await loadEntities(organizationId, hotelId, entity, ids));
+  }
+
+  const changes = Array.from(latest.values())
+    .sort((a, b) => (a.id < b.id ? -1 : 1))
+    .map((e) => {
+      const data = e.op === 'UPSERT' ? loaded.get(e.entity as ChangeEntity)?.get(e.entityId) : undefined;
+      if (data === undefined) return { seq: String(e.id), entity: e.entity, op: 'delete', id: e.entityId };
+      return { seq: String(e.id), entity: e.entity, op: 'upsert', id: e.entityId, data };
+    });
+
+  res.json({ changes, cursor, hasMore });
+});
+
+// Push channel: `GET /hotels/:hotelId/events` (text/event-stream). Each message names a
+// changed entity; clients fetch details through the change feed or the entity routes.
+// Reconnects send `Last-Event-ID` (or `?since=`) and missed changes are replayed first.
+router.get('/hotels/:hotelId/events', requireAuth, async (req: AuthedRequest, res: Response) => {
+  const hotelId = String(req.params.hotelId || '').trim();
+  if (!hotelId) return res.status(400).json({ error: 'missing_hotel_id' });
+  if (!requireHotelScope(req, res, hotelId)) return;
+
+  const sinceRaw = String(req.headers['last-event-id'] ?? req.query.since ?? '').trim();
+  if (sinceRaw && !/^\d+$/.test(sinceRaw)) return res.status(400).json({ error: 'invalid_cursor' });
+
+  const prisma = getPrisma();
+  const hotel = await prisma.hotel.findFirst({
+    where: { id: hotelId, organizationId: req.auth!.organizationId },
+    select: { id: true }
+  });
+  if (!hotel) return res.status(404).json({ error: 'hotel_not_found' });
+
+  // Without Last-Event-ID the stream starts at the hotel's current head. Either way entries
+  // after `since` are replayed once subscribed (usually none), which also covers changes
+  // published between reading the head and subscribing.
+  const since = sinceRaw ? BigInt(sinceRaw) : await hotelHead(hotelId);
+
+  res.status(200);
+  res.setHeader('Content-Type', 'text/event-stream; charset=utf-8');
+  res.setHeader('Cache-Control', 'no-cache, no-transform');
+  res.setHeader('Connection', 'keep-alive');
+  res.setHeader('X-Accel-Buffering', 'no');
+  res.flushHeaders();
+
+  // `id:` (the reconnect cursor) only ever covers a prefix of the hotel's feed that the client
+  // has fully received. Replayed entries come from the feed in order and carry it directly.
+  // Live events can arrive out of seq order, so they are sent without it; a moment later the
+  // hotel's entries up to the highest seq sent are read back (ids are commit-ordered within a
+  // hotel, so all of them are visible by then), any still missing are sent, and a bare `id:`
+  // moves the client's Last-Event-ID past them.
+  let confirmed = since;
+  let highest = since;
+  let replaying = true;
+  let closed = false;
+  let confirmTimer: NodeJS.Timeout | null = null;
+  const pending: HotelEvent[] = [];
+  const sent = new Set<string>();
+
+  const write = (event: HotelEvent, id?: bigint) => {
+    res.write(`${id !== undefined ? `id: ${id}\n` : ''}event: change\ndata: ${JSON.stringify(event)}\n\n`);
+  };
+
+  const scheduleConfirm = () => {
+    if (confirmTimer || closed || highest <= confirmed) return;
+    confirmTimer = setTimeout(() => void confirm(), CURSOR_CONFIRM_MS);
+  };
+
+  const confirm = async () => {
+    const target = highest;
+    try {
+      const entries = await prisma.changeLogEntry.findMany({
+        where: { hotelId, id: { gt: confirmed, lte: target } },
+        orderBy: { id: 'asc' },
+        select: { id: true, entity: true, entityId: true, op: true }
+      });
+      if (closed) return;
+      for (const e of entries) {
+        if (!sent.has(String(e.id))) write(toEvent(hotelId, e));
+      }
+      res.write(`id: ${target}\n\n`);
+      confirmed = target;
+      for (const seq of sent) if (BigInt(seq) <= target) sent.delete(seq);
+    } catch (err) {
+      console.error('[events] cursor confirmation failed:', err);
+    } finally {
+      confirmTimer = null;
+      scheduleConfirm();
+    }
+  };
+
+  const send = (event: HotelEvent) => {
+    const seq = BigInt(event.seq);
+    if (seq <= confirmed || sent.has(event.seq)) return;
+    sent.add(event.seq);
+    if (seq > highest) highest = seq;
+    write(event);
+    scheduleConfirm();
+  };
+
+  // Subscribe before replaying so nothing published in between is lost.
+  const unsubscribe = getHotelEvents().subscribe(
+    hotelId,
+    (event) => {
+      if (replaying) pending.push(event);
+      else send(event);
+    },
+    since
+  );
+  const heartbeat = setInterval(() => res.write(': ping\n\n'), HEARTBEAT_MS);
+  // Ending the stream on shutdown lets the server drain; clients reconnect with Last-Event-ID.
+  const offShutdown = onShutdown(() => res.end());
+  req.on('close', () => {
+    closed = true;
+    if (confirmTimer) clearTimeout(confirmTimer);
+    clearInterval(heartbeat);
+    offShutdown();
+    unsubscribe();
+  });
+
+  res.write('retry: 3000\n\n');
+
+  try {
+    const expired = sinceRaw ? await isCursorExpired(hotelId, since) : false;
+    const missed = expired
+      ? []
+      : await prisma.changeLogEntry.findMany({
+          where: { hotelId, id: { gt: since } },
+          orderBy: { id: 'asc' },
+          take: MAX_LIMIT + 1,
+          select: { id: true, entity: true, entityId: true, op: true }
+        });
+    if (expired || missed.length > MAX_LIMIT) {
+      // Too far behind (or past the retention window) to replay; the client should resync
+      // through a full load. Everything up to the current head is covered by that.
+      res.write(`event: resync\ndata: ${JSON.stringify({ since: String(since) })}\n\n`);
+      confirmed = highest = await hotelHead(hotelId);
+    } else {
+      for (const e of missed) {
+        write(toEvent(hotelId, e), e.id);
+        confirmed = highest = e.id;
+      }
+    }
+  } catch (err) {
+    console.error('[events] replay failed:', err);
+    res.write(`event: resync\ndata: ${JSON.stringify({ since: String(since) })}\n\n`);
+  }
+  replaying = false;
+  for (const event of pending.splice(0)) send(event);
+});
+
+export default router;
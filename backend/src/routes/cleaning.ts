@@ -0,0 +1,145 @@
+import { Router, type Response } from 'express';
+import { Prisma } from '@prisma/client';
+import { getPrisma } from '../db';
+import { requireAuth, type AuthedRequest } from '../auth/middleware';
+import { getHotelScopeId, requireHotelScope } from '../auth/scope';
+
+const router = Router();
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Next due date, with never-cleaned rooms sorted first. Must stay identical to the
+// expression of "Room_cleaningDue_idx" (migration 20260117150000_room_cleaning_due).
+export const ROOM_DUE_KEY = Prisma.sql`COALESCE(r."lastCleanedAt" + r."cleaningFrequencyDays" * INTERVAL '1 day', '-infinity'::timestamp)`;
+
+type DueRow = {
+  id: string;
+  roomNumber: string;
+  surface: string;
+  sqft: number | null;
+  cleaningFrequencyDays: number;
+  lastCleanedAt: Date | null;
+  dueAt: Date | null;
+  floorId: string;
+  floorName: string;
+  floorSortOrder: number | null;
+  buildingId: string;
+  buildingName: string;
+  hotelId: string;
+  hotelName: string;
+};
+
+function parseIntParam(value: any, fallback: number, min: number, max: number): number | null {
+  if (value === undefined || value === '') return fallback;
+  const n = Number(value);
+  if (!Number.isInteger(n) || n < min || n > max) return null;
+  return n;
+}
+
+// Cursor is "<due epoch ms|never>:<room id>" of the last row of the previous page.
+function parseCursor(raw: string): { due: Date | null; id: string } | null {
+  const idx = raw.indexOf(':');
+  if (idx <= 0) return null;
+  const dueRaw = raw.slice(0, idx);
+  const id = raw.slice(idx + 1);
+  if (!id) return null;
+  if (dueRaw === 'never') return { due: null, id };
+  const ms = Number(dueRaw);
+  if (!Number.isFinite(ms)) return null;
+  return { due: new Date(ms), id };
+}
+
+function makeCursor(row: DueRow): string {
+  return `${row.dueAt ? row.dueAt.getTime() : 'never'}:${row.id}`;
+}
+
+// `GET /cleaning/due?hotelId=&withinDays=7&limit=100&cursor=`
+// Rooms with a cleaning frequency that are overdue, never cleaned, or due within `withinDays`
+// (0 = overdue only), soonest first. Each page is grouped by floor.
+router.get('/cleaning/due', requireAuth, async (req: AuthedRequest, res: Response) => {
+  let hotelId = String(req.query.hotelId || '').trim() || null;
+  if (hotelId) {
+    if (!requireHotelScope(req, res, hotelId)) return;
+  } else {
+    hotelId = getHotelScopeId(req);
+    if (!hotelId && req.auth!.role !== 'SUPER_ADMIN') return res.status(403).json({ error: 'forbidden_hotel_scope' });
+  }
+
+  const withinDays = parseIntParam(req.query.withinDays, 7, 0, 365);
+  if (withinDays === null) return res.status(400).json({ error: 'invalid_within_days' });
+  const limit = parseIntParam(req.query.limit, 100, 1, 500);
+  if (limit === null) return res.status(400).json({ error: 'invalid_limit' });
+  const cursorRaw = String(req.query.cursor || '').trim();
+  const cursor = cursorRaw ? parseCursor(cursorRaw) : null;
+  if (cursorRaw && !cursor) return res.status(400).json({ error: 'invalid_cursor' });
+
+  const now = new Date();
+  const horizon = new Date(now.getTime() + withinDays * DAY_MS);
+  // Timestamps are stored without time zone (UTC); compare as plain timestamps.
+  const afterCursor = !cursor
+    ? Prisma.empty
+    : cursor.due
+      ? Prisma.sql`AND (${ROOM_DUE_KEY}, r."id") > (${cursor.due.toISOString()}::timestamp, ${cursor.id})`
+      : Prisma.sql`AND (${ROOM_DUE_KEY}, r."id") > ('-infinity'::timestamp, ${cursor.id})`;
+
+  const prisma = getPrisma();
+  const rows = await prisma.$queryRaw<DueRow[]>`
+    SELECT
+      r."id", r."roomNumber", r."surface"::text AS "surface", r."sqft", r."cleaningFrequencyDays", r."lastCleanedAt",
+      r."lastCleanedAt" + r."cleaningFrequencyDays" * INTERVAL '1 day' AS "dueAt",
+      f."id" AS "floorId", f."nameOrNumber" AS "floorName", f."sortOrder" AS "floorSortOrder",
+      b."id" AS "buildingId", b."name" AS "buildingName",
+      h."id" AS "hotelId", h."name" AS "hotelName"
+    FROM "Room" r
+    JOIN "Floor" f ON f."id" = r."floorId"
+    JOIN "Building" b ON b."id" = f."buildingId"
+    JOIN "Hotel" h ON h."id" = b."hotelId"
+    WHERE h."organizationId" = ${req.auth!.organizationId}
+      ${hotelId ? Prisma.sql`AND h."id" = ${hotelId}` : Prisma.empty}
+      AND r."active" AND r."cleaningFrequencyDays" IS NOT NULL
+      AND ${ROOM_DUE_KEY} <= ${horizon.toISOString()}::timestamp
+      ${afterCursor}
+    ORDER BY ${ROOM_DUE_KEY}, r."id"
+    LIMIT ${limit + 1}
+  `;
+
+  const hasMore = rows.length > limit;
+  const page = hasMore ? rows.slice(0, limit) : rows;
+
+  const floors = new Map<string, any>();
+  for (const r of page) {
+    let floor = floors.get(r.floorId);
+    if (!floor) {
+      floor = {
+        floorId: r.floorId,
+        nameOrNumber: r.floorName,
+        sortOrder: r.floorSortOrder ?? null,
+        buildingId: r.buildingId,
+        buildingName: r.buildingName,
+        hotelId: r.hotelId,
+        hotelName: r.hotelName,
+        rooms: []
+      };
+      floors.set(r.floorId, floor);
+    }
+    const dueMs = r.dueAt ? r.dueAt.getTime() : null;
+    floor.rooms.push({
+      id: r.id,
+      roomNumber: r.roomNumber,
+      surface: r.surface,
+      sqft: r.sqft ?? null,
+      cleaningFrequency: r.cleaningFrequencyDays,
+      lastCleaned: r.lastCleanedAt ? r.lastCleanedAt.getTime() : null,
+      dueAt: dueMs,
+      overdue: dueMs === null || dueMs <= now.getTime(),
+      daysOverdue: dueMs === null ? null : Math.floor((now.getTime() - dueMs) / DAY_MS)
+    });
+  }
+
+  res.json({
+    floors: Array.from(floors.values()),
+    nextCursor: hasMore ? makeCursor(page[page.length - 1]) : null
+  });
+});
+
+export default router;
@@ -1,13 +1,22 @@
 import { Router, type Response } from 'express';
 import { randomBytes } from 'crypto';
 import { getPrisma } from '../db';
+import { publicRateLimit } from '../rateLimit';
+import { withLegacyId } from '../legacyIds';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireRole } from '../auth/roles';
 import { requireHotelScope } from '../auth/scope';
 import { sendMail } from '../email/mailer';
+import { getPricingDefaults, invalidatePricingDefaults, loadPricingDefaults } from '../pricingDefaults';
 
 const router = Router();
 
+const contractLinkLimit = publicRateLimit('contract_token', {
+  perIp: { capacity: 20, refillPerSec: 0.5 },
+  perRoute: { capacity: 200, refillPerSec: 20 },
+  maxInflight: 32
+});
+
 function makeContractToken(): string {
   return `ctok_${randomBytes(12).toString('hex')}`;
 }
@@ -30,41 +39,10 @@ function normalizeContractStatus(v: any): 'SENT' | 'ACCEPTED' {
   return 'SENT';
 }
 
-function defaultPricing() {
-  return {
-    roomsMinPerSession: 10,
-    roomsMaxPerSession: 20,
-    basePrices: { BOTH: 65, CARPET: 45, TILE: 40 },
-    penaltyPrices: { BOTH: 75, CARPET: 55, TILE: 50 },
-    contractPrices: { BOTH: 65, CARPET: 45, TILE: 40 },
-    advantagePrices: { BOTH: 60, CARPET: 42, TILE: 38 },
-    sqftPrices: { CARPET: 0, TILE: 0 }
-  };
-}
-
-async function getOrCreatePricingDefaults(prisma: ReturnType<typeof getPrisma>, organizationId: string) {
-  const existing = await prisma.pricingDefaults.findUnique({ where: { organizationId } });
-  if (existing) return existing;
-  const d = defaultPricing();
-  return prisma.pricingDefaults.create({
-    data: {
-      organizationId,
-      roomsMinPerSession: d.roomsMinPerSession,
-      roomsMaxPerSession: d.roomsMaxPerSession,
-      basePrices: d.basePrices,
-      penaltyPrices: d.penaltyPrices,
-      contractPrices: d.contractPrices,
-      advantagePrices: d.advantagePrices,
-      sqftPrices: d.sqftPrices
-    }
-  });
-}
-
 // ===== PRICING DEFAULTS (org) =====
 
 router.get('/pricing/defaults', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const prisma = getPrisma();
-  const defaults = await getOrCreatePricingDefaults(prisma, req.auth!.organizationId);
+  const defaults = await getPricingDefaults(req.auth!.organizationId);
   res.json({ defaults });
 });
 
@@ -73,8 +51,9 @@ router.patch(
   requireAuth,
   requireRole(['SUPER_ADMIN']),
   async (req: AuthedRequest, res: Response) => {
+    // Merged against the stored row, not the cache (another instance may have changed it).
     const prisma = getPrisma();
-    const current = await getOrCreatePricingDefaults(prisma, req.auth!.organizationId);
+    const current = await loadPricingDefaults(req.auth!.organizationId, prisma);
 
     const patch: any = {};
     if (req.body?.roomsMinPerSession !== undefined) patch.roomsMinPerSession = Number(req.body.roomsMinPerSession) || 0;
@@ -95,6 +74,7 @@ router.patch(
       where: { organizationId: req.auth!.organizationId },
       data: patch
     });
+    invalidatePricingDefaults(req.auth!.organizationId);
     res.json({ defaults: updated });
   }
 );
@@ -141,6 +121,7 @@ router.post(
 
     const contract = await prisma.contract.create({
       data: {
+        ...withLegacyId({}),
         organizationId: req.auth!.organizationId,
         hotelId,
         token: makeContractToken(),
@@ -271,7 +252,7 @@ router.post(
 
 // ===== CONTRACTS (token link / public) =====
 
-router.get('/contracts/by-token/:token', async (req, res: Response) => {
+router.get('/contracts/by-token/:token', contractLinkLimit, async (req, res: Response) => {
   const token = String(req.params.token || '').trim();
   if (!token) return res.status(400).json({ error: 'missing_token' });
 
@@ -282,7 +263,7 @@ router.get('/contracts/by-token/:token', async (req, res: Response) => {
   res.json({ contract });
 });
 
-router.post('/contracts/by-token/:token/accept', async (req, res: Response) => {
+router.post('/contracts/by-token/:token/accept', contractLinkLimit, async (req, res: Response) => {
   const token = String(req.params.token || '').trim();
   if (!token) return res.status(400).json({ error: 'missing_token' });
 
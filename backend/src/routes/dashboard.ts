@@ -0,0 +1,140 @@
+import { Router, type Response } from 'express';
+import { getPrisma } from '../db';
+import { requireAuth, type AuthedRequest } from '../auth/middleware';
+import { requireHotelScope } from '../auth/scope';
+import { ROOM_DUE_KEY } from './cleaning';
+
+const router = Router();
+
+// Dashboards poll; a few seconds of staleness is fine and keeps repeated loads off the DB.
+const CACHE_TTL_MS = Number(process.env.DASHBOARD_CACHE_MS || 15_000);
+const OPEN_TASK_STATUSES = ['OPEN', 'IN_PROGRESS', 'BLOCKED'] as const;
+
+type CacheEntry = { expiresAt: number; value: Promise<any> };
+const cache = new Map<string, CacheEntry>();
+
+function todayIso() {
+  return new Date().toISOString().slice(0, 10);
+}
+
+async function computeDashboard(organizationId: string, hotelId: string) {
+  const prisma = getPrisma();
+  const today = todayIso();
+  const approved = {
+    organizationId,
+    hotelId,
+    statusAdmin: 'APPROVED' as const,
+    statusHotel: 'APPROVED' as const,
+    cancelledAt: null,
+    proposedDate: { gte: today }
+  };
+
+  const [taskGroups, incidentGroups, upcomingCount, nextReservations, contractGroups, overdue] = await Promise.all([
+    prisma.task.groupBy({
+      by: ['status', 'priority'],
+      where: { organizationId, hotelId, category: 'TASK', status: { in: [...OPEN_TASK_STATUSES] } },
+      _count: { _all: true }
+    }),
+    prisma.task.groupBy({
+      by: ['status'],
+      where: { organizationId, hotelId, category: 'INCIDENT' },
+      _count: { _all: true }
+    }),
+    prisma.reservation.count({ where: approved }),
+    prisma.reservation.findMany({
+      where: approved,
+      orderBy: [{ proposedDate: 'asc' }, { proposedStart: 'asc' }],
+      take: 5,
+      select: { id: true, proposedDate: true, proposedStart: true, durationMinutes: true, roomIds: true, spaceIds: true }
+    }),
+    prisma.contract.groupBy({
+      by: ['status'],
+      where: { organizationId, hotelId },
+      _count: { _all: true }
+    }),
+    prisma.$queryRaw<{ count: bigint }[]>`
+      SELECT COUNT(*) AS "count"
+      FROM "Room" r
+      JOIN "Floor" f ON f."id" = r."floorId"
+      JOIN "Building" b ON b."id" = f."buildingId"
+      WHERE b."hotelId" = ${hotelId}
+        AND r."active" AND r."cleaningFrequencyDays" IS NOT NULL
+        AND ${ROOM_DUE_KEY} <= ${new Date().toISOString()}::timestamp
+    `
+  ]);
+
+  const tasksByStatus: Record<string, number> = {};
+  const tasksByPriority: Record<string, number> = {};
+  let openTasks = 0;
+  for (const g of taskGroups) {
+    tasksByStatus[g.status] = (tasksByStatus[g.status] || 0) + g._count._all;
+    tasksByPriority[g.priority] = (tasksByPriority[g.priority] || 0) + g._count._all;
+    openTasks += g._count._all;
+  }
+
+  const incidentsByStatus: Record<string, number> = {};
+  let openIncidents = 0;
+  for (const g of incidentGroups) {
+    incidentsByStatus[g.status] = g._count._all;
+    if ((OPEN_TASK_STATUSES as readonly string[]).includes(g.status)) openIncidents += g._count._all;
+  }
+
+  const contractsByStatus: Record<string, number> = {};
+  for (const g of contractGroups) contractsByStatus[g.status] = g._count._all;
+
+  return {
+    tasks: { open: openTasks, byStatus: tasksByStatus, byPriority: tasksByPriority },
+    incidents: { open: openIncidents, byStatus: incidentsByStatus },
+    reservations: {
+      upcomingApproved: upcomingCount,
+      next: nextReservations.map((r) => ({
+        id: r.id,
+        proposedDate: r.proposedDate,
+        proposedStart: r.proposedStart,
+        durationMinutes: r.durationMinutes,
+        roomCount: Array.isArray(r.roomIds) ? r.roomIds.length : 0,
+        spaceCount: Array.isArray(r.spaceIds) ? r.spaceIds.length : 0
+      }))
+    },
+    contracts: { active: contractsByStatus.ACCEPTED || 0, byStatus: contractsByStatus },
+    cleaning: { overdueRooms: Number(overdue[0]?.count ?? 0) },
+    generatedAt: new Date().toISOString()
+  };
+}
+
+// Concurrent requests for the same hotel share one computation; failures are not cached.
+function getDashboard(organizationId: string, hotelId: string) {
+  const key = `${organizationId}:${hotelId}`;
+  const now = Date.now();
+  const hit = cache.get(key);
+  if (hit && hit.expiresAt > now) return hit.value;
+
+  for (const [k, entry] of cache) {
+    if (entry.expiresAt <= now) cache.delete(k);
+  }
+  const value = computeDashboard(organizationId, hotelId);
+  cache.set(key, { expiresAt: now + CACHE_TTL_MS, value });
+  value.catch(() => {
+    if (cache.get(key)?.value === value) cache.delete(key);
+  });
+  return value;
+}
+
+router.get('/hotels/:hotelId/dashboard', requireAuth, async (req: AuthedRequest, res: Response) => {
+  const hotelId = String(req.params.hotelId || '').trim();
+  if (!hotelId) return res.status(400).json({ error: 'missing_hotel_id' });
+  if (!requireHotelScope(req, res, hotelId)) return;
+
+  const prisma = getPrisma();
+  const hotel = await prisma.hotel.findFirst({
+    where: { id: hotelId, organizationId: req.auth!.organizationId },
+    select: { id: true }
+  });
+  if (!hotel) return res.status(404).json({ error: 'hotel_not_found' });
+
+  const dashboard = await getDashboard(req.auth!.organizationId, hotelId);
+  res.setHeader('Cache-Control', `private, max-age=${Math.floor(CACHE_TTL_MS / 1000)}`);
+  res.json({ dashboard });
+});
+
+export default router;
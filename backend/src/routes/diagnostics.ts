@@ -0,0 +1,19 @@
+import { Router, type Response } from 'express';
+import { requireAuth, type AuthedRequest } from '../auth/middleware';
+import { requireRole } from '../auth/roles';
+import { getRouteQueryStats, resetRouteQueryStats } from '../queryTrace';
+
+const router = Router();
+
+// Per-route query counts and DB time of the process that serves the request
+// (with API_WORKERS > 1, each worker reports its own share).
+router.get('/diagnostics/queries', requireAuth, requireRole(['SUPER_ADMIN']), (_req: AuthedRequest, res: Response) => {
+  res.json({ pid: process.pid, routes: getRouteQueryStats() });
+});
+
+router.delete('/diagnostics/queries', requireAuth, requireRole(['SUPER_ADMIN']), (_req: AuthedRequest, res: Response) => {
+  resetRouteQueryStats();
+  res.json({ ok: true });
+});
+
+export default router;
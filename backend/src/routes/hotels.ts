@@ -1,5 +1,6 @@
 import { Router, type Response } from 'express';
 import { getPrisma } from '../db';
+import { withLegacyId } from '../legacyIds';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireRole } from '../auth/roles';
 import { getHotelScopeId } from '../auth/scope';
@@ -23,7 +24,7 @@ router.post('/', requireAuth, requireRole(['SUPER_ADMIN']), async (req: AuthedRe
 
   const prisma = getPrisma();
   const hotel = await prisma.hotel.create({
-    data: { name, organizationId: req.auth!.organizationId },
+    data: withLegacyId({ name, organizationId: req.auth!.organizationId }),
     select: { id: true, name: true, createdAt: true, updatedAt: true }
   });
   res.status(201).json({ hotel });
@@ -1,5 +1,7 @@
 import { Router, type Response } from 'express';
 import { getPrisma } from '../db';
+import { withLegacyId } from '../legacyIds';
+import { recordChange, withChangeLog } from '../changes';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireHotelScope } from '../auth/scope';
 
@@ -83,31 +85,35 @@ router.post('/hotels/:hotelId/incidents', requireAuth, async (req: AuthedRequest
   const assignedStaffId = assignedStaffIdRaw ? await resolveStaffId(req.auth!.organizationId, hotelId, assignedStaffIdRaw) : null;
   if (assignedStaffIdRaw && !assignedStaffId) return res.status(400).json({ error: 'invalid_assigned_staff' });
 
-  const created = await prisma.task.create({
-    data: {
-      organizationId: req.auth!.organizationId,
-      hotelId,
-      category: 'INCIDENT',
-      status,
-      type,
-      priority,
-      description,
-      assignedStaffId: assignedStaffId || undefined,
-      locations: { create: [{ label: room }] },
-      events: {
-        create: [
-          {
-            action: 'CREATED',
-            actorRole: String(req.body?.actorRole || 'hotel_manager').trim() || 'hotel_manager',
-            actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId).trim() : undefined,
-            note: description || room
-          }
-        ]
-      }
-    },
-    include: { locations: true, events: { orderBy: { at: 'asc' } }, attachments: { orderBy: { at: 'asc' } } }
+  const created = await withChangeLog(async (tx, changes) => {
+    const row = await tx.task.create({
+      data: {
+        ...withLegacyId({}),
+        organizationId: req.auth!.organizationId,
+        hotelId,
+        category: 'INCIDENT',
+        status,
+        type,
+        priority,
+        description,
+        assignedStaffId: assignedStaffId || undefined,
+        locations: { create: [{ label: room }] },
+        events: {
+          create: [
+            {
+              action: 'CREATED',
+              actorRole: String(req.body?.actorRole || 'hotel_manager').trim() || 'hotel_manager',
+              actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId).trim() : undefined,
+              note: description || room
+            }
+          ]
+        }
+      },
+      include: { locations: true, events: { orderBy: { at: 'asc' } }, attachments: { orderBy: { at: 'asc' } } }
+    });
+    recordChange(changes, req.auth!.organizationId, hotelId, 'task', row.id);
+    return row;
   });
-
   res.status(201).json({ incident: incidentShape(created) });
 });
 
@@ -154,12 +160,15 @@ router.patch('/incidents/:incidentId', requireAuth, async (req: AuthedRequest, r
     }
   }
 
-  const updated = await prisma.task.update({
-    where: { id: incidentId },
-    data: patch,
-    include: { locations: true, events: { orderBy: { at: 'asc' } }, attachments: { orderBy: { at: 'asc' } } }
+  const updated = await withChangeLog(async (tx, changes) => {
+    const row = await tx.task.update({
+      where: { id: incidentId },
+      data: patch,
+      include: { locations: true, events: { orderBy: { at: 'asc' } }, attachments: { orderBy: { at: 'asc' } } }
+    });
+    recordChange(changes, req.auth!.organizationId, task.hotelId, 'task', task.id);
+    return row;
   });
-
   res.json({ incident: incidentShape(updated) });
 });
 
@@ -178,17 +187,20 @@ router.post('/incidents/:incidentId/events', requireAuth, async (req: AuthedRequ
   if (!task) return res.status(404).json({ error: 'incident_not_found' });
   if (!requireHotelScope(req, res, task.hotelId)) return;
 
-  const event = await prisma.taskEvent.create({
-    data: {
-      taskId: incidentId,
-      action,
-      actorRole: String(req.body?.actorRole || 'hotel_manager').trim() || 'hotel_manager',
-      actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId).trim() : undefined,
-      note: String(req.body?.note || '').trim(),
-      patch: req.body?.patch ?? undefined
-    }
+  const event = await withChangeLog(async (tx, changes) => {
+    const row = await tx.taskEvent.create({
+      data: {
+        taskId: incidentId,
+        action,
+        actorRole: String(req.body?.actorRole || 'hotel_manager').trim() || 'hotel_manager',
+        actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId).trim() : undefined,
+        note: String(req.body?.note || '').trim(),
+        patch: req.body?.patch ?? undefined
+      }
+    });
+    recordChange(changes, req.auth!.organizationId, task.hotelId, 'task', task.id);
+    return row;
   });
-
   res.status(201).json({ event });
 });
 
@@ -2,12 +2,33 @@ import { Router, type Response } from 'express';
 import { getPrisma } from '../db';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireRole } from '../auth/roles';
-import { exportLocalStorage, importLocalStorage } from '../migration/localStorage';
+import {
+  beginImport,
+  exportLocalStorage,
+  exportRecords,
+  finishImport,
+  importLocalStorage,
+  importRecord
+} from '../migration/localStorage';
+import { NdjsonError, isNdjsonBody, readNdjson, wantsNdjson, writeNdjson } from '../migration/ndjson';
 
 const router = Router();
 
 router.get('/migration/localstorage/export', requireAuth, async (req: AuthedRequest, res: Response) => {
   const prisma = getPrisma();
+
+  // Streaming variant: `?format=ndjson` or `Accept: application/x-ndjson` (one record per line).
+  if (wantsNdjson(req)) {
+    try {
+      await writeNdjson(res, exportRecords(prisma, req.auth!.organizationId, req.auth!.userId));
+    } catch (err) {
+      console.error('[migration] ndjson export failed:', err);
+      if (!res.headersSent) return res.status(500).json({ error: 'export_failed' });
+      res.destroy();
+    }
+    return;
+  }
+
   const payload = await exportLocalStorage(prisma, req.auth!.organizationId, req.auth!.userId);
   res.json({ data: payload });
 });
@@ -18,6 +39,27 @@ router.post(
   requireRole(['SUPER_ADMIN', 'HOTEL_ADMIN', 'MANAGER']),
   async (req: AuthedRequest, res: Response) => {
     const prisma = getPrisma();
+
+    // NDJSON bodies are not consumed by express.json, so they bypass its size limit
+    // and are imported record by record as they arrive.
+    if (isNdjsonBody(req)) {
+      const session = await beginImport(prisma, req.auth!.organizationId, req.auth!.userId);
+      try {
+        for await (const record of readNdjson(req)) {
+          await importRecord(session, record);
+        }
+      } catch (err) {
+        if (err instanceof NdjsonError) {
+          // Records before the bad line are kept; re-running the import is idempotent.
+          const summary = await finishImport(session);
+          return res.status(400).json({ error: err.code, line: err.line, summary });
+        }
+        throw err;
+      }
+      const summary = await finishImport(session);
+      return res.json({ ok: true, summary });
+    }
+
     const summary = await importLocalStorage(prisma, req.auth!.organizationId, req.auth!.userId, req.body);
     res.json({ ok: true, summary });
   }
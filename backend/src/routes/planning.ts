@@ -1,12 +1,23 @@
 import { Router, type Response } from 'express';
 import { randomBytes } from 'crypto';
-import { getPrisma } from '../db';
+import { getPrisma, type DbClient } from '../db';
+import { publicRateLimit } from '../rateLimit';
+import { withLegacyId } from '../legacyIds';
+import { recordChange, recordChanges, withChangeLog } from '../changes';
+import { idempotent } from '../idempotency';
+import { fail, memo, runOperation, type Operation } from '../operations';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireRole } from '../auth/roles';
-import { requireHotelScope } from '../auth/scope';
+import { canAccessHotel, requireHotelScope } from '../auth/scope';
 
 const router = Router();
 
+const reservationLinkLimit = publicRateLimit('reservation_token', {
+  perIp: { capacity: 20, refillPerSec: 0.5 },
+  perRoute: { capacity: 200, refillPerSec: 20 },
+  maxInflight: 32
+});
+
 function makeReservationToken(): string {
   return `resv_${randomBytes(12).toString('hex')}`;
 }
@@ -55,6 +66,78 @@ function pickReservationPatch(body: any) {
   return patch;
 }
 
+function isFullyApproved(r: { statusAdmin: string; statusHotel: string }) {
+  return r.statusAdmin === 'APPROVED' && r.statusHotel === 'APPROVED';
+}
+
+// Once both sides approve, the reserved rooms count as cleaned on the reservation date, or
+// today when that is still ahead (feeds GET /cleaning/due). Never moves `lastCleanedAt`
+// backwards. The stamp and each room's previous value are kept on the reservation so
+// revertReservedRoomsCleaned can undo it. Returns the updated room ids for the change feed.
+async function markReservedRoomsCleaned(db: DbClient, before: any, after: any): Promise<string[]> {
+  if (isFullyApproved(before) || !isFullyApproved(after)) return [];
+  const ids = (Array.isArray(after.roomIds) ? after.roomIds : []).map((v: any) => String(v || '').trim()).filter(Boolean);
+  if (!ids.length) return [];
+
+  const now = new Date();
+  const date = /^\d{4}-\d{2}-\d{2}$/.test(after.proposedDate) ? new Date(`${after.proposedDate}T00:00:00.000Z`) : now;
+  const cleanedAt = Number.isFinite(date.getTime()) && date < now ? date : now;
+
+  const rooms = await db.room.findMany({
+    where: {
+      floor: { building: { hotelId: after.hotelId } },
+      AND: [
+        { OR: [{ id: { in: ids } }, { legacyId: { in: ids } }] },
+        { OR: [{ lastCleanedAt: null }, { lastCleanedAt: { lt: cleanedAt } }] }
+      ]
+    },
+    select: { id: true, lastCleanedAt: true }
+  });
+  if (!rooms.length) return [];
+
+  const roomIds = rooms.map((r) => r.id);
+  await db.room.updateMany({ where: { id: { in: roomIds } }, data: { lastCleanedAt: cleanedAt } });
+
+  const previous: Record<string, string | null> = {};
+  for (const r of rooms) previous[r.id] = r.lastCleanedAt ? r.lastCleanedAt.toISOString() : null;
+  await db.reservation.update({
+    where: { id: after.id },
+    data: { roomsCleanedAt: cleanedAt, roomsCleanedBefore: previous }
+  });
+  return roomIds;
+}
+
+// Undoes markReservedRoomsCleaned when the reservation is cancelled or deleted. Only rooms
+// still carrying this reservation's stamp are restored (a cleaning recorded since then is
+// kept). Returns the restored room ids for the change feed.
+async function revertReservedRoomsCleaned(
+  db: DbClient,
+  reservation: { roomsCleanedAt: Date | null; roomsCleanedBefore: any }
+): Promise<string[]> {
+  const stamp = reservation.roomsCleanedAt;
+  const before = reservation.roomsCleanedBefore;
+  if (!stamp || !before || typeof before !== 'object' || Array.isArray(before)) return [];
+
+  const byPrevious = new Map<string | null, string[]>();
+  for (const [id, value] of Object.entries(before)) {
+    const previous = typeof value === 'string' ? value : null;
+    byPrevious.set(previous, [...(byPrevious.get(previous) || []), id]);
+  }
+
+  const restored: string[] = [];
+  for (const [previous, ids] of byPrevious) {
+    const rooms = await db.room.findMany({ where: { id: { in: ids }, lastCleanedAt: stamp }, select: { id: true } });
+    if (!rooms.length) continue;
+    const roomIds = rooms.map((r) => r.id);
+    await db.room.updateMany({
+      where: { id: { in: roomIds } },
+      data: { lastCleanedAt: previous === null ? null : new Date(previous) }
+    });
+    restored.push(...roomIds);
+  }
+  return restored;
+}
+
 function reservationPublicShape(r: any) {
   return {
     id: r.id,
@@ -105,96 +188,113 @@ router.get('/hotels/:hotelId/reservations', requireAuth, async (req: AuthedReque
   res.json({ reservations });
 });
 
-router.post('/hotels/:hotelId/reservations', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const hotelId = String(req.params.hotelId || '').trim();
-  if (!hotelId) return res.status(400).json({ error: 'missing_hotel_id' });
-  if (!requireHotelScope(req, res, hotelId)) return;
-
-  const prisma = getPrisma();
-  const hotel = await prisma.hotel.findFirst({
-    where: { id: hotelId, organizationId: req.auth!.organizationId },
-    select: { id: true }
-  });
-  if (!hotel) return res.status(404).json({ error: 'hotel_not_found' });
+export function createReservationOp(hotelId: string, body: any): Operation {
+  return async (ctx) => {
+    if (!hotelId) return fail(400, 'missing_hotel_id');
+    if (!canAccessHotel(ctx.req, hotelId)) return fail(403, 'forbidden_hotel_scope');
+
+    const organizationId = ctx.req.auth!.organizationId;
+    const hotel = await memo(ctx, `hotel:${hotelId}`, () =>
+      ctx.db.hotel.findFirst({ where: { id: hotelId, organizationId }, select: { id: true } })
+    );
+    if (!hotel) return fail(404, 'hotel_not_found');
+
+    const reservation = await ctx.db.reservation.create({
+      data: {
+        organizationId,
+        hotelId,
+        token: makeReservationToken(),
+        statusAdmin: 'PROPOSED',
+        statusHotel: 'PENDING',
+        roomIds: Array.isArray(body?.roomIds) ? body.roomIds : [],
+        spaceIds: Array.isArray(body?.spaceIds) ? body.spaceIds : [],
+        roomNotes: body?.roomNotes ?? {},
+        spaceNotes: body?.spaceNotes ?? {},
+        surfaceDefault: normalizeSurfaceType(body?.surfaceDefault),
+        roomSurfaceOverrides: body?.roomSurfaceOverrides ?? {},
+        notesGlobal: String(body?.notesGlobal || ''),
+        notesOrg: String(body?.notesOrg || ''),
+        durationMinutes: Number(body?.durationMinutes) || 0,
+        proposedDate: String(body?.proposedDate || ''),
+        proposedStart: String(body?.proposedStart || '')
+      }
+    });
 
-  const reservation = await prisma.reservation.create({
-    data: {
-      organizationId: req.auth!.organizationId,
-      hotelId,
-      token: makeReservationToken(),
-      statusAdmin: 'PROPOSED',
-      statusHotel: 'PENDING',
-      roomIds: Array.isArray(req.body?.roomIds) ? req.body.roomIds : [],
-      spaceIds: Array.isArray(req.body?.spaceIds) ? req.body.spaceIds : [],
-      roomNotes: req.body?.roomNotes ?? {},
-      spaceNotes: req.body?.spaceNotes ?? {},
-      surfaceDefault: normalizeSurfaceType(req.body?.surfaceDefault),
-      roomSurfaceOverrides: req.body?.roomSurfaceOverrides ?? {},
-      notesGlobal: String(req.body?.notesGlobal || ''),
-      notesOrg: String(req.body?.notesOrg || ''),
-      durationMinutes: Number(req.body?.durationMinutes) || 0,
-      proposedDate: String(req.body?.proposedDate || ''),
-      proposedStart: String(req.body?.proposedStart || '')
-    }
-  });
+    recordChange(ctx.changes, organizationId, hotelId, 'reservation', reservation.id);
+    return { status: 201, body: { reservation } };
+  };
+}
 
-  res.status(201).json({ reservation });
-});
+export function patchReservationOp(reservationId: string, body: any): Operation {
+  return async (ctx) => {
+    if (!reservationId) return fail(400, 'missing_reservation_id');
 
-router.patch('/reservations/:reservationId', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const reservationId = String(req.params.reservationId || '').trim();
-  if (!reservationId) return res.status(400).json({ error: 'missing_reservation_id' });
+    const reservation = await ctx.db.reservation.findFirst({
+      where: { id: reservationId, organizationId: ctx.req.auth!.organizationId }
+    });
+    if (!reservation) return fail(404, 'reservation_not_found');
 
-  const prisma = getPrisma();
-  const reservation = await prisma.reservation.findFirst({
-    where: { id: reservationId, organizationId: req.auth!.organizationId }
-  });
-  if (!reservation) return res.status(404).json({ error: 'reservation_not_found' });
+    if (body?.roomIds !== undefined && !Array.isArray(body.roomIds)) return fail(400, 'invalid_room_ids');
+    if (body?.spaceIds !== undefined && !Array.isArray(body.spaceIds)) return fail(400, 'invalid_space_ids');
 
-  if (req.body?.roomIds !== undefined && !Array.isArray(req.body.roomIds)) {
-    return res.status(400).json({ error: 'invalid_room_ids' });
-  }
-  if (req.body?.spaceIds !== undefined && !Array.isArray(req.body.spaceIds)) {
-    return res.status(400).json({ error: 'invalid_space_ids' });
-  }
+    const patch = pickReservationPatch(body);
+    const updated = await ctx.db.reservation.update({
+      where: { id: reservationId },
+      data: patch
+    });
 
-  const patch = pickReservationPatch(req.body);
-  const updated = await prisma.reservation.update({
-    where: { id: reservationId },
-    data: patch
-  });
+    const roomIds = await markReservedRoomsCleaned(ctx.db, reservation, updated);
+    recordChanges(ctx.changes, updated.organizationId, updated.hotelId, 'room', roomIds);
+    recordChange(ctx.changes, updated.organizationId, updated.hotelId, 'reservation', updated.id);
+    return { status: 200, body: { reservation: updated } };
+  };
+}
 
-  res.json({ reservation: updated });
-});
+export function cancelReservationOp(reservationId: string, body: any): Operation {
+  return async (ctx) => {
+    if (!reservationId) return fail(400, 'missing_reservation_id');
 
-router.post('/reservations/:reservationId/cancel', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const reservationId = String(req.params.reservationId || '').trim();
-  if (!reservationId) return res.status(400).json({ error: 'missing_reservation_id' });
+    const reservation = await ctx.db.reservation.findFirst({
+      where: { id: reservationId, organizationId: ctx.req.auth!.organizationId },
+      select: { id: true, roomsCleanedAt: true, roomsCleanedBefore: true }
+    });
+    if (!reservation) return fail(404, 'reservation_not_found');
+
+    const by = String(body?.by || 'admin').trim() || 'admin';
+    const reason = String(body?.reason || '').trim();
+    const now = new Date();
+
+    const roomIds = await revertReservedRoomsCleaned(ctx.db, reservation);
+    const updated = await ctx.db.reservation.update({
+      where: { id: reservationId },
+      data: {
+        statusAdmin: 'CANCELLED',
+        statusHotel: 'CANCELLED',
+        cancelledAt: now,
+        cancelledBy: by,
+        cancelReason: reason,
+        roomsCleanedAt: null,
+        roomsCleanedBefore: {}
+      }
+    });
 
-  const prisma = getPrisma();
-  const reservation = await prisma.reservation.findFirst({
-    where: { id: reservationId, organizationId: req.auth!.organizationId },
-    select: { id: true }
-  });
-  if (!reservation) return res.status(404).json({ error: 'reservation_not_found' });
+    recordChanges(ctx.changes, updated.organizationId, updated.hotelId, 'room', roomIds);
+    recordChange(ctx.changes, updated.organizationId, updated.hotelId, 'reservation', updated.id);
+    return { status: 200, body: { reservation: updated } };
+  };
+}
 
-  const by = String(req.body?.by || 'admin').trim() || 'admin';
-  const reason = String(req.body?.reason || '').trim();
-  const now = new Date();
+router.post('/hotels/:hotelId/reservations', requireAuth, idempotent, (req: AuthedRequest, res: Response) =>
+  runOperation(req, res, createReservationOp(String(req.params.hotelId || '').trim(), req.body))
+);
 
-  const updated = await prisma.reservation.update({
-    where: { id: reservationId },
-    data: {
-      statusAdmin: 'CANCELLED',
-      statusHotel: 'CANCELLED',
-      cancelledAt: now,
-      cancelledBy: by,
-      cancelReason: reason
-    }
-  });
+router.patch('/reservations/:reservationId', requireAuth, (req: AuthedRequest, res: Response) =>
+  runOperation(req, res, patchReservationOp(String(req.params.reservationId || '').trim(), req.body))
+);
 
-  res.json({ reservation: updated });
-});
+router.post('/reservations/:reservationId/cancel', requireAuth, (req: AuthedRequest, res: Response) =>
+  runOperation(req, res, cancelReservationOp(String(req.params.reservationId || '').trim(), req.body))
+);
 
 router.delete('/reservations/:reservationId', requireAuth, requireRole(['SUPER_ADMIN']), async (req: AuthedRequest, res: Response) => {
   const reservationId = String(req.params.reservationId || '').trim();
@@ -203,17 +303,22 @@ router.delete('/reservations/:reservationId', requireAuth, requireRole(['SUPER_A
   const prisma = getPrisma();
   const reservation = await prisma.reservation.findFirst({
     where: { id: reservationId, organizationId: req.auth!.organizationId },
-    select: { id: true }
+    select: { id: true, hotelId: true, roomsCleanedAt: true, roomsCleanedBefore: true }
   });
   if (!reservation) return res.status(404).json({ error: 'reservation_not_found' });
 
-  await prisma.reservation.delete({ where: { id: reservationId } });
+  await withChangeLog(async (tx, changes) => {
+    const roomIds = await revertReservedRoomsCleaned(tx, reservation);
+    await tx.reservation.delete({ where: { id: reservationId } });
+    recordChanges(changes, req.auth!.organizationId, reservation.hotelId, 'room', roomIds);
+    recordChange(changes, req.auth!.organizationId, reservation.hotelId, 'reservation', reservation.id, 'DELETE');
+  });
   res.json({ ok: true });
 });
 
 // ===== RESERVATIONS (token link / public) =====
 
-router.get('/reservations/by-token/:token', async (req, res: Response) => {
+router.get('/reservations/by-token/:token', reservationLinkLimit, async (req, res: Response) => {
   const token = String(req.params.token || '').trim();
   if (!token) return res.status(400).json({ error: 'missing_token' });
 
@@ -224,7 +329,7 @@ router.get('/reservations/by-token/:token', async (req, res: Response) => {
   res.json({ reservation: reservationPublicShape(reservation) });
 });
 
-router.patch('/reservations/by-token/:token', async (req, res: Response) => {
+router.patch('/reservations/by-token/:token', reservationLinkLimit, async (req, res: Response) => {
   const token = String(req.params.token || '').trim();
   if (!token) return res.status(400).json({ error: 'missing_token' });
 
@@ -249,15 +354,20 @@ router.patch('/reservations/by-token/:token', async (req, res: Response) => {
     return res.status(403).json({ error: 'forbidden' });
   }
 
-  const updated = await prisma.reservation.update({
-    where: { id: reservation.id },
-    data: patch
+  const updated = await withChangeLog(async (tx, changes) => {
+    const row = await tx.reservation.update({
+      where: { id: reservation.id },
+      data: patch
+    });
+    const roomIds = await markReservedRoomsCleaned(tx, reservation, row);
+    recordChanges(changes, row.organizationId, row.hotelId, 'room', roomIds);
+    recordChange(changes, row.organizationId, row.hotelId, 'reservation', row.id);
+    return row;
   });
-
   res.json({ reservation: reservationPublicShape(updated) });
 });
 
-router.post('/reservations/by-token/:token/cancel', async (req, res: Response) => {
+router.post('/reservations/by-token/:token/cancel', reservationLinkLimit, async (req, res: Response) => {
   const token = String(req.params.token || '').trim();
   if (!token) return res.status(400).json({ error: 'missing_token' });
 
@@ -267,17 +377,24 @@ router.post('/reservations/by-token/:token/cancel', async (req, res: Response) =
 
   const reason = String(req.body?.reason || '').trim();
   const now = new Date();
-  const updated = await prisma.reservation.update({
-    where: { id: reservation.id },
-    data: {
-      statusAdmin: 'CANCELLED',
-      statusHotel: 'CANCELLED',
-      cancelledAt: now,
-      cancelledBy: 'hotel',
-      cancelReason: reason
-    }
+  const updated = await withChangeLog(async (tx, changes) => {
+    const roomIds = await revertReservedRoomsCleaned(tx, reservation);
+    const row = await tx.reservation.update({
+      where: { id: reservation.id },
+      data: {
+        statusAdmin: 'CANCELLED',
+        statusHotel: 'CANCELLED',
+        cancelledAt: now,
+        cancelledBy: 'hotel',
+        cancelReason: reason,
+        roomsCleanedAt: null,
+        roomsCleanedBefore: {}
+      }
+    });
+    recordChanges(changes, row.organizationId, row.hotelId, 'room', roomIds);
+    recordChange(changes, row.organizationId, row.hotelId, 'reservation', row.id);
+    return row;
   });
-
   res.json({ reservation: reservationPublicShape(updated) });
 });
 
@@ -315,7 +432,7 @@ router.post('/blocked-slots', requireAuth, requireRole(['SUPER_ADMIN']), async (
   }
 
   const slot = await prisma.blockedSlot.create({
-    data: { organizationId: req.auth!.organizationId, legacyId: legacyId || undefined, date, start, end, note }
+    data: withLegacyId({ organizationId: req.auth!.organizationId, legacyId: legacyId || undefined, date, start, end, note })
   });
   return res.status(201).json({ blockedSlot: slot });
 });
@@ -368,7 +485,7 @@ router.post('/technicians', requireAuth, requireRole(['SUPER_ADMIN']), async (re
   }
 
   const technician = await prisma.technician.create({
-    data: { organizationId: req.auth!.organizationId, legacyId: legacyId || undefined, name, phone, notes, active: true }
+    data: withLegacyId({ organizationId: req.auth!.organizationId, legacyId: legacyId || undefined, name, phone, notes, active: true })
   });
   return res.status(201).json({ technician });
 });
@@ -463,34 +580,41 @@ router.post('/hotels/:hotelId/sessions', requireAuth, requireRole(['SUPER_ADMIN'
       where: { organizationId_legacyId: { organizationId: req.auth!.organizationId, legacyId } }
     });
     if (existing) {
-      const updated = await prisma.session.update({
-        where: { id: existing.id },
-        data: {
-          hotelId,
-          roomIds,
-          date,
-          start,
-          end,
-          technicianId: technicianId || null
-        }
+      const updated = await withChangeLog(async (tx, changes) => {
+        const row = await tx.session.update({
+          where: { id: existing.id },
+          data: {
+            hotelId,
+            roomIds,
+            date,
+            start,
+            end,
+            technicianId: technicianId || null
+          }
+        });
+        recordChange(changes, req.auth!.organizationId, hotelId, 'session', row.id);
+        return row;
       });
       return res.json({ session: updated });
     }
   }
 
-  const session = await prisma.session.create({
-    data: {
-      organizationId: req.auth!.organizationId,
-      legacyId: legacyId || undefined,
-      hotelId,
-      roomIds,
-      date,
-      start,
-      end,
-      technicianId: technicianId || undefined
-    }
+  const session = await withChangeLog(async (tx, changes) => {
+    const row = await tx.session.create({
+      data: withLegacyId({
+        organizationId: req.auth!.organizationId,
+        legacyId: legacyId || undefined,
+        hotelId,
+        roomIds,
+        date,
+        start,
+        end,
+        technicianId: technicianId || undefined
+      })
+    });
+    recordChange(changes, req.auth!.organizationId, hotelId, 'session', row.id);
+    return row;
   });
-
   return res.status(201).json({ session });
 });
 
@@ -512,7 +636,10 @@ router.delete('/hotels/:hotelId/sessions/:sessionId', requireAuth, requireRole([
   });
   if (!session) return res.status(404).json({ error: 'session_not_found' });
 
-  await prisma.session.delete({ where: { id: session.id } });
+  await withChangeLog(async (tx, changes) => {
+    await tx.session.delete({ where: { id: session.id } });
+    recordChange(changes, req.auth!.organizationId, hotelId, 'session', session.id, 'DELETE');
+  });
   return res.json({ ok: true });
 });
 
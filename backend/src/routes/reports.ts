@@ -2,6 +2,7 @@ import { Router, type Response } from 'express';
 import { getPrisma } from '../db';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireHotelScope } from '../auth/scope';
+import { compileSerializer, sendSerialized } from '../serializers';
 
 const router = Router();
 
@@ -34,6 +35,68 @@ function initBuckets() {
   return { CARPET: 0, TILE: 0, BOTH: 0 };
 }
 
+const serializeRoadmap = compileSerializer<{ hotelId: string; date: string; reservations: any[] }>({
+  type: 'object',
+  properties: {
+    hotelId: { type: 'string' },
+    date: { type: 'string' },
+    reservations: {
+      type: 'array',
+      items: {
+        type: 'object',
+        properties: {
+          id: { type: 'string' },
+          token: { type: 'string' },
+          proposedStart: { type: 'string' },
+          durationMinutes: { type: 'number' },
+          notesGlobal: { type: 'string' },
+          notesOrg: { type: 'string' },
+          rooms: {
+            type: 'array',
+            items: {
+              type: 'object',
+              properties: {
+                id: { type: 'string' },
+                roomNumber: { type: 'string' },
+                sqft: { type: 'number', nullable: true },
+                surface: { type: 'string' },
+                note: { type: 'string' }
+              }
+            }
+          },
+          spaces: {
+            type: 'array',
+            items: {
+              type: 'object',
+              properties: {
+                id: { type: 'string' },
+                name: { type: 'string' },
+                type: { type: 'string' },
+                sqft: { type: 'number', nullable: true },
+                note: { type: 'string' }
+              }
+            }
+          },
+          tasks: {
+            type: 'array',
+            items: {
+              type: 'object',
+              properties: {
+                id: { type: 'string' },
+                status: { type: 'string' },
+                priority: { type: 'string' },
+                type: { type: 'string' },
+                description: { type: 'string' },
+                assignedStaffId: { type: 'string', nullable: true }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+});
+
 router.get('/reports/annual', requireAuth, async (req: AuthedRequest, res: Response) => {
   const hotelId = String(req.query.hotelId || '').trim();
   const year = normalizeYear(req.query.year);
@@ -55,7 +118,7 @@ router.get('/reports/annual', requireAuth, async (req: AuthedRequest, res: Respo
       statusAdmin: 'APPROVED',
       statusHotel: 'APPROVED'
     },
-    orderBy: [{ proposedDate: 'asc' }, { createdAt: 'asc' }]
+    orderBy: [{ proposedDate: 'asc' }, { proposedStart: 'asc' }, { createdAt: 'asc' }]
   });
 
   const totals = initBuckets();
@@ -223,7 +286,7 @@ router.get('/reports/roadmap', requireAuth, async (req: AuthedRequest, res: Resp
     };
   });
 
-  res.json({
+  sendSerialized(res, serializeRoadmap, {
     hotelId,
     date,
     reservations: items
@@ -0,0 +1,149 @@
+import { Router, type Response } from 'express';
+import { Prisma } from '@prisma/client';
+import { getPrisma } from '../db';
+import { requireAuth, type AuthedRequest } from '../auth/middleware';
+import { getHotelScopeId, requireHotelScope } from '../auth/scope';
+
+const router = Router();
+
+const MIN_QUERY_CHARS = 2;
+const MAX_QUERY_CHARS = 100;
+const MAX_OFFSET = 1000;
+
+// Searched expressions; each must match a trigram index of migration 20260117170000_search_trigram.
+const ROOM_TEXT = Prisma.sql`(r."roomNumber" || ' ' || r."notes")`;
+const QUOTE_TEXT = Prisma.sql`(qu."title" || ' ' || COALESCE(qu."customer"->>'company', '') || ' ' || COALESCE(qu."customer"->>'contact', ''))`;
+
+type SearchRow = {
+  type: 'task' | 'incident' | 'room' | 'quote';
+  id: string;
+  hotelId: string | null;
+  title: string;
+  snippet: string;
+  field: string;
+  score: number;
+};
+
+function escapeLike(v: string) {
+  return v.replace(/[\\%_]/g, (c) => `\\${c}`);
+}
+
+function parseIntParam(value: any, fallback: number, min: number, max: number): number | null {
+  if (value === undefined || value === '') return fallback;
+  const n = Number(value);
+  if (!Number.isInteger(n) || n < min || n > max) return null;
+  return n;
+}
+
+function matches(text: Prisma.Sql, q: string, pattern: string) {
+  return Prisma.sql`(${text} ILIKE ${pattern} OR ${q} <% ${text})`;
+}
+
+// `GET /search?q=&hotelId=&types=task,incident,room,quote&limit=20&offset=0`
+// Substring or fuzzy (trigram word similarity) matches, best first. Tasks matching through
+// an event note are returned once, with the best-scoring field as snippet. Quotes are
+// organization-level and only searched across all hotels (SUPER_ADMIN without `hotelId`).
+router.get('/search', requireAuth, async (req: AuthedRequest, res: Response) => {
+  const q = String(req.query.q || '').trim();
+  if (q.length < MIN_QUERY_CHARS) return res.status(400).json({ error: 'query_too_short' });
+  if (q.length > MAX_QUERY_CHARS) return res.status(400).json({ error: 'query_too_long' });
+
+  let hotelId = String(req.query.hotelId || '').trim() || null;
+  if (hotelId) {
+    if (!requireHotelScope(req, res, hotelId)) return;
+  } else {
+    hotelId = getHotelScopeId(req);
+    if (!hotelId && req.auth!.role !== 'SUPER_ADMIN') return res.status(403).json({ error: 'forbidden_hotel_scope' });
+  }
+
+  const limit = parseIntParam(req.query.limit, 20, 1, 100);
+  if (limit === null) return res.status(400).json({ error: 'invalid_limit' });
+  const offset = parseIntParam(req.query.offset, 0, 0, MAX_OFFSET);
+  if (offset === null) return res.status(400).json({ error: 'invalid_offset' });
+
+  const allTypes = ['task', 'incident', 'room', 'quote'];
+  const typesRaw = String(req.query.types || '').trim();
+  const types = new Set(typesRaw ? typesRaw.split(',').map((t) => t.trim().toLowerCase()) : allTypes);
+  if (Array.from(types).some((t) => !allTypes.includes(t))) return res.status(400).json({ error: 'invalid_types' });
+  if (hotelId) types.delete('quote');
+
+  const orgId = req.auth!.organizationId;
+  const pattern = `%${escapeLike(q)}%`;
+  const hotelFilter = (column: Prisma.Sql) => (hotelId ? Prisma.sql`AND ${column} = ${hotelId}` : Prisma.empty);
+
+  const parts: Prisma.Sql[] = [];
+  if (types.has('task') || types.has('incident')) {
+    const categories = [types.has('task') ? 'TASK' : null, types.has('incident') ? 'INCIDENT' : null].filter(Boolean) as string[];
+    parts.push(Prisma.sql`
+      SELECT DISTINCT ON (h."id")
+        CASE WHEN h."category" = 'INCIDENT' THEN 'incident' ELSE 'task' END AS "type",
+        h."id", h."hotelId", h."description" AS "title", h."text" AS "snippet", h."field", h."score"
+      FROM (
+        SELECT t."id", t."hotelId", t."category"::text AS "category", t."description", t."description" AS "text",
+          'description' AS "field", word_similarity(${q}, t."description") AS "score"
+        FROM "Task" t
+        WHERE t."organizationId" = ${orgId} ${hotelFilter(Prisma.sql`t."hotelId"`)}
+          AND t."category"::text IN (${Prisma.join(categories)})
+          AND ${matches(Prisma.sql`t."description"`, q, pattern)}
+        UNION ALL
+        SELECT t."id", t."hotelId", t."category"::text, t."description", e."note",
+          'note', word_similarity(${q}, e."note")
+        FROM "TaskEvent" e
+        JOIN "Task" t ON t."id" = e."taskId"
+        WHERE t."organizationId" = ${orgId} ${hotelFilter(Prisma.sql`t."hotelId"`)}
+          AND t."category"::text IN (${Prisma.join(categories)})
+          AND e."note" <> ''
+          AND ${matches(Prisma.sql`e."note"`, q, pattern)}
+      ) h
+      ORDER BY h."id", h."score" DESC
+    `);
+  }
+  if (types.has('room')) {
+    parts.push(Prisma.sql`
+      SELECT 'room' AS "type", r."id", b."hotelId", r."roomNumber" AS "title", r."notes" AS "snippet",
+        'room' AS "field", word_similarity(${q}, ${ROOM_TEXT}) AS "score"
+      FROM "Room" r
+      JOIN "Floor" f ON f."id" = r."floorId"
+      JOIN "Building" b ON b."id" = f."buildingId"
+      JOIN "Hotel" ho ON ho."id" = b."hotelId"
+      WHERE ho."organizationId" = ${orgId} ${hotelFilter(Prisma.sql`b."hotelId"`)}
+        AND ${matches(ROOM_TEXT, q, pattern)}
+    `);
+  }
+  if (types.has('quote')) {
+    parts.push(Prisma.sql`
+      SELECT 'quote' AS "type", qu."id", NULL::text AS "hotelId", qu."title",
+        COALESCE(qu."customer"->>'company', '') AS "snippet", 'quote' AS "field",
+        word_similarity(${q}, ${QUOTE_TEXT}) AS "score"
+      FROM "Quote" qu
+      WHERE qu."organizationId" = ${orgId}
+        AND ${matches(QUOTE_TEXT, q, pattern)}
+    `);
+  }
+  if (!parts.length) return res.json({ results: [], hasMore: false });
+
+  const prisma = getPrisma();
+  const rows = await prisma.$queryRaw<SearchRow[]>`
+    SELECT * FROM (${Prisma.join(
+      parts.map((p) => Prisma.sql`(${p})`),
+      ' UNION ALL '
+    )}) s
+    ORDER BY s."score" DESC, s."type", s."id"
+    LIMIT ${limit + 1} OFFSET ${offset}
+  `;
+
+  const hasMore = rows.length > limit;
+  const results = (hasMore ? rows.slice(0, limit) : rows).map((r) => ({
+    type: r.type,
+    id: r.id,
+    hotelId: r.hotelId,
+    title: r.title,
+    snippet: r.snippet,
+    field: r.field,
+    score: Number(r.score)
+  }));
+
+  res.json({ results, hasMore });
+});
+
+export default router;
@@ -1,6 +1,7 @@
 import { Router, type Response } from 'express';
 import { randomBytes } from 'crypto';
 import { getPrisma } from '../db';
+import { withLegacyId } from '../legacyIds';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireRole } from '../auth/roles';
 import { requireHotelScope } from '../auth/scope';
@@ -72,7 +73,7 @@ router.post(
     if (!hotel) return res.status(404).json({ error: 'hotel_not_found' });
 
     const member = await prisma.staffMember.create({
-      data: {
+      data: withLegacyId({
         token: makeStaffToken(),
         organizationId: req.auth!.organizationId,
         hotelId,
@@ -81,7 +82,7 @@ router.post(
         phone,
         notes,
         active: true
-      },
+      }),
       select: {
         id: true,
         token: true,
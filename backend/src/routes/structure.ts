@@ -1,8 +1,11 @@
 import { Router, type Response } from 'express';
-import { getPrisma } from '../db';
+import { getPrisma, type DbClient } from '../db';
+import { withLegacyId } from '../legacyIds';
+import { recordChange, recordChanges, withChangeLog, type PendingChange } from '../changes';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireRole } from '../auth/roles';
 import { requireHotelScope } from '../auth/scope';
+import { compileSerializer, sendSerialized } from '../serializers';
 
 const router = Router();
 
@@ -36,6 +39,85 @@ function parseOptionalDate(value: any): Date | undefined {
   return d;
 }
 
+const serializeStructure = compileSerializer<{ buildings: any[] }>({
+  type: 'object',
+  properties: {
+    buildings: {
+      type: 'array',
+      items: {
+        type: 'object',
+        properties: {
+          id: { type: 'string' },
+          name: { type: 'string' },
+          notes: { type: 'string' },
+          floors: {
+            type: 'array',
+            items: {
+              type: 'object',
+              properties: {
+                id: { type: 'string' },
+                nameOrNumber: { type: 'string' },
+                sortOrder: { type: 'number', nullable: true },
+                notes: { type: 'string' },
+                rooms: {
+                  type: 'array',
+                  items: {
+                    type: 'object',
+                    properties: {
+                      id: { type: 'string' },
+                      roomNumber: { type: 'string' },
+                      active: { type: 'boolean' },
+                      surface: { type: 'string' },
+                      sqft: { type: 'number', nullable: true },
+                      cleaningFrequency: { type: 'number', nullable: true },
+                      lastCleaned: { type: 'number', nullable: true },
+                      notes: { type: 'string' }
+                    }
+                  }
+                },
+                spaces: {
+                  type: 'array',
+                  items: {
+                    type: 'object',
+                    properties: {
+                      id: { type: 'string' },
+                      name: { type: 'string' },
+                      type: { type: 'string' },
+                      active: { type: 'boolean' },
+                      sqft: { type: 'number', nullable: true },
+                      cleaningFrequency: { type: 'number', nullable: true }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+});
+
+// Deleting a building or floor cascades in the database; the change feed gets a tombstone for
+// every removed floor, room and space too, so clients applying it don't keep orphans.
+async function loadFloorChildren(db: DbClient, floorIds: string[]) {
+  const rooms = await db.room.findMany({ where: { floorId: { in: floorIds } }, select: { id: true } });
+  const spaces = await db.space.findMany({ where: { floorId: { in: floorIds } }, select: { id: true } });
+  return { roomIds: rooms.map((r) => r.id), spaceIds: spaces.map((s) => s.id) };
+}
+
+function recordFloorTombstones(
+  changes: PendingChange[],
+  organizationId: string,
+  hotelId: string,
+  floorIds: string[],
+  children: { roomIds: string[]; spaceIds: string[] }
+) {
+  recordChanges(changes, organizationId, hotelId, 'room', children.roomIds, 'DELETE');
+  recordChanges(changes, organizationId, hotelId, 'space', children.spaceIds, 'DELETE');
+  recordChanges(changes, organizationId, hotelId, 'floor', floorIds, 'DELETE');
+}
+
 async function requireHotelInOrg(organizationId: string, hotelId: string) {
   const prisma = getPrisma();
   const hotel = await prisma.hotel.findFirst({
@@ -116,7 +198,7 @@ router.get('/hotels/:hotelId/structure', requireAuth, async (req: AuthedRequest,
     }))
   }));
 
-  res.json({ buildings: payload });
+  sendSerialized(res, serializeStructure, { buildings: payload });
 });
 
 router.post(
@@ -135,9 +217,13 @@ router.post(
     if (!ok) return res.status(404).json({ error: 'hotel_not_found' });
 
     const prisma = getPrisma();
-    const building = await prisma.building.create({
-      data: { hotelId, name, notes },
-      select: { id: true, name: true, notes: true, createdAt: true, updatedAt: true }
+    const building = await withChangeLog(async (tx, changes) => {
+      const row = await tx.building.create({
+        data: withLegacyId({ hotelId, name, notes }),
+        select: { id: true, name: true, notes: true, createdAt: true, updatedAt: true }
+      });
+      recordChange(changes, req.auth!.organizationId, hotelId, 'row', row.id);
+      return row;
     });
     res.status(201).json({ building });
   }
@@ -157,14 +243,18 @@ router.patch(
     const prisma = getPrisma();
     const building = await prisma.building.findFirst({
       where: { id: buildingId, hotel: { organizationId: req.auth!.organizationId } },
-      select: { id: true }
+      select: { id: true, hotelId: true }
     });
     if (!building) return res.status(404).json({ error: 'building_not_found' });
 
-    const updated = await prisma.building.update({
-      where: { id: buildingId },
-      data: { ...(name !== undefined ? { name } : {}), ...(notes !== undefined ? { notes } : {}) },
-      select: { id: true, name: true, notes: true, createdAt: true, updatedAt: true }
+    const updated = await withChangeLog(async (tx, changes) => {
+      const row = await tx.building.update({
+        where: { id: buildingId },
+        data: { ...(name !== undefined ? { name } : {}), ...(notes !== undefined ? { notes } : {}) },
+        select: { id: true, name: true, notes: true, createdAt: true, updatedAt: true }
+      });
+      recordChange(changes, req.auth!.organizationId, building.hotelId, 'building', building.id);
+      return row;
     });
     res.json({ building: updated });
   }
@@ -181,11 +271,18 @@ router.delete(
     const prisma = getPrisma();
     const building = await prisma.building.findFirst({
       where: { id: buildingId, hotel: { organizationId: req.auth!.organizationId } },
-      select: { id: true }
+      select: { id: true, hotelId: true }
     });
     if (!building) return res.status(404).json({ error: 'building_not_found' });
 
-    await prisma.building.delete({ where: { id: buildingId } });
+    await withChangeLog(async (tx, changes) => {
+      const floorIds = (await tx.floor.findMany({ where: { buildingId }, select: { id: true } })).map((f) => f.id);
+      const children = await loadFloorChildren(tx, floorIds);
+
+      await tx.building.delete({ where: { id: buildingId } });
+      recordFloorTombstones(changes, req.auth!.organizationId, building.hotelId, floorIds, children);
+      recordChange(changes, req.auth!.organizationId, building.hotelId, 'building', building.id, 'DELETE');
+    });
     res.json({ ok: true });
   }
 );
@@ -225,13 +322,22 @@ router.post(
     const prisma = getPrisma();
     const building = await prisma.building.findFirst({
       where: { id: buildingId, hotel: { organizationId: req.auth!.organizationId } },
-      select: { id: true }
+      select: { id: true, hotelId: true }
     });
     if (!building) return res.status(404).json({ error: 'building_not_found' });
 
-    const floor = await prisma.floor.create({
-      data: { buildingId, nameOrNumber, ...(sortOrder !== undefined ? { sortOrder } : {}), ...(notes !== undefined ? { notes } : {}) },
-      select: { id: true, nameOrNumber: true, sortOrder: true, notes: true, createdAt: true, updatedAt: true }
+    const floor = await withChangeLog(async (tx, changes) => {
+      const row = await tx.floor.create({
+        data: withLegacyId({
+          buildingId,
+          nameOrNumber,
+          ...(sortOrder !== undefined ? { sortOrder } : {}),
+          ...(notes !== undefined ? { notes } : {})
+        }),
+        select: { id: true, nameOrNumber: true, sortOrder: true, notes: true, createdAt: true, updatedAt: true }
+      });
+      recordChange(changes, req.auth!.organizationId, building.hotelId, 'row', row.id);
+      return row;
     });
     res.status(201).json({ floor });
   }
@@ -253,18 +359,22 @@ router.patch(
     const prisma = getPrisma();
     const floor = await prisma.floor.findFirst({
       where: { id: floorId, building: { hotel: { organizationId: req.auth!.organizationId } } },
-      select: { id: true }
+      select: { id: true, building: { select: { hotelId: true } } }
     });
     if (!floor) return res.status(404).json({ error: 'floor_not_found' });
 
-    const updated = await prisma.floor.update({
-      where: { id: floorId },
-      data: {
-        ...(nameOrNumber !== undefined ? { nameOrNumber } : {}),
-        ...(sortOrder !== undefined ? { sortOrder } : {}),
-        ...(notes !== undefined ? { notes } : {})
-      },
-      select: { id: true, nameOrNumber: true, sortOrder: true, notes: true, createdAt: true, updatedAt: true }
+    const updated = await withChangeLog(async (tx, changes) => {
+      const row = await tx.floor.update({
+        where: { id: floorId },
+        data: {
+          ...(nameOrNumber !== undefined ? { nameOrNumber } : {}),
+          ...(sortOrder !== undefined ? { sortOrder } : {}),
+          ...(notes !== undefined ? { notes } : {})
+        },
+        select: { id: true, nameOrNumber: true, sortOrder: true, notes: true, createdAt: true, updatedAt: true }
+      });
+      recordChange(changes, req.auth!.organizationId, floor.building.hotelId, 'floor', floor.id);
+      return row;
     });
     res.json({ floor: updated });
   }
@@ -281,11 +391,16 @@ router.delete(
     const prisma = getPrisma();
     const floor = await prisma.floor.findFirst({
       where: { id: floorId, building: { hotel: { organizationId: req.auth!.organizationId } } },
-      select: { id: true }
+      select: { id: true, building: { select: { hotelId: true } } }
     });
     if (!floor) return res.status(404).json({ error: 'floor_not_found' });
 
-    await prisma.floor.delete({ where: { id: floorId } });
+    await withChangeLog(async (tx, changes) => {
+      const children = await loadFloorChildren(tx, [floor.id]);
+
+      await tx.floor.delete({ where: { id: floorId } });
+      recordFloorTombstones(changes, req.auth!.organizationId, floor.building.hotelId, [floor.id], children);
+    });
     res.json({ ok: true });
   }
 );
@@ -357,32 +472,36 @@ router.post(
     const prisma = getPrisma();
     const floor = await prisma.floor.findFirst({
       where: { id: floorId, building: { hotel: { organizationId: req.auth!.organizationId } } },
-      select: { id: true }
+      select: { id: true, building: { select: { hotelId: true } } }
     });
     if (!floor) return res.status(404).json({ error: 'floor_not_found' });
 
-    const room = await prisma.room.create({
-      data: {
-        floorId,
-        roomNumber,
-        surface: surface as any,
-        sqft: sqft === null ? undefined : sqft,
-        ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {}),
-        ...(lastCleanedAt !== undefined ? { lastCleanedAt } : {}),
-        ...(notes !== undefined ? { notes } : {})
-      },
-      select: {
-        id: true,
-        roomNumber: true,
-        active: true,
-        surface: true,
-        sqft: true,
-        cleaningFrequencyDays: true,
-        lastCleanedAt: true,
-        notes: true,
-        createdAt: true,
-        updatedAt: true
-      }
+    const room = await withChangeLog(async (tx, changes) => {
+      const row = await tx.room.create({
+        data: withLegacyId({
+          floorId,
+          roomNumber,
+          surface: surface as any,
+          sqft: sqft === null ? undefined : sqft,
+          ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {}),
+          ...(lastCleanedAt !== undefined ? { lastCleanedAt } : {}),
+          ...(notes !== undefined ? { notes } : {})
+        }),
+        select: {
+          id: true,
+          roomNumber: true,
+          active: true,
+          surface: true,
+          sqft: true,
+          cleaningFrequencyDays: true,
+          lastCleanedAt: true,
+          notes: true,
+          createdAt: true,
+          updatedAt: true
+        }
+      });
+      recordChange(changes, req.auth!.organizationId, floor.building.hotelId, 'row', row.id);
+      return row;
     });
     res.status(201).json({
       room: {
@@ -427,13 +546,13 @@ router.post(
     const prisma = getPrisma();
     const floor = await prisma.floor.findFirst({
       where: { id: floorId, building: { hotel: { organizationId: req.auth!.organizationId } } },
-      select: { id: true }
+      select: { id: true, building: { select: { hotelId: true } } }
     });
     if (!floor) return res.status(404).json({ error: 'floor_not_found' });
 
     const rooms = Array.from({ length: count }, (_, i) => {
       const roomNumber = `${prefix}${start + i}`;
-      return {
+      return withLegacyId({
         floorId,
         roomNumber,
         surface: surface as any,
@@ -441,15 +560,24 @@ router.post(
         ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {}),
         ...(lastCleanedAt !== undefined ? { lastCleanedAt } : {}),
         ...(notes !== undefined ? { notes } : {})
-      };
+      });
     });
 
     // Skip duplicates quietly for now (idempotent-ish import)
-    const result = await prisma.room.createMany({
-      data: rooms,
-      skipDuplicates: true
+    const result = await withChangeLog(async (tx, changes) => {
+      const row = await tx.room.createMany({
+        data: rooms,
+        skipDuplicates: true
+      });
+      recordChanges(
+        changes,
+        req.auth!.organizationId,
+        floor.building.hotelId,
+        'room',
+        rooms.map((r) => r.id)
+      );
+      return row;
     });
-
     res.status(201).json({ createdCount: result.count });
   }
 );
@@ -481,33 +609,37 @@ router.patch(
     const prisma = getPrisma();
     const room = await prisma.room.findFirst({
       where: { id: roomId, floor: { building: { hotel: { organizationId: req.auth!.organizationId } } } },
-      select: { id: true }
+      select: { id: true, floor: { select: { building: { select: { hotelId: true } } } } }
     });
     if (!room) return res.status(404).json({ error: 'room_not_found' });
 
-    const updated = await prisma.room.update({
-      where: { id: roomId },
-      data: {
-        ...(roomNumber !== undefined ? { roomNumber } : {}),
-        ...(active !== undefined ? { active } : {}),
-        ...(surface !== undefined ? { surface: surface as any } : {}),
-        ...(sqft !== undefined ? { sqft } : {}),
-        ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {}),
-        ...(lastCleanedAt !== undefined ? { lastCleanedAt } : {}),
-        ...(notes !== undefined ? { notes } : {})
-      },
-      select: {
-        id: true,
-        roomNumber: true,
-        active: true,
-        surface: true,
-        sqft: true,
-        cleaningFrequencyDays: true,
-        lastCleanedAt: true,
-        notes: true,
-        createdAt: true,
-        updatedAt: true
-      }
+    const updated = await withChangeLog(async (tx, changes) => {
+      const row = await tx.room.update({
+        where: { id: roomId },
+        data: {
+          ...(roomNumber !== undefined ? { roomNumber } : {}),
+          ...(active !== undefined ? { active } : {}),
+          ...(surface !== undefined ? { surface: surface as any } : {}),
+          ...(sqft !== undefined ? { sqft } : {}),
+          ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {}),
+          ...(lastCleanedAt !== undefined ? { lastCleanedAt } : {}),
+          ...(notes !== undefined ? { notes } : {})
+        },
+        select: {
+          id: true,
+          roomNumber: true,
+          active: true,
+          surface: true,
+          sqft: true,
+          cleaningFrequencyDays: true,
+          lastCleanedAt: true,
+          notes: true,
+          createdAt: true,
+          updatedAt: true
+        }
+      });
+      recordChange(changes, req.auth!.organizationId, room.floor.building.hotelId, 'room', room.id);
+      return row;
     });
 
     res.json({
@@ -538,11 +670,14 @@ router.delete(
     const prisma = getPrisma();
     const room = await prisma.room.findFirst({
       where: { id: roomId, floor: { building: { hotel: { organizationId: req.auth!.organizationId } } } },
-      select: { id: true }
+      select: { id: true, floor: { select: { building: { select: { hotelId: true } } } } }
     });
     if (!room) return res.status(404).json({ error: 'room_not_found' });
 
-    await prisma.room.delete({ where: { id: roomId } });
+    await withChangeLog(async (tx, changes) => {
+      await tx.room.delete({ where: { id: roomId } });
+      recordChange(changes, req.auth!.organizationId, room.floor.building.hotelId, 'room', room.id, 'DELETE');
+    });
     res.json({ ok: true });
   }
 );
@@ -598,19 +733,23 @@ router.post(
     const prisma = getPrisma();
     const floor = await prisma.floor.findFirst({
       where: { id: floorId, building: { hotel: { organizationId: req.auth!.organizationId } } },
-      select: { id: true }
+      select: { id: true, building: { select: { hotelId: true } } }
     });
     if (!floor) return res.status(404).json({ error: 'floor_not_found' });
 
-    const space = await prisma.space.create({
-      data: {
-        floorId,
-        name,
-        sqft: sqft === null ? undefined : sqft,
-        ...(type !== undefined ? { type } : {}),
-        ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {})
-      },
-      select: { id: true, name: true, type: true, active: true, sqft: true, cleaningFrequencyDays: true, createdAt: true, updatedAt: true }
+    const space = await withChangeLog(async (tx, changes) => {
+      const row = await tx.space.create({
+        data: withLegacyId({
+          floorId,
+          name,
+          sqft: sqft === null ? undefined : sqft,
+          ...(type !== undefined ? { type } : {}),
+          ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {})
+        }),
+        select: { id: true, name: true, type: true, active: true, sqft: true, cleaningFrequencyDays: true, createdAt: true, updatedAt: true }
+      });
+      recordChange(changes, req.auth!.organizationId, floor.building.hotelId, 'row', row.id);
+      return row;
     });
     res.status(201).json({
       space: {
@@ -650,20 +789,24 @@ router.patch(
     const prisma = getPrisma();
     const space = await prisma.space.findFirst({
       where: { id: spaceId, floor: { building: { hotel: { organizationId: req.auth!.organizationId } } } },
-      select: { id: true }
+      select: { id: true, floor: { select: { building: { select: { hotelId: true } } } } }
     });
     if (!space) return res.status(404).json({ error: 'space_not_found' });
 
-    const updated = await prisma.space.update({
-      where: { id: spaceId },
-      data: {
-        ...(name !== undefined ? { name } : {}),
-        ...(type !== undefined ? { type } : {}),
-        ...(active !== undefined ? { active } : {}),
-        ...(sqft !== undefined ? { sqft } : {}),
-        ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {})
-      },
-      select: { id: true, name: true, type: true, active: true, sqft: true, cleaningFrequencyDays: true, createdAt: true, updatedAt: true }
+    const updated = await withChangeLog(async (tx, changes) => {
+      const row = await tx.space.update({
+        where: { id: spaceId },
+        data: {
+          ...(name !== undefined ? { name } : {}),
+          ...(type !== undefined ? { type } : {}),
+          ...(active !== undefined ? { active } : {}),
+          ...(sqft !== undefined ? { sqft } : {}),
+          ...(cleaningFrequencyDays !== undefined ? { cleaningFrequencyDays } : {})
+        },
+        select: { id: true, name: true, type: true, active: true, sqft: true, cleaningFrequencyDays: true, createdAt: true, updatedAt: true }
+      });
+      recordChange(changes, req.auth!.organizationId, space.floor.building.hotelId, 'space', space.id);
+      return row;
     });
 
     res.json({
@@ -692,11 +835,14 @@ router.delete(
     const prisma = getPrisma();
     const space = await prisma.space.findFirst({
       where: { id: spaceId, floor: { building: { hotel: { organizationId: req.auth!.organizationId } } } },
-      select: { id: true }
+      select: { id: true, floor: { select: { building: { select: { hotelId: true } } } } }
     });
     if (!space) return res.status(404).json({ error: 'space_not_found' });
 
-    await prisma.space.delete({ where: { id: spaceId } });
+    await withChangeLog(async (tx, changes) => {
+      await tx.space.delete({ where: { id: spaceId } });
+      recordChange(changes, req.auth!.organizationId, space.floor.building.hotelId, 'space', space.id, 'DELETE');
+    });
     res.json({ ok: true });
   }
 );
@@ -4,6 +4,9 @@ import sharp from 'sharp';
 import { getPrisma } from '../db';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireHotelScope } from '../auth/scope';
+import { recordChange, withChangeLog } from '../changes';
+import { idempotent } from '../idempotency';
+import { keepRequestTrace } from '../queryTrace';
 import { makeUploadKey, readUploadEnv, writeUploadFile } from '../uploads';
 import path from 'path';
 import { createReadStream } from 'fs';
@@ -32,7 +35,8 @@ function resolveUploadPath(uploadsDir: string, storagePath: string): string | nu
 router.post(
   '/tasks/:taskId/attachments',
   requireAuth,
-  upload.single('file'),
+  idempotent,
+  keepRequestTrace(upload.single('file')),
   async (req: AuthedRequest, res: Response) => {
     const taskId = String(req.params.taskId || '').trim();
     if (!taskId) return res.status(400).json({ error: 'missing_task_id' });
@@ -76,28 +80,32 @@ router.post(
         )?.id
       : undefined;
 
-    const attachment = await prisma.taskAttachment.create({
-      data: {
-        taskId,
-        name: file.originalname || 'photo',
-        mime: 'image/webp',
-        storagePath: relativePath,
-        sizeBytes: out.length,
-        width: outMeta.width || null,
-        height: outMeta.height || null,
-        actorRole: String(req.body?.actorRole || 'hotel_staff'),
-        actorStaffId
-      }
-    });
-
-    await prisma.taskEvent.create({
-      data: {
-        taskId,
-        action: 'PHOTO_ADDED',
-        actorRole: String(req.body?.actorRole || 'hotel_staff'),
-        actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId) : undefined,
-        note: attachment.name
-      }
+    const attachment = await withChangeLog(async (tx, changes) => {
+      const row = await tx.taskAttachment.create({
+        data: {
+          taskId,
+          name: file.originalname || 'photo',
+          mime: 'image/webp',
+          storagePath: relativePath,
+          sizeBytes: out.length,
+          width: outMeta.width || null,
+          height: outMeta.height || null,
+          actorRole: String(req.body?.actorRole || 'hotel_staff'),
+          actorStaffId
+        }
+      });
+
+      await tx.taskEvent.create({
+        data: {
+          taskId,
+          action: 'PHOTO_ADDED',
+          actorRole: String(req.body?.actorRole || 'hotel_staff'),
+          actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId) : undefined,
+          note: row.name
+        }
+      });
+      recordChange(changes, req.auth!.organizationId, task.hotelId, 'task', task.id);
+      return row;
     });
 
     res.status(201).json({
@@ -112,7 +120,8 @@ router.post(
 router.post(
   '/tasks/by-legacy/:legacyTaskId/attachments',
   requireAuth,
-  upload.single('file'),
+  idempotent,
+  keepRequestTrace(upload.single('file')),
   async (req: AuthedRequest, res: Response) => {
     const legacyTaskId = String(req.params.legacyTaskId || '').trim();
     if (!legacyTaskId) return res.status(400).json({ error: 'missing_task_id' });
@@ -157,28 +166,32 @@ router.post(
         )?.id
       : undefined;
 
-    const attachment = await prisma.taskAttachment.create({
-      data: {
-        taskId: task.id,
-        name: file.originalname || 'photo',
-        mime: 'image/webp',
-        storagePath: relativePath,
-        sizeBytes: out.length,
-        width: outMeta.width || null,
-        height: outMeta.height || null,
-        actorRole: String(req.body?.actorRole || 'hotel_staff'),
-        actorStaffId
-      }
-    });
-
-    await prisma.taskEvent.create({
-      data: {
-        taskId: task.id,
-        action: 'PHOTO_ADDED',
-        actorRole: String(req.body?.actorRole || 'hotel_staff'),
-        actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId) : undefined,
-        note: attachment.name
-      }
+    const attachment = await withChangeLog(async (tx, changes) => {
+      const row = await tx.taskAttachment.create({
+        data: {
+          taskId: task.id,
+          name: file.originalname || 'photo',
+          mime: 'image/webp',
+          storagePath: relativePath,
+          sizeBytes: out.length,
+          width: outMeta.width || null,
+          height: outMeta.height || null,
+          actorRole: String(req.body?.actorRole || 'hotel_staff'),
+          actorStaffId
+        }
+      });
+
+      await tx.taskEvent.create({
+        data: {
+          taskId: task.id,
+          action: 'PHOTO_ADDED',
+          actorRole: String(req.body?.actorRole || 'hotel_staff'),
+          actorStaffId: req.body?.actorStaffId ? String(req.body.actorStaffId) : undefined,
+          note: row.name
+        }
+      });
+      recordChange(changes, req.auth!.organizationId, task.hotelId, 'task', task.id);
+      return row;
     });
 
     res.status(201).json({
@@ -276,8 +289,8 @@ router.delete('/tasks/:taskId/attachments/:attachmentId', requireAuth, async (re
     }
   }
 
-  await prisma.$transaction([
-    prisma.taskEvent.create({
+  await withChangeLog(async (tx, changes) => {
+    await tx.taskEvent.create({
       data: {
         taskId,
         action: 'PHOTO_DELETED',
@@ -285,10 +298,10 @@ router.delete('/tasks/:taskId/attachments/:attachmentId', requireAuth, async (re
         note: attachment.name,
         patch: { attachmentId }
       }
-    }),
-    prisma.taskAttachment.delete({ where: { id: attachmentId } })
-  ]);
-
+    });
+    await tx.taskAttachment.delete({ where: { id: attachmentId } });
+    recordChange(changes, req.auth!.organizationId, attachment.task.hotelId, 'task', taskId);
+  });
   res.json({ ok: true });
 });
 
@@ -1,15 +1,23 @@
 import { Router, type Response } from 'express';
-import { getPrisma } from '../db';
+import { getPrisma, type DbClient } from '../db';
+import { withLegacyId } from '../legacyIds';
+import { recordChange, withChangeLog } from '../changes';
+import { idempotent } from '../idempotency';
+import { fail, memo, runOperation, type Operation, type OperationContext } from '../operations';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
-import { requireHotelScope } from '../auth/scope';
+import { canAccessHotel, requireHotelScope } from '../auth/scope';
 
 const router = Router();
 
-async function resolveStaffId(organizationId: string, hotelId: string, idOrLegacy: string): Promise<string | null> {
+async function resolveStaffId(
+  organizationId: string,
+  hotelId: string,
+  idOrLegacy: string,
+  db: DbClient = getPrisma()
+): Promise<string | null> {
   const v = String(idOrLegacy || '').trim();
   if (!v) return null;
-  const prisma = getPrisma();
-  const staff = await prisma.staffMember.findFirst({
+  const staff = await db.staffMember.findFirst({
     where: {
       organizationId,
       hotelId,
@@ -88,9 +96,8 @@ router.get('/tasks/:taskId', requireAuth, async (req: AuthedRequest, res: Respon
   res.json({ task: { ...task, attachments } });
 });
 
-async function findTaskByLegacyOrId(orgId: string, legacyOrId: string) {
-  const prisma = getPrisma();
-  return prisma.task.findFirst({
+async function findTaskByLegacyOrId(orgId: string, legacyOrId: string, db: DbClient = getPrisma()) {
+  return db.task.findFirst({
     where: {
       organizationId: orgId,
       OR: [{ legacyId: legacyOrId }, { id: legacyOrId }]
@@ -123,7 +130,7 @@ router.get('/tasks/by-legacy/:legacyTaskId', requireAuth, async (req: AuthedRequ
   res.json({ task: { ...task, attachments } });
 });
 
-router.post('/hotels/:hotelId/tasks', requireAuth, async (req: AuthedRequest, res: Response) => {
+router.post('/hotels/:hotelId/tasks', requireAuth, idempotent, async (req: AuthedRequest, res: Response) => {
   const hotelId = String(req.params.hotelId || '').trim();
   if (!hotelId) return res.status(400).json({ error: 'missing_hotel_id' });
   if (!requireHotelScope(req, res, hotelId)) return;
@@ -160,186 +167,149 @@ router.post('/hotels/:hotelId/tasks', requireAuth, async (req: AuthedRequest, re
         ? [{ label: fallbackLabel }]
         : [];
 
-  const created = await prisma.task.create({
-    data: {
-      organizationId: req.auth!.organizationId,
-      hotelId,
-      category,
-      status,
-      type,
-      priority,
-      description,
-      assignedStaffId: assignedStaffId || undefined,
-      schedule: schedule === null ? undefined : schedule,
-      locations: {
-        create: locations.map((l: any) => ({
-          label: String(l?.label || '').trim(),
-          roomId: l?.roomId ? String(l.roomId).trim() : undefined,
-          spaceId: l?.spaceId ? String(l.spaceId).trim() : undefined
-        }))
+  const created = await withChangeLog(async (tx, changes) => {
+    const row = await tx.task.create({
+      data: {
+        ...withLegacyId({}),
+        organizationId: req.auth!.organizationId,
+        hotelId,
+        category,
+        status,
+        type,
+        priority,
+        description,
+        assignedStaffId: assignedStaffId || undefined,
+        schedule: schedule === null ? undefined : schedule,
+        locations: {
+          create: locations.map((l: any) => ({
+            label: String(l?.label || '').trim(),
+            roomId: l?.roomId ? String(l.roomId).trim() : undefined,
+            spaceId: l?.spaceId ? String(l.spaceId).trim() : undefined
+          }))
+        },
+        events: {
+          create: [
+            {
+              action: 'CREATED',
+              actorRole,
+              actorStaffId: actorStaffId || undefined,
+              note: description
+            }
+          ]
+        }
       },
-      events: {
-        create: [
-          {
-            action: 'CREATED',
-            actorRole,
-            actorStaffId: actorStaffId || undefined,
-            note: description
-          }
-        ]
-      }
-    },
-    include: { locations: true, events: true, attachments: true }
+      include: { locations: true, events: true, attachments: true }
+    });
+    recordChange(changes, req.auth!.organizationId, hotelId, 'task', row.id);
+    return row;
   });
-
   res.status(201).json({ task: created });
 });
 
-router.patch('/tasks/:taskId', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const taskId = String(req.params.taskId || '').trim();
-  if (!taskId) return res.status(400).json({ error: 'missing_task_id' });
-
-  const prisma = getPrisma();
-  const task = await prisma.task.findFirst({
-    where: { id: taskId, organizationId: req.auth!.organizationId },
-    select: { id: true, hotelId: true }
-  });
-  if (!task) return res.status(404).json({ error: 'task_not_found' });
-  if (!requireHotelScope(req, res, task.hotelId)) return;
-
-  const patch: any = {};
-  if (req.body?.status !== undefined) patch.status = normalizeStatus(req.body.status);
-  if (req.body?.priority !== undefined) patch.priority = normalizePriority(req.body.priority);
-  if (req.body?.type !== undefined) patch.type = String(req.body.type || 'OTHER').trim() || 'OTHER';
-  if (req.body?.description !== undefined) patch.description = String(req.body.description || '').trim();
-  if (req.body?.assignedStaffId !== undefined) {
-    const v = req.body.assignedStaffId;
-    const raw = v ? String(v).trim() : '';
-    if (!raw) patch.assignedStaffId = null;
-    else {
-      const resolved = await resolveStaffId(req.auth!.organizationId, task.hotelId, raw);
-      if (!resolved) return res.status(400).json({ error: 'invalid_assigned_staff' });
-      patch.assignedStaffId = resolved;
-    }
-  }
-  if (req.body?.schedule !== undefined) patch.schedule = req.body.schedule;
-
-  const updated = await prisma.task.update({
-    where: { id: taskId },
-    data: patch,
-    include: { locations: true, events: { orderBy: { at: 'asc' } }, attachments: { orderBy: { at: 'asc' } } }
-  });
-
-  res.json({ task: updated });
-});
-
-router.patch('/tasks/by-legacy/:legacyTaskId', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const legacyTaskId = String(req.params.legacyTaskId || '').trim();
-  if (!legacyTaskId) return res.status(400).json({ error: 'missing_task_id' });
-
-  const task = await findTaskByLegacyOrId(req.auth!.organizationId, legacyTaskId);
-  if (!task) return res.status(404).json({ error: 'task_not_found' });
-  if (!requireHotelScope(req, res, task.hotelId)) return;
-
-  const prisma = getPrisma();
-  const patch: any = {};
-  if (req.body?.status !== undefined) patch.status = normalizeStatus(req.body.status);
-  if (req.body?.priority !== undefined) patch.priority = normalizePriority(req.body.priority);
-  if (req.body?.type !== undefined) patch.type = String(req.body.type || 'OTHER').trim() || 'OTHER';
-  if (req.body?.description !== undefined) patch.description = String(req.body.description || '').trim();
-  if (req.body?.assignedStaffId !== undefined) {
-    const v = req.body.assignedStaffId;
-    const raw = v ? String(v).trim() : '';
-    if (!raw) patch.assignedStaffId = null;
-    else {
-      const resolved = await resolveStaffId(req.auth!.organizationId, task.hotelId, raw);
-      if (!resolved) return res.status(400).json({ error: 'invalid_assigned_staff' });
-      patch.assignedStaffId = resolved;
-    }
-  }
-  if (req.body?.schedule !== undefined) patch.schedule = req.body.schedule;
-
-  const updated = await prisma.task.update({
-    where: { id: task.id },
-    data: patch,
-    include: { locations: true, events: { orderBy: { at: 'asc' } }, attachments: { orderBy: { at: 'asc' } } }
-  });
-
-  const attachments = updated.attachments.map((a) => ({
-    ...a,
-    url: a.storagePath ? `/api/v1/tasks/${updated.id}/attachments/${a.id}/file` : null
-  }));
+type TaskRef = { id: string; hotelId: string };
 
-  res.json({ task: { ...updated, attachments } });
-});
-
-router.post('/tasks/:taskId/events', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const taskId = String(req.params.taskId || '').trim();
-  if (!taskId) return res.status(400).json({ error: 'missing_task_id' });
-
-  const action = String(req.body?.action || '').trim();
-  if (!action) return res.status(400).json({ error: 'missing_action' });
+// `byLegacy`: the reference may be the legacy (localStorage) id or the db id.
+function loadTask(ctx: OperationContext, ref: string, byLegacy: boolean): Promise<TaskRef | null> {
+  const organizationId = ctx.req.auth!.organizationId;
+  return memo(ctx, `task:${byLegacy ? 'legacy' : 'id'}:${ref}`, () =>
+    byLegacy
+      ? findTaskByLegacyOrId(organizationId, ref, ctx.db)
+      : ctx.db.task.findFirst({ where: { id: ref, organizationId }, select: { id: true, hotelId: true } })
+  );
+}
 
-  const prisma = getPrisma();
-  const task = await prisma.task.findFirst({
-    where: { id: taskId, organizationId: req.auth!.organizationId },
-    select: { id: true, hotelId: true }
-  });
-  if (!task) return res.status(404).json({ error: 'task_not_found' });
-  if (!requireHotelScope(req, res, task.hotelId)) return;
+function loadStaffId(ctx: OperationContext, hotelId: string, raw: string): Promise<string | null> {
+  return memo(ctx, `staff:${hotelId}:${raw}`, () => resolveStaffId(ctx.req.auth!.organizationId, hotelId, raw, ctx.db));
+}
 
-  const actorRole = String(req.body?.actorRole || 'hotel_manager').trim() || 'hotel_manager';
-  const actorStaffIdRaw = req.body?.actorStaffId ? String(req.body.actorStaffId).trim() : null;
-  const actorStaffId = actorStaffIdRaw ? await resolveStaffId(req.auth!.organizationId, task.hotelId, actorStaffIdRaw) : null;
-  if (actorStaffIdRaw && !actorStaffId) return res.status(400).json({ error: 'invalid_actor_staff' });
-  const note = String(req.body?.note || '').trim();
-  const patch = req.body?.patch ?? null;
-
-  const event = await prisma.taskEvent.create({
-    data: {
-      taskId,
-      action,
-      actorRole,
-      actorStaffId: actorStaffId || undefined,
-      note,
-      patch: patch === null ? undefined : patch
+export function patchTaskOp(ref: string, body: any, byLegacy: boolean): Operation {
+  return async (ctx) => {
+    if (!ref) return fail(400, 'missing_task_id');
+    const task = await loadTask(ctx, ref, byLegacy);
+    if (!task) return fail(404, 'task_not_found');
+    if (!canAccessHotel(ctx.req, task.hotelId)) return fail(403, 'forbidden_hotel_scope');
+
+    const patch: any = {};
+    if (body?.status !== undefined) patch.status = normalizeStatus(body.status);
+    if (body?.priority !== undefined) patch.priority = normalizePriority(body.priority);
+    if (body?.type !== undefined) patch.type = String(body.type || 'OTHER').trim() || 'OTHER';
+    if (body?.description !== undefined) patch.description = String(body.description || '').trim();
+    if (body?.assignedStaffId !== undefined) {
+      const v = body.assignedStaffId;
+      const raw = v ? String(v).trim() : '';
+      if (!raw) patch.assignedStaffId = null;
+      else {
+        const resolved = await loadStaffId(ctx, task.hotelId, raw);
+        if (!resolved) return fail(400, 'invalid_assigned_staff');
+        patch.assignedStaffId = resolved;
+      }
     }
-  });
+    if (body?.schedule !== undefined) patch.schedule = body.schedule;
+
+    const updated = await ctx.db.task.update({
+      where: { id: task.id },
+      data: patch,
+      include: { locations: true, events: { orderBy: { at: 'asc' } }, attachments: { orderBy: { at: 'asc' } } }
+    });
+
+    recordChange(ctx.changes, ctx.req.auth!.organizationId, task.hotelId, 'task', task.id);
+    if (!byLegacy) return { status: 200, body: { task: updated } };
+
+    const attachments = updated.attachments.map((a) => ({
+      ...a,
+      url: a.storagePath ? `/api/v1/tasks/${updated.id}/attachments/${a.id}/file` : null
+    }));
+    return { status: 200, body: { task: { ...updated, attachments } } };
+  };
+}
 
-  res.status(201).json({ event });
-});
+export function addTaskEventOp(ref: string, body: any, byLegacy: boolean): Operation {
+  return async (ctx) => {
+    if (!ref) return fail(400, 'missing_task_id');
+    const action = String(body?.action || '').trim();
+    if (!action) return fail(400, 'missing_action');
+
+    const task = await loadTask(ctx, ref, byLegacy);
+    if (!task) return fail(404, 'task_not_found');
+    if (!canAccessHotel(ctx.req, task.hotelId)) return fail(403, 'forbidden_hotel_scope');
+
+    const actorRole = String(body?.actorRole || 'hotel_manager').trim() || 'hotel_manager';
+    const actorStaffIdRaw = body?.actorStaffId ? String(body.actorStaffId).trim() : null;
+    const actorStaffId = actorStaffIdRaw ? await loadStaffId(ctx, task.hotelId, actorStaffIdRaw) : null;
+    if (actorStaffIdRaw && !actorStaffId) return fail(400, 'invalid_actor_staff');
+    const note = String(body?.note || '').trim();
+    const patch = body?.patch ?? null;
+
+    const event = await ctx.db.taskEvent.create({
+      data: {
+        taskId: task.id,
+        action,
+        actorRole,
+        actorStaffId: actorStaffId || undefined,
+        note,
+        patch: patch === null ? undefined : patch
+      }
+    });
 
-router.post('/tasks/by-legacy/:legacyTaskId/events', requireAuth, async (req: AuthedRequest, res: Response) => {
-  const legacyTaskId = String(req.params.legacyTaskId || '').trim();
-  if (!legacyTaskId) return res.status(400).json({ error: 'missing_task_id' });
+    recordChange(ctx.changes, ctx.req.auth!.organizationId, task.hotelId, 'task', task.id);
+    return { status: 201, body: { event } };
+  };
+}
 
-  const action = String(req.body?.action || '').trim();
-  if (!action) return res.status(400).json({ error: 'missing_action' });
+router.patch('/tasks/:taskId', requireAuth, (req: AuthedRequest, res: Response) =>
+  runOperation(req, res, patchTaskOp(String(req.params.taskId || '').trim(), req.body, false))
+);
 
-  const task = await findTaskByLegacyOrId(req.auth!.organizationId, legacyTaskId);
-  if (!task) return res.status(404).json({ error: 'task_not_found' });
-  if (!requireHotelScope(req, res, task.hotelId)) return;
+router.patch('/tasks/by-legacy/:legacyTaskId', requireAuth, (req: AuthedRequest, res: Response) =>
+  runOperation(req, res, patchTaskOp(String(req.params.legacyTaskId || '').trim(), req.body, true))
+);
 
-  const actorRole = String(req.body?.actorRole || 'hotel_manager').trim() || 'hotel_manager';
-  const actorStaffIdRaw = req.body?.actorStaffId ? String(req.body.actorStaffId).trim() : null;
-  const actorStaffId = actorStaffIdRaw ? await resolveStaffId(req.auth!.organizationId, task.hotelId, actorStaffIdRaw) : null;
-  if (actorStaffIdRaw && !actorStaffId) return res.status(400).json({ error: 'invalid_actor_staff' });
-  const note = String(req.body?.note || '').trim();
-  const patch = req.body?.patch ?? null;
-
-  const prisma = getPrisma();
-  const event = await prisma.taskEvent.create({
-    data: {
-      taskId: task.id,
-      action,
-      actorRole,
-      actorStaffId: actorStaffId || undefined,
-      note,
-      patch: patch === null ? undefined : patch
-    }
-  });
+router.post('/tasks/:taskId/events', requireAuth, idempotent, (req: AuthedRequest, res: Response) =>
+  runOperation(req, res, addTaskEventOp(String(req.params.taskId || '').trim(), req.body, false))
+);
 
-  res.status(201).json({ event });
-});
+router.post('/tasks/by-legacy/:legacyTaskId/events', requireAuth, idempotent, (req: AuthedRequest, res: Response) =>
+  runOperation(req, res, addTaskEventOp(String(req.params.legacyTaskId || '').trim(), req.body, true))
+);
 
 export default router;
@@ -4,6 +4,8 @@ import path from 'path';
 import fs from 'fs';
 import { randomBytes } from 'crypto';
 import { getPrisma } from '../db';
+import { publicRateLimit } from '../rateLimit';
+import { keepRequestTrace } from '../queryTrace';
 import { requireAuth, type AuthedRequest } from '../auth/middleware';
 import { requireRole } from '../auth/roles';
 import { readUploadEnv } from '../uploads';
@@ -68,7 +70,7 @@ router.post(
   '/videos',
   requireAuth,
   requireRole(['SUPER_ADMIN']),
-  upload.single('file'),
+  keepRequestTrace(upload.single('file')),
   async (req: AuthedRequest, res: Response) => {
     const file = (req as any).file as Express.Multer.File | undefined;
     if (!file) return res.status(400).json({ error: 'missing_file' });
@@ -128,7 +130,19 @@ router.delete(
 
 // ===== PUBLIC (no auth) =====
 
-router.get('/public/videos', async (req, res: Response) => {
+const publicVideoListLimit = publicRateLimit('public_videos', {
+  perIp: { capacity: 30, refillPerSec: 1 },
+  perRoute: { capacity: 300, refillPerSec: 30 },
+  maxInflight: 32
+});
+// Players issue a range request per seek, and each stream stays open while it plays.
+const publicVideoFileLimit = publicRateLimit('public_video_file', {
+  perIp: { capacity: 60, refillPerSec: 2 },
+  perRoute: { capacity: 300, refillPerSec: 30 },
+  maxInflight: 64
+});
+
+router.get('/public/videos', publicVideoListLimit, async (req, res: Response) => {
   const prisma = getPrisma();
   const videos = await prisma.video.findMany({
     where: { published: true },
@@ -146,7 +160,7 @@ router.get('/public/videos', async (req, res: Response) => {
   res.json({ videos });
 });
 
-router.get('/public/videos/:videoId/file', async (req, res: Response) => {
+router.get('/public/videos/:videoId/file', publicVideoFileLimit, async (req, res: Response) => {
   const videoId = String(req.params.videoId || '').trim();
   if (!videoId) return res.status(400).json({ error: 'missing_video_id' });
 
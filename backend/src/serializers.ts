@@ -0,0 +1,61 @@
+import { type Response } from 'express';
+
+// Response schemas for the large, fixed-shape payloads. compileSerializer turns a schema into a
+// function that writes the JSON text directly (property names and separators are precomputed),
+// instead of JSON.stringify walking and type-checking every key of every object at runtime.
+export type Schema =
+  | { type: 'string' | 'number' | 'boolean'; nullable?: boolean }
+  | { type: 'object'; properties: Record<string, Schema>; nullable?: boolean }
+  | { type: 'array'; items: Schema; nullable?: boolean };
+
+type Serialize = (value: any) => string;
+
+function compileNonNull(schema: Schema): Serialize {
+  switch (schema.type) {
+    case 'string':
+      return (v) => JSON.stringify(typeof v === 'string' ? v : String(v ?? ''));
+    case 'number':
+      return (v) => (typeof v === 'number' && Number.isFinite(v) ? String(v) : 'null');
+    case 'boolean':
+      return (v) => (v ? 'true' : 'false');
+    case 'array': {
+      const item = compile(schema.items);
+      return (v) => {
+        if (!Array.isArray(v) || v.length === 0) return '[]';
+        let out = '[' + item(v[0]);
+        for (let i = 1; i < v.length; i += 1) out += ',' + item(v[i]);
+        return out + ']';
+      };
+    }
+    case 'object': {
+      const fields = Object.entries(schema.properties).map(([key, prop], idx) => ({
+        key,
+        prefix: (idx ? ',' : '') + JSON.stringify(key) + ':',
+        write: compile(prop)
+      }));
+      return (v) => {
+        let out = '{';
+        for (const f of fields) out += f.prefix + f.write(v?.[f.key]);
+        return out + '}';
+      };
+    }
+  }
+}
+
+function compile(schema: Schema): Serialize {
+  const write = compileNonNull(schema);
+  if (!schema.nullable) return write;
+  return (v) => (v === null || v === undefined ? 'null' : write(v));
+}
+
+// Properties missing from the value are written as the schema's empty value (or null when
+// nullable); properties not in the schema are dropped.
+export function compileSerializer<T>(schema: Schema): (value: T) => string {
+  return compile(schema);
+}
+
+// COMPILED_SERIALIZERS=0 falls back to res.json (A/B runs with scripts/api_load_test.py).
+export function sendSerialized<T>(res: Response, serialize: (value: T) => string, value: T) {
+  if (process.env.COMPILED_SERIALIZERS === '0') res.json(value);
+  else res.type('application/json').send(serialize(value));
+}
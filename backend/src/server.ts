@@ -3,6 +3,9 @@ import cors from 'cors';
 import cookieParser from 'cookie-parser';
 import { readEnv } from './env';
 import { getPrisma } from './db';
+import { closeConnectionsWhileDraining, startServer } from './cluster';
+import { compressResponses } from './compression';
+import { traceRequests } from './queryTrace';
 import authRoutes from './routes/auth';
 import hotelRoutes from './routes/hotels';
 import structureRoutes from './routes/structure';
@@ -18,10 +21,20 @@ import reportRoutes from './routes/reports';
 import videoRoutes from './routes/videos';
 import quoteRoutes from './routes/quotes';
 import clientRoutes from './routes/clients';
+import changeRoutes from './routes/changes';
+import cleaningRoutes from './routes/cleaning';
+import searchRoutes from './routes/search';
+import dashboardRoutes from './routes/dashboard';
+import diagnosticsRoutes from './routes/diagnostics';
+import batchRoutes from './routes/batch';
 
 const env = readEnv();
 const app = express();
 
+// Behind Caddy/Docker the socket peer is the proxy; trust it for X-Forwarded-For so req.ip
+// (used by the public rate limits) is the real client.
+app.set('trust proxy', process.env.TRUST_PROXY || 'loopback, uniquelocal');
+
 function parseAllowedOrigins(raw: string): string[] {
   return String(raw || '')
     .split(',')
@@ -55,8 +68,12 @@ app.use(
     credentials: true
   })
 );
+app.use(closeConnectionsWhileDraining);
+app.use(compressResponses);
 app.use(express.json({ limit: '1mb' }));
 app.use(cookieParser());
+// After the body parsers: their stream callbacks would lose the per-request query context.
+app.use(traceRequests);
 
 app.get('/health', async (_req: Request, res: Response) => {
   try {
@@ -83,6 +100,12 @@ app.use('/api/v1', reportRoutes);
 app.use('/api/v1', videoRoutes);
 app.use('/api/v1', quoteRoutes);
 app.use('/api/v1', clientRoutes);
+app.use('/api/v1', changeRoutes);
+app.use('/api/v1', cleaningRoutes);
+app.use('/api/v1', searchRoutes);
+app.use('/api/v1', dashboardRoutes);
+app.use('/api/v1', diagnosticsRoutes);
+app.use('/api/v1', batchRoutes);
 
 // Final error handler (ensures JSON for API clients)
 app.use((err: any, req: Request, res: Response, next: any) => {
@@ -96,7 +119,5 @@ app.use((err: any, req: Request, res: Response, next: any) => {
   res.status(status).json({ error: status === 400 ? 'bad_request' : 'internal_server_error' });
 });
 
-app.listen(env.port, () => {
-  // eslint-disable-next-line no-console
-  console.log(`[api] listening on :${env.port}`);
-});
+// API_WORKERS > 1 forks one worker per slot; each worker runs this same app.
+startServer(app, env.port);
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Small closed-loop load harness for the API.
+
+Each thread keeps one keep-alive connection and fires requests back to back for
+FECO_LOAD_SECONDS. Compare runs of the server with API_WORKERS=1 and API_WORKERS=auto:
+throughput on CPU-bound paths (login = argon2, large JSON) should grow with cores.
+
+Env:
+  FECO_API_BASE, FECO_EMAIL, FECO_PASSWORD   same as api_smoke_test.py
+  FECO_LOAD_SECONDS       duration (default 20)
+  FECO_LOAD_CONCURRENCY   client threads (default 32)
+  FECO_LOAD_PATHS         comma-separated GET paths (default /api/v1/hotels);
+                          "{hotelId}" is replaced with the first hotel id
+  FECO_LOAD_LOGIN_EVERY   every Nth request is a login instead (default 0 = never)
+  FECO_LOAD_ENCODING      Accept-Encoding sent with GETs (default none, e.g. "br" or "gzip")
+
+Response bytes are counted as received (compressed), so running once without and once with
+FECO_LOAD_ENCODING gives the before/after size and latency of response compression.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlsplit
+
+from api_smoke_test import read_cfg
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class Conn:
+    def __init__(self, base_url: str):
+        u = urlsplit(base_url)
+        self.prefix = u.path.rstrip("/")
+        cls = HTTPSConnection if u.scheme == "https" else HTTPConnection
+        self.factory = lambda: cls(u.hostname, u.port, timeout=30)
+        self.conn = self.factory()
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        hdrs = dict(headers or {})
+        if data is not None:
+            hdrs["Content-Type"] = "application/json"
+        for attempt in range(2):
+            try:
+                self.conn.request(method, self.prefix + path, body=data, headers=hdrs)
+                resp = self.conn.getresponse()
+                raw = resp.read()
+                if resp.getheader("Connection", "").lower() == "close":
+                    self.conn.close()
+                    self.conn = self.factory()
+                return resp.status, raw
+            except (ConnectionError, OSError):
+                # Server closed the keep-alive connection (restart / drain): reconnect once.
+                self.conn.close()
+                self.conn = self.factory()
+                if attempt:
+                    raise
+        return 0, b""
+
+
+def main() -> int:
+    cfg = read_cfg()
+    seconds = float(os.getenv("FECO_LOAD_SECONDS", "20"))
+    concurrency = int(os.getenv("FECO_LOAD_CONCURRENCY", "32"))
+    paths = [p.strip() for p in os.getenv("FECO_LOAD_PATHS", "/api/v1/hotels").split(",") if p.strip()]
+    login_every = int(os.getenv("FECO_LOAD_LOGIN_EVERY", "0"))
+    encoding = os.getenv("FECO_LOAD_ENCODING", "").strip()
+    login_body = {"email": cfg.email, "password": cfg.password}
+
+    setup = Conn(cfg.base_url)
+    st, raw = setup.request("POST", "/api/v1/auth/login", login_body)
+    if st != 200:
+        print(f"login status={st} body={raw[:200]!r}", file=sys.stderr)
+        return 1
+    token = json.loads(raw).get("accessToken")
+    auth = {"Authorization": f"Bearer {token}"}
+    get_headers = dict(auth, **({"Accept-Encoding": encoding} if encoding else {}))
+    if any("{hotelId}" in p for p in paths):
+        st, raw = setup.request("GET", "/api/v1/hotels", headers=auth)
+        hotels = (json.loads(raw).get("hotels") or []) if st == 200 else []
+        if not hotels:
+            print("no hotel available for {hotelId}", file=sys.stderr)
+            return 1
+        paths = [p.replace("{hotelId}", hotels[0]["id"]) for p in paths]
+
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    received = [0]
+    deadline = time.monotonic() + seconds
+
+    def worker(n: int):
+        conn = Conn(cfg.base_url)
+        local_lat = []
+        local_status = {}
+        local_bytes = 0
+        i = n
+        while time.monotonic() < deadline:
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                if login_every and i % login_every == 0:
+                    st, raw = conn.request("POST", "/api/v1/auth/login", login_body)
+                else:
+                    st, raw = conn.request("GET", paths[i % len(paths)], headers=get_headers)
+            except Exception:
+                st, raw = 0, b""
+            local_bytes += len(raw)
+            local_lat.append(time.perf_counter() - t0)
+            local_status[st] = local_status.get(st, 0) + 1
+        with lock:
+            latencies.extend(local_lat)
+            received[0] += local_bytes
+            for k, v in local_status.items():
+                statuses[k] = statuses.get(k, 0) + v
+
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    total = len(latencies)
+    ok = sum(v for k, v in statuses.items() if 200 <= k < 300)
+    print(f"requests: {total} in {elapsed:.1f}s, concurrency {concurrency}")
+    print(f"throughput: {total / elapsed:.1f} req/s ({ok / elapsed:.1f} ok/s)")
+    print(
+        "latency ms: p50 {:.1f}  p95 {:.1f}  p99 {:.1f}  max {:.1f}".format(
+            percentile(latencies, 50) * 1000,
+            percentile(latencies, 95) * 1000,
+            percentile(latencies, 99) * 1000,
+            (latencies[-1] if latencies else 0) * 1000,
+        )
+    )
+    print(
+        "response bytes: avg {:.0f}  total {:.1f} MB (Accept-Encoding: {})".format(
+            received[0] / total if total else 0, received[0] / 1e6, encoding or "none"
+        )
+    )
+    print("status: " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items())))
+    return 0 if ok == total else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,7 +3,7 @@ import json
 import os
 import sys
 import time
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass
 from http.cookiejar import CookieJar
 from urllib.error import HTTPError, URLError
@@ -41,10 +41,10 @@ class Client:
         self.opener = build_opener(HTTPCookieProcessor(self.cookies))
         self.access_token = None
 
-    def request(self, method: str, path: str, json_body=None, auth: bool = False):
+    def request(self, method: str, path: str, json_body=None, auth: bool = False, headers=None):
         url = urljoin(self.cfg.base_url, path.lstrip("/"))
         data = None
-        headers = {}
+        headers = dict(headers or {})
         if json_body is not None:
             data = json.dumps(json_body).encode("utf-8")
             headers["Content-Type"] = "application/json"
@@ -429,6 +429,18 @@ def main() -> int:
         if not ev.get("id"):
             raise RuntimeError(f"missing event.id: {ev}")
 
+        # Retried event with an Idempotency-Key: same event back, no duplicate
+        idem = {"Idempotency-Key": f"smoke-{task_id}-note"}
+        note = {"action": "NOTE_ADDED", "note": "Smoke test note (retried)", "actorRole": "hotel_manager"}
+        st, raw = c.request("POST", f"/api/v1/tasks/{task_id}/events", note, auth=True, headers=idem)
+        if st not in (200, 201):
+            raise RuntimeError(f"idempotent event status={st} body={raw[:200]}")
+        first = (assert_json(st, raw).get("event") or {}).get("id")
+        st, raw = c.request("POST", f"/api/v1/tasks/{task_id}/events", note, auth=True, headers=idem)
+        again = (assert_json(st, raw).get("event") or {}).get("id")
+        if st not in (200, 201) or not first or again != first:
+            raise RuntimeError(f"idempotent retry status={st} first={first} again={again}")
+
         # Patch task via legacy alias (should accept db id too)
         st, raw = c.request(
             "PATCH",
@@ -457,6 +469,14 @@ def main() -> int:
         if not any(t.get("id") == task_id for t in tasks):
             raise RuntimeError("created task not found in list")
 
+        # Search (task description + event note)
+        st, raw = c.request("GET", f"/api/v1/search?q=smoke+test+note&hotelId={hotel_id}&types=task", auth=True)
+        if st != 200:
+            raise RuntimeError(f"search status={st} body={raw[:200]}")
+        hits = assert_json(st, raw).get("results") or []
+        if not any(h.get("id") == task_id and h.get("type") == "task" for h in hits):
+            raise RuntimeError(f"task not found by search: {hits[:3]}")
+
         # Staff tasks
         st, raw = c.request("GET", f"/api/v1/staff/{staff_id}/tasks?hotelId={hotel_id}", auth=True)
         if st != 200:
@@ -509,6 +529,17 @@ def main() -> int:
         if st not in (200, 201):
             raise RuntimeError(f"upload attachment (by-legacy) status={st} body={rawb2[:200]}")
 
+        # Queries run after the multipart body is parsed are still attributed to the upload routes
+        st, raw = c.request("GET", "/api/v1/diagnostics/queries", auth=True)
+        if st != 200:
+            raise RuntimeError(f"diagnostics status={st} body={raw[:200]}")
+        routes = {r.get("route"): r for r in assert_json(st, raw).get("routes") or []}
+        for route in ("POST /api/v1/tasks/:taskId/attachments", "POST /api/v1/tasks/by-legacy/:legacyTaskId/attachments"):
+            stats = routes.get(route)
+            # Missing only when another worker (API_WORKERS > 1) served the upload.
+            if stats and not stats.get("queries"):
+                raise RuntimeError(f"no queries counted for {route}: {stats}")
+
         # Download attachment file
         st, rawfile, headers = c.request_raw("GET", url, body=b"", content_type="application/octet-stream", auth=True)
         if st != 200:
@@ -604,6 +635,16 @@ def main() -> int:
         if approved.get("statusAdmin") != "APPROVED":
             raise RuntimeError(f"statusAdmin not approved: {approved}")
 
+        # Both sides approved -> room counts as cleaned on the reservation date
+        st, raw = c.request("GET", f"/api/v1/cleaning/due?hotelId={hotel_id}&withinDays=365", auth=True)
+        if st != 200:
+            raise RuntimeError(f"cleaning due status={st} body={raw[:200]}")
+        due_rooms = [r for f in (assert_json(st, raw).get("floors") or []) for r in (f.get("rooms") or [])]
+        due_room = next((r for r in due_rooms if r.get("id") == room_id), None)
+        expected_cleaned = int(datetime.fromisoformat(f"{proposed_date}T00:00:00+00:00").timestamp() * 1000)
+        if not due_room or due_room.get("lastCleaned") != expected_cleaned:
+            raise RuntimeError(f"room lastCleaned not updated on approval: {due_room}")
+
         # List reservations by hotel
         st, raw = c.request("GET", f"/api/v1/hotels/{hotel_id}/reservations", auth=True)
         if st != 200:
@@ -953,6 +994,28 @@ def main() -> int:
         if body.get("ok") is not True:
             raise RuntimeError(f"migration import not ok: {body}")
 
+        # Streaming NDJSON round-trip (one record per line)
+        st, raw = c.request("GET", "/api/v1/migration/localstorage/export?format=ndjson", auth=True)
+        if st != 200:
+            raise RuntimeError(f"ndjson export status={st} body={raw[:200]}")
+        records = [json.loads(line) for line in raw.splitlines() if line.strip()]
+        if not records or records[0].get("type") != "meta":
+            raise RuntimeError(f"ndjson export missing meta record: {records[:1]}")
+        if not any(r.get("type") == "hotel" for r in records):
+            raise RuntimeError("ndjson export has no hotel records")
+
+        st, rawb, _headers = c.request_raw(
+            "POST",
+            "/api/v1/migration/localstorage/import",
+            body=raw.encode("utf-8"),
+            content_type="application/x-ndjson",
+            auth=True,
+        )
+        if st != 200:
+            raise RuntimeError(f"ndjson import status={st} body={rawb[:200]}")
+        if json.loads(rawb.decode("utf-8")).get("ok") is not True:
+            raise RuntimeError("ndjson import not ok")
+
     # 9) hotel-scoped user auth + access control
     def s9():
         hotel_id = ctx.get("hotel_id")
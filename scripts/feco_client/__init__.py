@@ -0,0 +1,19 @@
+"""Async Python client for the Florida Eco Services API (stdlib only).
+
+    import asyncio
+    from feco_client import AsyncClient, Config
+
+    async def main():
+        async with AsyncClient(Config.from_env(max_concurrency=32)) as api:
+            await api.login()
+            hotels = await api.list_hotels()
+            structures = await asyncio.gather(*(api.get_structure(h["id"]) for h in hotels))
+
+    asyncio.run(main())
+
+Run scripts from `scripts/` (or put it on PYTHONPATH) so `feco_client` is importable.
+"""
+from .client import API, ApiError, AsyncClient, Config, build_multipart
+from .http import Response
+
+__all__ = ["API", "ApiError", "AsyncClient", "Config", "Response", "build_multipart"]
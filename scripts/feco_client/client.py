@@ -0,0 +1,424 @@
+"""Async API client: auth with refresh-token rotation, bounded concurrency, retries, typed calls."""
+import asyncio
+import json
+import os
+import random
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlencode
+
+from .http import Pool, Response, parse_cookie
+
+JsonObject = Dict[str, Any]
+
+API = "/api/v1"
+
+# Safe to resend after a dropped connection or a gateway error (as is any call sent with an
+# Idempotency-Key: the server replays the first response instead of running it twice).
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+# 429 rate_limited / 503 server_busy are returned before any handler runs: retriable for every method.
+REJECTED_STATUSES = {429, 503}
+GATEWAY_STATUSES = {502, 504}
+
+
+class ApiError(Exception):
+    def __init__(self, method: str, path: str, status: int, body: Any):
+        self.method = method
+        self.path = path
+        self.status = status
+        self.body = body
+        self.error = body.get("error") if isinstance(body, dict) else None
+        super().__init__(f"{method} {path} -> {status} {self.error or str(body)[:200]}")
+
+
+@dataclass
+class Config:
+    base_url: str = "http://localhost:3001"
+    email: str = ""
+    password: str = ""
+    max_concurrency: int = 16
+    max_retries: int = 4
+    backoff_base: float = 0.25
+    backoff_max: float = 8.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "Config":
+        """Same variables as scripts/api_smoke_test.py (FECO_API_BASE, FECO_EMAIL, FECO_PASSWORD)."""
+        cfg = cls(
+            base_url=os.getenv("FECO_API_BASE", "http://localhost:3001").rstrip("/"),
+            email=os.getenv("FECO_EMAIL", "").strip().lower(),
+            password=os.getenv("FECO_PASSWORD", "").strip(),
+            max_concurrency=int(os.getenv("FECO_CLIENT_CONCURRENCY", "16")),
+        )
+        for key, value in overrides.items():
+            setattr(cfg, key, value)
+        return cfg
+
+
+def _path(template: str, *ids: str) -> str:
+    return template.format(*(quote(str(i), safe="") for i in ids))
+
+
+def _query(params: Dict[str, Any]) -> str:
+    clean = {k: v for k, v in params.items() if v is not None and v != ""}
+    return ("?" + urlencode(clean)) if clean else ""
+
+
+def _idempotency() -> Dict[str, str]:
+    # One key per logical call, reused by every retry of that call.
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+
+def build_multipart(fields: Dict[str, Any], files: Sequence[Tuple[str, str, str, bytes]]) -> Tuple[bytes, str]:
+    """files: (fieldname, filename, content_type, data)."""
+    boundary = "----fecoClient" + "".join(random.choice("0123456789abcdef") for _ in range(24))
+    parts: List[bytes] = []
+    for key, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode())
+    for fieldname, filename, content_type, data in files:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{fieldname}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode()
+        )
+        parts.append(data)
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class AsyncClient:
+    """Usage:
+
+        async with AsyncClient(Config.from_env()) as api:
+            await api.login()
+            hotels = await api.list_hotels()
+
+    Every call waits for one of `max_concurrency` slots, so `asyncio.gather` over thousands of
+    calls keeps at most that many requests (and pooled connections) in flight. An expired access
+    token is refreshed once (rotating the refresh cookie) and the call replayed; concurrent 401s
+    share a single refresh.
+    """
+
+    def __init__(self, cfg: Optional[Config] = None):
+        self.cfg = cfg or Config.from_env()
+        self.pool = Pool(
+            self.cfg.base_url,
+            max_idle=self.cfg.max_concurrency,
+            connect_timeout=self.cfg.connect_timeout,
+            read_timeout=self.cfg.read_timeout,
+        )
+        self.access_token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self._slots = asyncio.Semaphore(self.cfg.max_concurrency)
+        self._refresh_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    # ===== Transport =====
+
+    def _headers(self, path: str, content_type: Optional[str], extra: Optional[Dict[str, str]]) -> Dict[str, str]:
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        if self.refresh_token and path.startswith(f"{API}/auth/"):
+            headers["Cookie"] = f"refresh_token={self.refresh_token}"
+        headers.update(extra or {})
+        return headers
+
+    def _keep_cookies(self, resp: Response) -> None:
+        for raw in resp.set_cookies:
+            name, value = parse_cookie(raw)
+            if name == "refresh_token":
+                self.refresh_token = value or None
+
+    def _backoff(self, attempt: int, resp: Optional[Response]) -> float:
+        retry_after = resp.headers.get("retry-after") if resp else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.cfg.backoff_max)
+        delay = min(self.cfg.backoff_max, self.cfg.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _send(
+        self, method: str, path: str, body: bytes, content_type: Optional[str], headers: Optional[Dict[str, str]], auth_retry: bool
+    ) -> Response:
+        """One logical call: retries, backoff and token refresh. Caller holds a slot."""
+        attempt = 0
+        replay_safe = method in IDEMPOTENT_METHODS or "Idempotency-Key" in (headers or {})
+        while True:
+            token_used = self.access_token
+            resp: Optional[Response] = None
+            try:
+                resp = await self.pool.request(method, path, self._headers(path, content_type, headers), body)
+            except (ConnectionError, OSError, asyncio.TimeoutError):
+                if not replay_safe or attempt >= self.cfg.max_retries:
+                    raise
+            if resp is not None:
+                self._keep_cookies(resp)
+                if resp.status == 401 and auth_retry and token_used:
+                    resp.close()
+                    await self._refresh_after_401(token_used)
+                    auth_retry = False
+                    continue
+                retriable = resp.status in REJECTED_STATUSES or (resp.status in GATEWAY_STATUSES and replay_safe)
+                if not retriable or attempt >= self.cfg.max_retries:
+                    return resp
+                resp.close()
+            await asyncio.sleep(self._backoff(attempt, resp))
+            attempt += 1
+
+    async def _refresh_after_401(self, stale_token: str) -> None:
+        async with self._refresh_lock:
+            if self.access_token != stale_token:
+                return  # another call already refreshed
+            try:
+                await self.refresh()
+            except ApiError:
+                if not (self.cfg.email and self.cfg.password):
+                    raise
+                await self.login()
+
+    @staticmethod
+    async def _decode(method: str, path: str, resp: Response) -> Any:
+        raw = await resp.read()
+        data: Any = None
+        if raw:
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                data = raw.decode("utf-8", "replace")
+        if not resp.ok:
+            raise ApiError(method, path, resp.status, data)
+        return data
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        json_body: Any = None,
+        *,
+        body: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """Sends a call and returns the decoded JSON body; raises ApiError on non-2xx."""
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            content_type = "application/json"
+        async with self._slots:
+            resp = await self._send(method, path, body or b"", content_type, headers, True)
+            return await self._decode(method, path, resp)
+
+    async def _auth_call(self, path: str, payload: JsonObject) -> JsonObject:
+        # No slot: a refresh runs while the calls waiting for it hold theirs.
+        body = json.dumps(payload).encode("utf-8")
+        resp = await self._send("POST", path, body, "application/json", None, False)
+        return await self._decode("POST", path, resp)
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[Response]:
+        """Keeps the slot and the connection until the block exits; read with resp.iter_bytes()."""
+        async with self._slots:
+            resp = await self._send(method, path, b"", None, headers, True)
+            try:
+                if not resp.ok:
+                    await self._decode(method, path, resp)
+                yield resp
+            finally:
+                resp.close()
+
+    async def download(self, path: str, dest: str) -> int:
+        """Streams a file to `dest` (written to a temp file, then renamed); returns the byte count."""
+        tmp = f"{dest}.part"
+        size = 0
+        async with self.stream("GET", path) as resp:
+            with open(tmp, "wb") as fh:
+                async for chunk in resp.iter_bytes():
+                    fh.write(chunk)
+                    size += len(chunk)
+        os.replace(tmp, dest)
+        return size
+
+    # ===== Auth =====
+
+    async def login(self, email: Optional[str] = None, password: Optional[str] = None) -> JsonObject:
+        body = {"email": email or self.cfg.email, "password": password or self.cfg.password}
+        data = await self._auth_call(f"{API}/auth/login", body)
+        self.access_token = data.get("accessToken")
+        return data
+
+    async def refresh(self) -> JsonObject:
+        """Rotates the refresh cookie and returns a new access token."""
+        data = await self._auth_call(f"{API}/auth/refresh", {})
+        self.access_token = data.get("accessToken")
+        return data
+
+    async def logout(self) -> None:
+        await self._auth_call(f"{API}/auth/logout", {})
+        self.access_token = None
+        self.refresh_token = None
+
+    async def me(self) -> JsonObject:
+        return await self.request("GET", f"{API}/auth/me")
+
+    # ===== Hotels & structure =====
+
+    async def list_hotels(self) -> List[JsonObject]:
+        return (await self.request("GET", f"{API}/hotels"))["hotels"]
+
+    async def create_hotel(self, name: str) -> JsonObject:
+        return (await self.request("POST", f"{API}/hotels", {"name": name}))["hotel"]
+
+    async def update_hotel(self, hotel_id: str, **fields: Any) -> JsonObject:
+        return (await self.request("PATCH", _path(API + "/hotels/{}", hotel_id), fields))["hotel"]
+
+    async def get_structure(self, hotel_id: str) -> List[JsonObject]:
+        return (await self.request("GET", _path(API + "/hotels/{}/structure", hotel_id)))["buildings"]
+
+    async def create_building(self, hotel_id: str, name: str, notes: str = "") -> JsonObject:
+        body = {"name": name, "notes": notes}
+        return (await self.request("POST", _path(API + "/hotels/{}/buildings", hotel_id), body))["building"]
+
+    async def create_floor(self, building_id: str, name_or_number: str, sort_order: Optional[int] = None) -> JsonObject:
+        body = {"nameOrNumber": name_or_number, "sortOrder": sort_order}
+        return (await self.request("POST", _path(API + "/buildings/{}/floors", building_id), body))["floor"]
+
+    async def create_room(self, floor_id: str, room_number: str, **fields: Any) -> JsonObject:
+        body = {"roomNumber": room_number, **fields}
+        return (await self.request("POST", _path(API + "/floors/{}/rooms", floor_id), body))["room"]
+
+    async def update_room(self, room_id: str, **fields: Any) -> JsonObject:
+        return (await self.request("PATCH", _path(API + "/rooms/{}", room_id), fields))["room"]
+
+    async def create_space(self, floor_id: str, name: str, **fields: Any) -> JsonObject:
+        body = {"name": name, **fields}
+        return (await self.request("POST", _path(API + "/floors/{}/spaces", floor_id), body))["space"]
+
+    # ===== Tasks & attachments =====
+
+    async def list_tasks(self, hotel_id: str) -> List[JsonObject]:
+        return (await self.request("GET", _path(API + "/hotels/{}/tasks", hotel_id)))["tasks"]
+
+    async def get_task(self, task_id: str) -> JsonObject:
+        return (await self.request("GET", _path(API + "/tasks/{}", task_id)))["task"]
+
+    async def create_task(self, hotel_id: str, task: JsonObject) -> JsonObject:
+        path = _path(API + "/hotels/{}/tasks", hotel_id)
+        return (await self.request("POST", path, task, headers=_idempotency()))["task"]
+
+    async def update_task(self, task_id: str, **fields: Any) -> JsonObject:
+        return (await self.request("PATCH", _path(API + "/tasks/{}", task_id), fields))["task"]
+
+    async def add_task_event(self, task_id: str, event: JsonObject) -> JsonObject:
+        path = _path(API + "/tasks/{}/events", task_id)
+        return (await self.request("POST", path, event, headers=_idempotency()))["event"]
+
+    async def list_attachments(self, task_id: str) -> List[JsonObject]:
+        return (await self.request("GET", _path(API + "/tasks/{}/attachments", task_id)))["attachments"]
+
+    async def upload_attachment(self, task_id: str, filename: str, data: bytes, content_type: str = "image/jpeg") -> JsonObject:
+        body, ctype = build_multipart({}, [("file", filename, content_type, data)])
+        path = _path(API + "/tasks/{}/attachments", task_id)
+        return (await self.request("POST", path, body=body, content_type=ctype, headers=_idempotency()))["attachment"]
+
+    async def download_attachment(self, task_id: str, attachment_id: str, dest: str) -> int:
+        return await self.download(_path(API + "/tasks/{}/attachments/{}/file", task_id, attachment_id), dest)
+
+    async def delete_attachment(self, task_id: str, attachment_id: str) -> None:
+        await self.request("DELETE", _path(API + "/tasks/{}/attachments/{}", task_id, attachment_id))
+
+    # ===== Planning =====
+
+    async def list_reservations(self, hotel_id: str) -> List[JsonObject]:
+        return (await self.request("GET", _path(API + "/hotels/{}/reservations", hotel_id)))["reservations"]
+
+    async def create_reservation(self, hotel_id: str, reservation: JsonObject) -> JsonObject:
+        path = _path(API + "/hotels/{}/reservations", hotel_id)
+        return (await self.request("POST", path, reservation, headers=_idempotency()))["reservation"]
+
+    async def update_reservation(self, reservation_id: str, **fields: Any) -> JsonObject:
+        return (await self.request("PATCH", _path(API + "/reservations/{}", reservation_id), fields))["reservation"]
+
+    async def cancel_reservation(self, reservation_id: str, reason: str = "") -> JsonObject:
+        path = _path(API + "/reservations/{}/cancel", reservation_id)
+        return (await self.request("POST", path, {"reason": reason}))["reservation"]
+
+    async def batch(self, operations: Sequence[JsonObject], atomic: bool = False) -> JsonObject:
+        """Runs queued writes in one call; operations are {id?, method, path, body?}.
+
+        Returns {committed, results: [{id, status, body}]}; per-operation failures are reported in
+        the results, not raised.
+        """
+        body = {"atomic": atomic, "operations": list(operations)}
+        return await self.request("POST", API + "/batch", body, headers=_idempotency())
+
+    async def list_sessions(self, hotel_id: str) -> List[JsonObject]:
+        return (await self.request("GET", _path(API + "/hotels/{}/sessions", hotel_id)))["sessions"]
+
+    async def list_technicians(self) -> List[JsonObject]:
+        return (await self.request("GET", f"{API}/technicians"))["technicians"]
+
+    async def list_blocked_slots(self) -> List[JsonObject]:
+        return (await self.request("GET", f"{API}/blocked-slots"))["blockedSlots"]
+
+    async def roadmap(self, hotel_id: str, date: str) -> JsonObject:
+        return await self.request("GET", f"{API}/reports/roadmap" + _query({"hotelId": hotel_id, "date": date}))
+
+    # ===== Contracts & pricing =====
+
+    async def get_pricing_defaults(self) -> JsonObject:
+        return (await self.request("GET", f"{API}/pricing/defaults"))["defaults"]
+
+    async def list_contracts(self, hotel_id: str) -> List[JsonObject]:
+        return (await self.request("GET", _path(API + "/hotels/{}/contracts", hotel_id)))["contracts"]
+
+    async def create_contract(self, hotel_id: str, contract: JsonObject) -> JsonObject:
+        return (await self.request("POST", _path(API + "/hotels/{}/contracts", hotel_id), contract))["contract"]
+
+    async def send_contract(self, contract_id: str, **fields: Any) -> JsonObject:
+        return await self.request("POST", _path(API + "/contracts/{}/send", contract_id), fields)
+
+    # ===== Quotes =====
+
+    async def list_quotes(self) -> List[JsonObject]:
+        return (await self.request("GET", f"{API}/quotes"))["quotes"]
+
+    async def get_quote(self, quote_id: str) -> JsonObject:
+        return (await self.request("GET", _path(API + "/quotes/{}", quote_id)))["quote"]
+
+    async def create_quote(self, quote: JsonObject) -> JsonObject:
+        return (await self.request("POST", f"{API}/quotes", quote))["quote"]
+
+    async def update_quote(self, quote_id: str, **fields: Any) -> JsonObject:
+        return (await self.request("PATCH", _path(API + "/quotes/{}", quote_id), fields))["quote"]
+
+    async def download_quote_pdf(self, quote_id: str, dest: str) -> int:
+        return await self.download(_path(API + "/quotes/{}/pdf", quote_id), dest)
+
+    # ===== Migration =====
+
+    async def export_localstorage(self) -> JsonObject:
+        return (await self.request("GET", f"{API}/migration/localstorage/export"))["data"]
+
+    async def iter_export_records(self) -> AsyncIterator[JsonObject]:
+        """NDJSON export, one record at a time without holding the whole export in memory."""
+        headers = {"Accept": "application/x-ndjson"}
+        async with self.stream("GET", f"{API}/migration/localstorage/export?format=ndjson", headers) as resp:
+            async for line in resp.iter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    async def import_localstorage(self, payload: JsonObject) -> JsonObject:
+        return await self.request("POST", f"{API}/migration/localstorage/import", payload)
@@ -0,0 +1,237 @@
+"""Minimal asyncio HTTP/1.1 client with keep-alive connection pooling (stdlib only)."""
+import asyncio
+import ssl
+import zlib
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ConnectionClosed(Exception):
+    """The server closed a pooled connection before sending any response byte."""
+
+
+class _Conn:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class Response:
+    def __init__(self, pool: "Pool", conn: _Conn, status: int, reason: str, headers: Dict[str, str], cookies: List[str], head: bool):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.set_cookies = cookies
+        self._pool = pool
+        self._conn: Optional[_Conn] = conn
+        self._head = head
+        self._body: Optional[bytes] = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    async def _raw_chunks(self) -> AsyncIterator[bytes]:
+        conn = self._conn
+        assert conn is not None
+        reader = conn.reader
+        te = self.headers.get("transfer-encoding", "").lower()
+        length = self.headers.get("content-length")
+        reusable = self.headers.get("connection", "").lower() != "close"
+
+        if self._head or self.status in (204, 304) or 100 <= self.status < 200:
+            pass
+        elif "chunked" in te:
+            while True:
+                size_line = await self._read(reader.readline())
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await self._read(reader.readline())) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                remaining = size
+                while remaining:
+                    data = await self._read(reader.read(min(remaining, CHUNK_SIZE)))
+                    if not data:
+                        raise ConnectionError("connection closed mid-body")
+                    remaining -= len(data)
+                    yield data
+                await self._read(reader.readline())
+        elif length is not None:
+            remaining = int(length)
+            while remaining:
+                data = await self._read(reader.read(min(remaining, CHUNK_SIZE)))
+                if not data:
+                    raise ConnectionError("connection closed mid-body")
+                remaining -= len(data)
+                yield data
+        else:
+            reusable = False
+            while True:
+                data = await self._read(reader.read(CHUNK_SIZE))
+                if not data:
+                    break
+                yield data
+
+        self._release(reusable)
+
+    async def _read(self, coro):
+        return await asyncio.wait_for(coro, self._pool.read_timeout)
+
+    def _release(self, reusable: bool) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if reusable:
+            self._pool.put(conn)
+        else:
+            conn.close()
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Body chunks as they arrive (gzip-decoded when the server compressed them)."""
+        if self._body is not None:
+            yield self._body
+            return
+        decoder = None
+        if self.headers.get("content-encoding", "").lower() == "gzip":
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            async for data in self._raw_chunks():
+                out = decoder.decompress(data) if decoder else data
+                if out:
+                    yield out
+            if decoder:
+                tail = decoder.flush()
+                if tail:
+                    yield tail
+        finally:
+            # Not fully consumed (caller stopped early or error): the connection can't be reused.
+            self._release(False)
+
+    async def iter_lines(self) -> AsyncIterator[bytes]:
+        pending = b""
+        async for data in self.iter_bytes():
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.rstrip(b"\r")
+        if pending:
+            yield pending
+
+    async def read(self) -> bytes:
+        if self._body is None:
+            self._body = b"".join([chunk async for chunk in self.iter_bytes()])
+        return self._body
+
+    def close(self) -> None:
+        self._release(False)
+
+
+class Pool:
+    """Keep-alive connections to one origin. Idle connections are reused LIFO."""
+
+    def __init__(self, base_url: str, max_idle: int = 32, connect_timeout: float = 10.0, read_timeout: float = 60.0):
+        u = urlsplit(base_url)
+        self.scheme = u.scheme or "http"
+        self.host = u.hostname or "localhost"
+        self.port = u.port or (443 if self.scheme == "https" else 80)
+        self.host_header = u.netloc or self.host
+        self.prefix = u.path.rstrip("/")
+        self.max_idle = max_idle
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._ssl = ssl.create_default_context() if self.scheme == "https" else None
+        self._idle: List[_Conn] = []
+
+    async def _connect(self) -> _Conn:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self._ssl, limit=CHUNK_SIZE * 4),
+            self.connect_timeout,
+        )
+        return _Conn(reader, writer)
+
+    async def _get(self) -> _Conn:
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn.writer.is_closing() and not conn.reader.at_eof():
+                conn.reused = True
+                return conn
+            conn.close()
+        return await self._connect()
+
+    def put(self, conn: _Conn) -> None:
+        if len(self._idle) >= self.max_idle or conn.writer.is_closing():
+            conn.close()
+            return
+        self._idle.append(conn)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    async def request(self, method: str, path: str, headers: Dict[str, str], body: bytes = b"") -> Response:
+        """Sends one request and returns once the response head has arrived.
+
+        A pooled connection the server already closed is retried once on a fresh one; nothing
+        reached the server in that case, so this is safe for every method.
+        """
+        for attempt in range(2):
+            conn = await self._get()
+            try:
+                return await self._exchange(conn, method, path, headers, body)
+            except ConnectionClosed:
+                conn.close()
+                if attempt or not conn.reused:
+                    raise ConnectionError("connection closed before response")
+            except BaseException:
+                conn.close()
+                raise
+        raise ConnectionError("unreachable")
+
+    async def _exchange(self, conn: _Conn, method: str, path: str, headers: Dict[str, str], body: bytes) -> Response:
+        lines = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host_header}"]
+        hdrs = dict(headers)
+        if body or method in ("POST", "PUT", "PATCH"):
+            hdrs["Content-Length"] = str(len(body))
+        lines.extend(f"{k}: {v}" for k, v in hdrs.items())
+        conn.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await conn.writer.drain()
+            status_line = await asyncio.wait_for(conn.reader.readline(), self.read_timeout)
+        except (ConnectionResetError, BrokenPipeError):
+            raise ConnectionClosed()
+        if not status_line:
+            raise ConnectionClosed()
+
+        parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+        headers_out: Dict[str, str] = {}
+        cookies: List[str] = []
+        while True:
+            line = await asyncio.wait_for(conn.reader.readline(), self.read_timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            if name == "set-cookie":
+                cookies.append(value)
+            elif name in headers_out:
+                headers_out[name] += ", " + value
+            else:
+                headers_out[name] = value
+        return Response(self, conn, status, reason, headers_out, cookies, head=method == "HEAD")
+
+
+def parse_cookie(set_cookie: str) -> Tuple[str, str]:
+    pair = set_cookie.split(";", 1)[0]
+    name, _, value = pair.partition("=")
+    return name.strip(), value.strip()
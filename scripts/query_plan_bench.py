@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Query-plan regression check for the API's hot queries.
+
+Seeds a migrated local PostgreSQL with a synthetic organization (inside a transaction that is
+rolled back at the end), refreshes statistics, then runs EXPLAIN (ANALYZE, BUFFERS) on each hot
+query as the API issues it. Fails when a plan reads a hot table with a sequential scan or needs
+a sort, i.e. when the composite indexes stop matching the access paths.
+
+Needs only `psql` (no Python driver).
+
+Env:
+  DATABASE_URL             target database (Prisma URL is fine; ?schema= is dropped)
+  FECO_BENCH_PSQL          psql command (default "psql"), e.g.
+                           "docker compose exec -T db psql -U floridaeco floridaeco" (then DATABASE_URL is not needed)
+  FECO_BENCH_HOTELS        hotels to seed (default 200)
+  FECO_BENCH_PER_HOTEL     tasks, reservations and sessions per hotel (default 500)
+"""
+import json
+import os
+import shlex
+import subprocess
+import sys
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+ORG = "bench-org"
+HOTEL = "bench-hotel-42"
+
+HOT_TABLES = {"Task", "Reservation", "Session"}
+
+# Same filters and ordering as the Prisma queries in backend/src/routes.
+QUERIES = {
+    "tasks by hotel (GET /hotels/:hotelId/tasks)": f"""
+        SELECT * FROM "Task"
+        WHERE "hotelId" = '{HOTEL}' AND "organizationId" = '{ORG}'
+        ORDER BY "createdAt" DESC
+    """,
+    "roadmap reservations (GET /reports/roadmap)": f"""
+        SELECT * FROM "Reservation"
+        WHERE "organizationId" = '{ORG}' AND "hotelId" = '{HOTEL}' AND "proposedDate" = to_char(current_date, 'YYYY-MM-DD')
+          AND "statusAdmin" = 'APPROVED' AND "statusHotel" = 'APPROVED'
+        ORDER BY "proposedStart" ASC, "createdAt" ASC
+    """,
+    "approved reservations (GET /reports/annual)": f"""
+        SELECT * FROM "Reservation"
+        WHERE "organizationId" = '{ORG}' AND "hotelId" = '{HOTEL}'
+          AND "statusAdmin" = 'APPROVED' AND "statusHotel" = 'APPROVED'
+        ORDER BY "proposedDate" ASC, "proposedStart" ASC, "createdAt" ASC
+    """,
+    "upcoming reservations (GET /hotels/:hotelId/dashboard)": f"""
+        SELECT "id", "proposedDate", "proposedStart", "durationMinutes", "roomIds", "spaceIds" FROM "Reservation"
+        WHERE "organizationId" = '{ORG}' AND "hotelId" = '{HOTEL}'
+          AND "statusAdmin" = 'APPROVED' AND "statusHotel" = 'APPROVED' AND "cancelledAt" IS NULL
+          AND "proposedDate" >= to_char(current_date, 'YYYY-MM-DD')
+        ORDER BY "proposedDate" ASC, "proposedStart" ASC
+        LIMIT 5
+    """,
+    "sessions by hotel (GET /hotels/:hotelId/sessions)": f"""
+        SELECT * FROM "Session"
+        WHERE "hotelId" = '{HOTEL}' AND "organizationId" = '{ORG}'
+        ORDER BY "date" ASC
+    """,
+}
+
+
+def seed_sql(hotels: int, per_hotel: int) -> str:
+    rows = hotels * per_hotel
+    return f"""
+INSERT INTO "Organization" ("id", "name", "updatedAt") VALUES ('{ORG}', 'Query plan bench', now());
+INSERT INTO "Hotel" ("id", "legacyId", "name", "organizationId", "updatedAt")
+  SELECT 'bench-hotel-' || h, 'bench-hotel-' || h, 'Bench hotel ' || h, '{ORG}', now()
+  FROM generate_series(1, {hotels}) h;
+INSERT INTO "Task" ("id", "legacyId", "organizationId", "hotelId", "status", "priority", "description", "createdAt", "updatedAt")
+  SELECT 'bench-task-' || i, 'bench-task-' || i, '{ORG}', 'bench-hotel-' || (1 + i % {hotels}),
+    (ARRAY['OPEN', 'IN_PROGRESS', 'BLOCKED', 'DONE', 'DONE'])[1 + i % 5]::"TaskStatus",
+    (ARRAY['NORMAL', 'NORMAL', 'HIGH', 'URGENT'])[1 + i % 4]::"TaskPriority",
+    'Bench task ' || i, now() - i * INTERVAL '1 minute', now()
+  FROM generate_series(1, {rows}) i;
+INSERT INTO "Reservation" ("id", "organizationId", "hotelId", "token", "statusAdmin", "statusHotel", "proposedDate", "proposedStart", "createdAt", "updatedAt")
+  SELECT 'bench-res-' || i, '{ORG}', 'bench-hotel-' || (1 + i % {hotels}), 'bench-res-token-' || i,
+    (ARRAY['APPROVED', 'APPROVED', 'PROPOSED', 'CANCELLED'])[1 + i % 4]::"ReservationStatus",
+    (ARRAY['APPROVED', 'PENDING', 'APPROVED'])[1 + i % 3]::"ReservationStatus",
+    to_char(current_date + (i % 730 - 365), 'YYYY-MM-DD'), lpad((7 + i % 11)::text, 2, '0') || ':00',
+    now() - i * INTERVAL '1 minute', now()
+  FROM generate_series(1, {rows}) i;
+INSERT INTO "Session" ("id", "legacyId", "organizationId", "hotelId", "date", "start", "updatedAt")
+  SELECT 'bench-session-' || i, 'bench-session-' || i, '{ORG}', 'bench-hotel-' || (1 + i % {hotels}),
+    to_char(current_date + (i % 730 - 365), 'YYYY-MM-DD'), '09:00', now()
+  FROM generate_series(1, {rows}) i;
+ANALYZE "Task";
+ANALYZE "Reservation";
+ANALYZE "Session";
+"""
+
+
+def psql_command():
+    custom = os.getenv("FECO_BENCH_PSQL", "").strip()
+    if custom:
+        return shlex.split(custom)
+    url = os.getenv("DATABASE_URL", "").strip()
+    if not url:
+        print("Missing DATABASE_URL (or FECO_BENCH_PSQL)", file=sys.stderr)
+        raise SystemExit(1)
+    # psql rejects Prisma-only parameters such as ?schema=public.
+    u = urlsplit(url)
+    query = urlencode([(k, v) for k, v in parse_qsl(u.query) if k not in ("schema", "connection_limit", "pool_timeout")])
+    return ["psql", urlunsplit((u.scheme, u.netloc, u.path, query, u.fragment))]
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def check_plan(plan):
+    problems = []
+    for node in walk(plan):
+        kind = node.get("Node Type", "")
+        if kind == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+            problems.append(f'sequential scan on "{node["Relation Name"]}"')
+        elif kind in ("Sort", "Incremental Sort"):
+            keys = ", ".join(node.get("Sort Key", []))
+            problems.append(f"{kind.lower()} on {keys}")
+    return problems
+
+
+def main() -> int:
+    hotels = int(os.getenv("FECO_BENCH_HOTELS", "200"))
+    per_hotel = int(os.getenv("FECO_BENCH_PER_HOTEL", "500"))
+
+    script = ["\\set ON_ERROR_STOP on", "BEGIN;", seed_sql(hotels, per_hotel)]
+    names = list(QUERIES)
+    for idx, name in enumerate(names):
+        script.append(f"\\echo '@@plan {idx}'")
+        script.append(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {QUERIES[name].strip()};")
+    script.append("ROLLBACK;")
+
+    print(f"seeding {hotels} hotels x {per_hotel} rows per table (rolled back afterwards)...")
+    proc = subprocess.run(
+        psql_command() + ["-X", "-q", "-A", "-t"],
+        input="\n".join(script),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr.strip() or proc.stdout.strip(), file=sys.stderr)
+        return 1
+
+    outputs = {}
+    current = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@plan "):
+            current = int(line.split()[1])
+            outputs[current] = []
+        elif current is not None:
+            outputs[current].append(line)
+
+    failed = 0
+    for idx, name in enumerate(names):
+        result = json.loads("\n".join(outputs.get(idx, [])) or "null")
+        if not result:
+            print(f"FAIL {name}: no plan returned")
+            failed += 1
+            continue
+        plan = result[0]["Plan"]
+        problems = check_plan(plan)
+        print(
+            "{} {}: {:.2f} ms, {} rows, buffers hit {} read {}".format(
+                "FAIL" if problems else "ok  ",
+                name,
+                result[0].get("Execution Time", 0.0),
+                plan.get("Actual Rows", 0),
+                plan.get("Shared Hit Blocks", 0),
+                plan.get("Shared Read Blocks", 0),
+            )
+        )
+        for problem in problems:
+            print(f"     - {problem}")
+        if problems:
+            failed += 1
+
+    print("OK" if not failed else f"{failed} plan regression(s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())